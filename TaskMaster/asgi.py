@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 
 import os
 
+import django
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'TaskMaster.settings.base')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'TaskMaster.settings.prod')
 
 application = get_asgi_application()
+
+if django.VERSION < (5, 0):
+    # server-sent event streams (apps.ai.views) stop when the client goes away
+    from apps.common.asgi import CancelOnDisconnect
+
+    application = CancelOnDisconnect(application)
@@ -0,0 +1,11 @@
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "TaskMaster.settings.prod")
+
+app = Celery("TaskMaster")
+
+# CELERY_* settings from Django, tasks from each app's tasks.py
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
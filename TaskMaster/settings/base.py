@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     "corsheaders",
     "rest_framework",
@@ -136,26 +137,121 @@ if DEBUG:
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Cache (must be shared between workers, e.g. CACHE_URL=redis://..., when running more than one)
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
+# Per-user versioned response cache for task reads (apps.tasks.cache)
+TASK_RESPONSE_CACHE = env.bool("TASK_RESPONSE_CACHE", default=True)
+
+# Per-worker in-memory dependency graphs, kept current through a change log in
+# the cache (apps.tasks.graph); off = load the graph from the database per read
+TASK_GRAPH_CACHE = env.bool("TASK_GRAPH_CACHE", default=True)
+
+# AI inference (apps.ai.services): AI_PROVIDER picks an entry of AI_PROVIDERS.
+# max_concurrency = in-flight calls per worker process, timeout in seconds per attempt.
+AI_PROVIDER = env("AI_PROVIDER", default="stub")
+AI_PROVIDERS = {
+    "stub": {
+        "backend": "apps.ai.services.providers.StubProvider",
+        "latency_ms": env.int("AI_STUB_LATENCY_MS", default=0),
+        "max_concurrency": 64,
+        "timeout": 5.0,
+        "max_retries": 0,
+    },
+    "openai": {
+        "backend": "apps.ai.services.providers.OpenAIProvider",
+        "base_url": env("OPENAI_BASE_URL", default="https://api.openai.com/v1"),
+        "api_key": env("OPENAI_API_KEY", default=""),
+        "model": env("OPENAI_MODEL", default="gpt-4o-mini"),
+        "max_concurrency": env.int("OPENAI_MAX_CONCURRENCY", default=8),
+        "timeout": env.float("OPENAI_TIMEOUT", default=20.0),
+        "max_retries": env.int("OPENAI_MAX_RETRIES", default=2),
+    },
+}
+
+# Micro-batching (apps.ai.services.batching): concurrent calls to these provider
+# methods are sent as one batch once max_batch_size are queued or max_wait_ms
+# after the first; only for providers implementing <method>_batch.
+AI_BATCHING = {
+    "suggest_priority": {
+        "max_batch_size": env.int("AI_PRIORITY_BATCH_SIZE", default=16),
+        "max_wait_ms": env.float("AI_PRIORITY_BATCH_WAIT_MS", default=10),
+    },
+}
+
+# Semantic response cache in front of the AI endpoints (apps.ai.services.semantic_cache):
+# exact normalized text first, then embedding cosine >= threshold. Per worker process.
+AI_CACHE_ENABLED = env.bool("AI_CACHE_ENABLED", default=True)
+AI_CACHE_EMBEDDING = "apps.ai.services.semantic_cache.hashed_embedding"
+AI_CACHE = {
+    "breakdown-task": {"threshold": 0.8, "ttl": 60 * 60 * 24, "max_entries": 5000},
+    "suggest-priority": {"threshold": 0.85, "ttl": 60 * 60 * 6, "max_entries": 5000},
+}
+
+# InferenceLog rows are buffered per worker and bulk inserted every
+# AI_LOG_BATCH_SIZE rows / AI_LOG_FLUSH_INTERVAL seconds (apps.ai.services.inference_log)
+AI_LOG_BATCH_SIZE = env.int("AI_LOG_BATCH_SIZE", default=100)
+AI_LOG_FLUSH_INTERVAL = env.float("AI_LOG_FLUSH_INTERVAL", default=2.0)
+
+# Local priority classifier (apps.ai.services.priority_model, needs requirements-ml.txt):
+# answers suggest-priority without the LLM when its confidence >= the threshold
+AI_PRIORITY_MODEL_DIR = env("AI_PRIORITY_MODEL_DIR", default=os.path.join(BASE_DIR, "var", "priority_models"))
+AI_PRIORITY_MODEL_THRESHOLD = env.float("AI_PRIORITY_MODEL_THRESHOLD", default=0.8)
+
 # Django REST Framework default
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "apps.common.pagination.KeysetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
 }
 
 # Simple JWT defaults
 from datetime import timedelta
+# request.user snapshots cached by CachedJWTAuthentication (apps.users.cache);
+# saving or deleting a user drops its snapshot at once in every process that
+# shares the cache; off = a query per request
+AUTH_USER_CACHE = env.bool("AUTH_USER_CACHE", default=True)
+AUTH_USER_CACHE_TIMEOUT = env.int("AUTH_USER_CACHE_TIMEOUT", default=60)
+
+# Login / registration as async views (apps.users.views.async_login) for the
+# ASGI app: password hashing runs on AUTH_HASHING_THREADS dedicated threads,
+# and beyond AUTH_HASHING_MAX_PENDING running or waiting jobs sign-ins get a 503
+AUTH_ASYNC_VIEWS = env.bool("AUTH_ASYNC_VIEWS", default=False)
+AUTH_HASHING_THREADS = env.int("AUTH_HASHING_THREADS", default=1)
+AUTH_HASHING_MAX_PENDING = env.int("AUTH_HASHING_MAX_PENDING", default=16)
+
+# Async task list / retrieve, subtask list and /api/auth/me/ on the async ORM,
+# for the ASGI profile (gunicorn.conf.py); the WSGI app keeps the sync views
+ASYNC_READ_VIEWS = env.bool("ASYNC_READ_VIEWS", default=False)
+
+# Per-process Bloom filter in front of the refresh-token blacklist
+# (apps.users.blacklist), kept current through a counter in the cache; off =
+# every refresh checks the blacklist table
+AUTH_BLACKLIST_FILTER = env.bool("AUTH_BLACKLIST_FILTER", default=True)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    "TOKEN_REFRESH_SERIALIZER": "apps.users.serializers.TokenRefreshSerializer",
 }
 
+# Google Sign-In (apps.users.google): ID tokens are verified locally against
+# the signing keys at GOOGLE_CERTS_URL and must be issued to one of GOOGLE_CLIENT_IDS
+GOOGLE_CLIENT_IDS = env.list(
+    "GOOGLE_CLIENT_IDS",
+    default=["76063238802-mmeve6gl126ntmhl0b6b7987t2agvb3m.apps.googleusercontent.com"],
+)
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_TOKEN_LEEWAY = 30  # seconds of clock skew allowed on exp / iat
+
 SOCIALACCOUNT_PROVIDERS = {
    "google": {
        "SCOPE": ["profile", "email"],
@@ -229,6 +325,21 @@ AUTH_USER_MODEL = "users.User"
 CELERY_BROKER_URL = env("REDIS_URL", default="redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = "django-db"  # requires django_celery_results
 CELERY_TASK_ALWAYS_EAGER = False
+# AI jobs (apps.ai.tasks) are slow: one at a time per worker process, and a
+# job lost with its worker is redelivered
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+# periodic tasks, run by `celery -A TaskMaster beat`
+CELERY_BEAT_SCHEDULE = {
+    "purge-expired-tokens": {
+        "task": "apps.users.tasks.purge_expired_tokens",
+        "schedule": env.int("TOKEN_PURGE_INTERVAL", default=60 * 60),
+    },
+}
+
+# refresh tokens past their expiry are deleted this many per transaction
+TOKEN_PURGE_BATCH_SIZE = env.int("TOKEN_PURGE_BATCH_SIZE", default=5000)
 
 # Logging (basic — extend in prod)
 LOGGING = {
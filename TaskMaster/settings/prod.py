@@ -1,6 +1,9 @@
 # taskmaster/settings/prod.py
 from .base import *
 import environ
+
+from apps.common.db_pool import connection_mode
+
 env = environ.Env()
 
 DEBUG = False
@@ -19,20 +22,51 @@ ALLOWED_HOSTS = [".onrender.com",]
 # DATABASES = {
 #     "default": env.db("DATABASE_URL")
 #     }
+# DB_CONNECTION_MODE (apps.common.db_pool.connection_mode):
+#   direct     a new connection, and TLS handshake, for every request (default)
+#   pool       a pool per worker process of at most DB_POOL_MAX_SIZE connections
+#              (one per gthread thread is enough), each replaced after
+#              DB_POOL_MAX_LIFETIME seconds, or DB_POOL_MAX_IDLE seconds unused,
+#              and checked before use while DB_HEALTH_CHECKS is on
+#   pgbouncer  PGHOST is a PgBouncer in transaction pooling mode
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": env("PGDATABASE"),
-        "USER": env("PGUSER"),
-        "PASSWORD": env("PGPASSWORD"),
-        "HOST": env("PGHOST"),
-        "PORT": env("PGPORT", default="5432"),
-        "CONN_MAX_AGE": 0,   # CRITICAL for Render Free tier
-        "OPTIONS": {
-            "sslmode": "require",
+    "default": connection_mode(
+        {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": env("PGDATABASE"),
+            "USER": env("PGUSER"),
+            "PASSWORD": env("PGPASSWORD"),
+            "HOST": env("PGHOST"),
+            "PORT": env("PGPORT", default="5432"),
+            "CONN_MAX_AGE": 0,   # CRITICAL for Render Free tier
+            "CONN_HEALTH_CHECKS": env.bool("DB_HEALTH_CHECKS", default=True),
+            "OPTIONS": {
+                "sslmode": env("DB_SSLMODE", default="require"),
+            },
+        },
+        env("DB_CONNECTION_MODE", default="direct"),
+        pool={
+            "min_size": env.int("DB_POOL_MIN_SIZE", default=1),
+            "max_size": env.int("DB_POOL_MAX_SIZE", default=4),
+            "max_lifetime": env.float("DB_POOL_MAX_LIFETIME", default=1800),
+            "max_idle": env.float("DB_POOL_MAX_IDLE", default=300),
+            # seconds a request waits for a free connection before failing
+            "timeout": env.float("DB_POOL_TIMEOUT", default=10),
         },
-    }
+    ),
+}
+
+# Cache: gunicorn runs several workers, so the task response cache, the
+# dependency graph change log, the auth user snapshots and the token
+# blacklist filter are only safe with a shared backend (Redis)
+CACHES = {
+    "default": env.cache("CACHE_URL", default=env("REDIS_URL", default="locmemcache://")),
 }
+SHARED_CACHE = CACHES["default"]["BACKEND"] != "django.core.cache.backends.locmem.LocMemCache"
+TASK_RESPONSE_CACHE = env.bool("TASK_RESPONSE_CACHE", default=SHARED_CACHE)
+TASK_GRAPH_CACHE = env.bool("TASK_GRAPH_CACHE", default=SHARED_CACHE)
+AUTH_USER_CACHE = env.bool("AUTH_USER_CACHE", default=SHARED_CACHE)
+AUTH_BLACKLIST_FILTER = env.bool("AUTH_BLACKLIST_FILTER", default=SHARED_CACHE)
 
 LOGIN_REDIRECT_URL = "https://task-master-umber-beta.vercel.app/"
 LOGOUT_REDIRECT_URL = "https://task-master-umber-beta.vercel.app/"
@@ -53,5 +87,5 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 # Static files
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
-# Celery
-CELERY_TASK_ALWAYS_EAGER = True
+# Celery: jobs run on the workers (celery -A TaskMaster worker), not in the web process
+CELERY_TASK_ALWAYS_EAGER = env.bool("CELERY_TASK_ALWAYS_EAGER", default=False)
@@ -0,0 +1,28 @@
+# taskmaster/settings/test.py
+# SECRET_KEY=test DJANGO_SETTINGS_MODULE=TaskMaster.settings.test python manage.py test
+from .base import *
+
+DEBUG = False
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+# Fast hashing for tests only
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# in-process broker: no Redis needed; tasks run eagerly unless a test starts
+# a worker (celery.contrib.testing.worker) on this broker
+CELERY_BROKER_URL = "memory://"
+CELERY_RESULT_BACKEND = "cache+memory://"
+CELERY_TASK_ALWAYS_EAGER = True
+
+# no background flush thread: it would write through its own connection
+AI_LOG_FLUSH_INTERVAL = None
@@ -12,7 +12,8 @@ urlpatterns = [
     # apps
     path("api/auth/", include("apps.users.urls")),
     path("api/", include("apps.tasks.urls")),
-    path("api/", include("apps.ai.urls"))
+    path("api/", include("apps.ai.urls")),
+    path("api/analytics/", include("apps.analytics.urls"))
 ]
 
 
@@ -1,3 +1,17 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AIJob, InferenceLog
+
+
+@admin.register(InferenceLog)
+class InferenceLogAdmin(admin.ModelAdmin):
+    list_display = ("endpoint", "model_name", "latency_ms", "cache_hit", "created_at")
+    list_filter = ("endpoint", "model_name", "cache_hit")
+    ordering = ("-created_at",)
+
+
+@admin.register(AIJob)
+class AIJobAdmin(admin.ModelAdmin):
+    list_display = ("kind", "user", "status", "subtasks_created", "created_at", "finished_at")
+    list_filter = ("kind", "status")
+    ordering = ("-created_at",)
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.ai.services.semantic_cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters and model latency saved by the AI response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="reset the counters after printing")
+
+    def handle(self, *args, **options):
+        endpoints = list(settings.AI_CACHE)
+        for endpoint, stats in cache_stats(endpoints).items():
+            self.stdout.write(endpoint)
+            for name, value in stats.items():
+                self.stdout.write(f"  {name:<13} {value}")
+
+        if options["reset"]:
+            reset_cache_stats(endpoints)
+            self.stdout.write("counters reset")
@@ -0,0 +1,103 @@
+import asyncio
+import itertools
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.ai.services.client import InferenceClient
+from apps.common.benchmarks import summarize, write_report
+
+
+def int_list(value):
+    return [int(part) for part in value.split(",")]
+
+
+class Command(BaseCommand):
+    help = "Throughput vs latency of micro-batched suggest_priority calls (stub provider)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--rates", type=int_list, default=[50, 200, 800], help="arrivals per second")
+        parser.add_argument("--batch-sizes", type=int_list, default=[1, 4, 16, 32], help="1 = no batching")
+        parser.add_argument("--waits-ms", type=int_list, default=[2, 10, 25])
+        parser.add_argument("--latency-ms", type=int, default=200, help="simulated latency per call")
+        parser.add_argument("--item-latency-ms", type=float, default=3, help="extra latency per batched item")
+        parser.add_argument("--concurrency", type=int, default=8, help="provider concurrency limit")
+        parser.add_argument("--output", default="bench_ai_batching.json")
+
+    def handle(self, *args, **options):
+        configs = [(1, 0)] + [
+            (size, wait)
+            for size, wait in itertools.product(options["batch_sizes"], options["waits_ms"])
+            if size > 1
+        ]
+        runs = []
+        for rate in options["rates"]:
+            for size, wait in configs:
+                row = self.run(options, rate, size, wait)
+                runs.append(row)
+                self.stdout.write(
+                    f"rate={rate:<5} batch={size:<3} wait={wait:<3}ms "
+                    f"{row['throughput_rps']:>8} req/s  p50={row['p50_ms']}ms  p95={row['p95_ms']}ms  "
+                    f"calls={row['provider_calls']}"
+                )
+
+        report = {
+            "requests": options["requests"],
+            "latency_ms": options["latency_ms"],
+            "item_latency_ms": options["item_latency_ms"],
+            "concurrency": options["concurrency"],
+            "runs": runs,
+        }
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
+
+    def run(self, options, rate, size, wait):
+        client = InferenceClient(
+            providers={"stub": {
+                "backend": "apps.ai.services.providers.StubProvider",
+                "latency_ms": options["latency_ms"],
+                "batch_item_latency_ms": options["item_latency_ms"],
+                "max_concurrency": options["concurrency"],
+                "timeout": 120,
+            }},
+            default="stub",
+            batching={"suggest_priority": {"max_batch_size": size, "max_wait_ms": wait}} if size > 1 else {},
+        )
+        client.loop  # start the loop first: starting it resets the provider instances
+        backend = client.provider()
+        calls = [0]
+        for name in ("suggest_priority", "suggest_priority_batch"):
+            method = getattr(backend, name)
+
+            async def counted(*args, _method=method):
+                calls[0] += 1
+                return await _method(*args)
+
+            setattr(backend, name, counted)
+
+        async def timed(i):
+            start = time.perf_counter()
+            await client.arun("suggest_priority", f"task {i}", "", None)
+            return (time.perf_counter() - start) * 1000
+
+        async def open_loop():
+            # arrivals at a fixed rate whether or not earlier calls have finished
+            pending = []
+            for i in range(options["requests"]):
+                pending.append(asyncio.ensure_future(timed(i)))
+                await asyncio.sleep(1 / rate)
+            return await asyncio.gather(*pending)
+
+        start = time.perf_counter()
+        latencies = asyncio.run(open_loop())
+        elapsed = time.perf_counter() - start
+        client.close()
+        return dict(
+            summarize(latencies),
+            rate=rate,
+            max_batch_size=size,
+            max_wait_ms=wait,
+            provider_calls=calls[0],
+            throughput_rps=round(len(latencies) / elapsed, 1),
+        )
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.ai.services.client import InferenceClient
+from apps.ai.services.providers import stub_breakdown
+from apps.common.benchmarks import summarize, write_report
+
+
+class Command(BaseCommand):
+    help = "Throughput of blocking provider calls vs the pooled async InferenceClient (stub provider)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--latency-ms", type=int, default=200, help="simulated model latency")
+        parser.add_argument("--workers", type=int, default=2, help="sync workers for the blocking baseline")
+        parser.add_argument("--concurrency", type=int, default=64, help="provider concurrency limit")
+        parser.add_argument("--output", default="bench_ai_client.json")
+
+    def handle(self, *args, **options):
+        latency = options["latency_ms"] / 1000
+        titles = [f"task {i}" for i in range(options["requests"])]
+
+        def blocking_call(title):
+            # what a sync view calling the model directly does: hold the worker for the whole call
+            start = time.perf_counter()
+            time.sleep(latency)
+            stub_breakdown(title)
+            return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            blocking = list(pool.map(blocking_call, titles))
+        blocking_elapsed = time.perf_counter() - start
+
+        client = InferenceClient(
+            providers={"stub": {
+                "backend": "apps.ai.services.providers.StubProvider",
+                "latency_ms": options["latency_ms"],
+                "max_concurrency": options["concurrency"],
+                "timeout": 60,
+            }},
+            default="stub",
+        )
+
+        async def timed(title):
+            start = time.perf_counter()
+            await client.arun("breakdown", title, "")
+            return (time.perf_counter() - start) * 1000
+
+        async def pooled_run():
+            return await asyncio.gather(*(timed(title) for title in titles))
+
+        start = time.perf_counter()
+        pooled = asyncio.run(pooled_run())
+        pooled_elapsed = time.perf_counter() - start
+        client.close()
+
+        report = {
+            "requests": len(titles),
+            "latency_ms": options["latency_ms"],
+            "blocking": dict(
+                summarize(blocking),
+                workers=options["workers"],
+                throughput_rps=round(len(titles) / blocking_elapsed, 1),
+            ),
+            "pooled": dict(
+                summarize(pooled),
+                concurrency=options["concurrency"],
+                throughput_rps=round(len(titles) / pooled_elapsed, 1),
+            ),
+        }
+        for name in ("blocking", "pooled"):
+            row = report[name]
+            self.stdout.write(f"{name:<9} {row['throughput_rps']:>8} req/s  p95={row['p95_ms']}ms")
+
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.ai.services import priority_model
+from apps.common.benchmarks import summarize, write_report
+from apps.tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = "Accuracy, LLM bypass rate and latency of the priority classifier on held-out tasks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=5000, help="max held-out tasks to score")
+        parser.add_argument("--threshold", type=float, default=None,
+                            help="defaults to AI_PRIORITY_MODEL_THRESHOLD")
+        parser.add_argument("--output", default="evaluate_priority_model.json")
+
+    def handle(self, *args, **options):
+        models = priority_model.PriorityModels(settings.AI_PRIORITY_MODEL_DIR)
+        if models.version is None:
+            raise CommandError("no trained model; run train_priority_model first")
+        threshold = options["threshold"]
+        if threshold is None:
+            threshold = settings.AI_PRIORITY_MODEL_THRESHOLD
+
+        rows = Task.objects.values_list(
+            "pk", "user_id", "title", "description", "due_date", "created_at", "priority"
+        ).iterator(chunk_size=2000)
+        samples, correct, confident, confident_correct = [], 0, 0, 0
+        for pk, user_id, title, description, due_date, created_at, priority in rows:
+            if not priority_model.is_holdout(pk):
+                continue
+            start = time.perf_counter()
+            predicted, confidence = models.predict(
+                title, description, due_date, user_id, today=timezone.localdate(created_at)
+            )
+            samples.append((time.perf_counter() - start) * 1000)
+            correct += predicted == priority
+            if confidence >= threshold:
+                confident += 1
+                confident_correct += predicted == priority
+            if len(samples) >= options["limit"]:
+                break
+
+        if not samples:
+            raise CommandError("no held-out tasks to evaluate")
+        total = len(samples)
+        report = {
+            "version": models.version,
+            "threshold": threshold,
+            "evaluated": total,
+            "accuracy": round(correct / total, 4),
+            # share of requests answered without the LLM, and how good those answers are
+            "bypass_rate": round(confident / total, 4),
+            "bypass_accuracy": round(confident_correct / confident, 4) if confident else None,
+            "latency": summarize(samples),
+        }
+        for name, value in report.items():
+            self.stdout.write(f"{name:<16} {value}")
+
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ai.services import priority_model
+from apps.tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = "Train the local priority classifier (global + per-tenant) from task history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-samples", type=int, default=200,
+                            help="tasks a user needs for a per-tenant model")
+        parser.add_argument("--no-tenants", action="store_true", help="only train the global model")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--output-dir", default=None, help="defaults to AI_PRIORITY_MODEL_DIR")
+
+    def handle(self, *args, **options):
+        if priority_model.joblib is None:
+            raise CommandError("scikit-learn is not installed (pip install -r requirements-ml.txt)")
+        chunk_size = options["chunk_size"]
+
+        model, stats = priority_model.train(
+            priority_model.task_rows(Task.objects.all(), chunk_size), chunk_size
+        )
+        if model is None:
+            raise CommandError("no tasks to train on")
+        models, all_stats = {"global": model}, {"global": stats}
+        self.report("global", stats)
+
+        if not options["no_tenants"]:
+            for user_id in priority_model.tenants_with_history(options["min_samples"]):
+                rows = priority_model.task_rows(Task.objects.filter(user_id=user_id), chunk_size)
+                model, stats = priority_model.train(rows, chunk_size)
+                if model is not None:
+                    models[f"user-{user_id}"], all_stats[f"user-{user_id}"] = model, stats
+                    self.report(f"user-{user_id}", stats)
+
+        directory = options["output_dir"] or settings.AI_PRIORITY_MODEL_DIR
+        version = priority_model.save_version(directory, models, all_stats)
+        self.stdout.write(self.style.SUCCESS(
+            f"version {version} written to {directory} (workers load it on restart)"
+        ))
+
+    def report(self, name, stats):
+        accuracy = "n/a" if stats["accuracy"] is None else f"{stats['accuracy']:.3f}"
+        self.stdout.write(f"{name:<44} samples={stats['samples']:<8} holdout accuracy={accuracy}")
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.11 on 2026-10-18 20:45
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InferenceLog',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('endpoint', models.CharField(choices=[('breakdown-task', 'Breakdown Task'), ('suggest-priority', 'Suggest Priority')], max_length=50)),
+                ('model_name', models.CharField(max_length=100)),
+                ('input_payload', models.JSONField(default=dict)),
+                ('output_payload', models.JSONField(blank=True, null=True)),
+                ('latency_ms', models.PositiveIntegerField()),
+                ('cache_hit', models.CharField(blank=True, default='', max_length=20)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['endpoint', 'model_name', 'created_at'], name='inference_endpoint_model_idx')],
+            },
+        ),
+    ]
@@ -1,14 +1,19 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
 User = settings.AUTH_USER_MODEL
 
 class InferenceLog(models.Model):
+    """
+    One AI call. Written in batches by apps.ai.services.inference_log,
+    never on the request path.
+    """
 
     ENDPOINT_CHOICES = [
-        ("breakdown-task"),
-        ("suggest-priority"),
+        ("breakdown-task", "Breakdown Task"),
+        ("suggest-priority", "Suggest Priority"),
     ]
 
     id = models.UUIDField(
@@ -17,36 +22,87 @@ class InferenceLog(models.Model):
         editable=False
     )
 
-    
+    endpoint = models.CharField(max_length=50, choices=ENDPOINT_CHOICES)
+    model_name = models.CharField(max_length=100)
 
+    input_payload = models.JSONField(default=dict)
+    output_payload = models.JSONField(null=True, blank=True)
 
+    latency_ms = models.PositiveIntegerField()
+    # "exact" / "semantic" when served by the response cache
+    cache_hit = models.CharField(max_length=20, blank=True, default="")
+    error = models.TextField(blank=True, default="")
 
+    # time of the call, not of the (later, batched) insert
+    created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["endpoint", "model_name", "created_at"],
+                name="inference_endpoint_model_idx",
+            ),
+        ]
 
+    def __str__(self):
+        return f"{self.endpoint} {self.model_name} {self.latency_ms}ms"
 
 
+class AIJob(models.Model):
+    """
+    A breakdown / priority call queued to the Celery workers
+    (apps.ai.tasks.run_ai_job); clients poll it for the result.
+    """
 
+    KIND_CHOICES = InferenceLog.ENDPOINT_CHOICES
 
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="ai_jobs"
+    )
 
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+
+    input_payload = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    # breakdown jobs: add the suggested subtasks to this task when done
+    task = models.ForeignKey(
+        "tasks.Task",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ai_jobs"
+    )
+    create_subtasks = models.BooleanField(default=False)
+    subtasks_created = models.PositiveIntegerField(default=0)
 
-# Create your models here.
-# Create an AIModelVersion table (optional but very good practice)
-# Fields to include:
-# - id (UUID or AutoField)
-# - model_name (e.g., "gpt-4o", "gpt-4.1", "claude-3")
-# - version (string, e.g. "2025-01")
-# - is_active (boolean)   # which model is currently used
-# - created_at (timestamp)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
-# Create an InferenceLog table (very useful for production)
-# Fields to include:
-# - id
-# - endpoint (e.g., "breakdown-task" or "suggest-priority")
-# - input_payload (JSONField)   # store what user sent
-# - output_payload (JSONField)  # store AI response
-# - latency_ms (integer)        # how long AI took
-# - created_at (timestamp)
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="aijob_user_created_idx"),
+        ]
 
-# (Optional but nice)
-# Add ForeignKey to User so you know who triggered AI
-# - user = FK to AUTH_USER_MODEL (nullable if public)
+    def __str__(self):
+        return f"{self.kind} {self.status}"
@@ -1,37 +1,90 @@
-# Create class BreakdownTaskRequestSerializer(serializers.Serializer):
+from rest_framework import serializers
 
-# Fields:
-# - title (CharField, required=True, max_length=255)
-# - description (CharField, required=False, allow_blank=True)
+from apps.tasks.models import Task
 
-# Validation rules:
-# - title must not be empty
-# - strip whitespace
-# - optionally: enforce minimum length (e.g., 5 characters)
+from .models import AIJob
 
-# Create class SubtaskSuggestionSerializer(serializers.Serializer):
-# Fields:
-# - title (CharField)
-# - estimated_time (CharField)  # e.g., "2h"
 
-# Create class BreakdownTaskResponseSerializer(serializers.Serializer):
-# Fields:
-# - subtasks (ListField of SubtaskSuggestionSerializer)
-# - reasoning (CharField)
+class BreakdownTaskRequestSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default="")
 
-# Create class SuggestPriorityRequestSerializer(serializers.Serializer):
 
-# Fields:
-# - title (CharField, required=True)
-# - description (CharField, required=False)
-# - due_date (DateField, required=False)
+class SubtaskSuggestionSerializer(serializers.Serializer):
+    title = serializers.CharField()
+    estimated_time = serializers.CharField(required=False, allow_blank=True, default="")
 
-# Validation:
-# - Ensure due_date is not in the past (optional but good)
 
-# Create class SuggestPriorityResponseSerializer(serializers.Serializer):
+class BreakdownTaskResponseSerializer(serializers.Serializer):
+    subtasks = SubtaskSuggestionSerializer(many=True)
+    reasoning = serializers.CharField(allow_blank=True, default="")
 
-# Fields:
-# - suggested_priority (ChoiceField: "low", "medium", "high")
-# - confidence (FloatField between 0 and 1)
-# - reasoning (CharField)
+
+class SuggestPriorityRequestSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default="")
+    due_date = serializers.DateField(required=False, allow_null=True, default=None)
+
+
+class SuggestPriorityResponseSerializer(serializers.Serializer):
+    suggested_priority = serializers.ChoiceField(choices=["low", "medium", "high"])
+    confidence = serializers.FloatField(min_value=0, max_value=1)
+    reasoning = serializers.CharField(allow_blank=True, default="")
+
+
+class SuggestPriorityBatchRequestSerializer(serializers.Serializer):
+    tasks = SuggestPriorityRequestSerializer(many=True, allow_empty=False, max_length=200)
+
+
+class AIJobCreateSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=AIJob.KIND_CHOICES)
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default="")
+    due_date = serializers.DateField(required=False, allow_null=True, default=None)
+    task = serializers.PrimaryKeyRelatedField(queryset=Task.objects.none(), required=False, default=None)
+    create_subtasks = serializers.BooleanField(required=False, default=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is not None:
+            self.fields["task"].queryset = Task.objects.filter(user=request.user, is_active=True)
+
+    def validate(self, attrs):
+        if attrs["create_subtasks"] and (attrs["kind"] != "breakdown-task" or attrs["task"] is None):
+            raise serializers.ValidationError(
+                {"create_subtasks": ["Only for breakdown-task jobs with a task."]}
+            )
+        return attrs
+
+    def create(self, validated_data):
+        return AIJob.objects.create(
+            user=self.context["request"].user,
+            kind=validated_data["kind"],
+            task=validated_data["task"],
+            create_subtasks=validated_data["create_subtasks"],
+            input_payload={
+                "title": validated_data["title"],
+                "description": validated_data["description"],
+                "due_date": validated_data["due_date"] and validated_data["due_date"].isoformat(),
+            },
+        )
+
+
+class AIJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AIJob
+        fields = [
+            "id",
+            "kind",
+            "status",
+            "result",
+            "error",
+            "task",
+            "create_subtasks",
+            "subtasks_created",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
@@ -1,31 +1,251 @@
-# Create function: analyze_task_for_breakdown(title, description)
-
-# Responsibilities:
-# - Construct a prompt for the LLM
-# - Call OpenAI / Anthropic / Hugging Face
-# - Parse AI response into structured subtasks
-# - Return Python dict in format:
-#   {
-#     "subtasks": [
-#       {"title": "...", "estimated_time": "..."},
-#       ...
-#     ],
-#     "reasoning": "..."
-#   }
-
-# Create function: suggest_priority(title, description, due_date)
-
-# Responsibilities:
-# - Build a prompt that includes urgency signals
-# - Call AI model
-# - Return structured dict:
-#   {
-#     "suggested_priority": "high",
-#     "confidence": 0.95,
-#     "reasoning": "..."
-#   }
-
-# Optional best practice:
-# - Wrap AI calls in try/except
-# - Add fallback model if primary fails
-# - Log request + response to InferenceLog
+import time
+from datetime import date
+
+from django.conf import settings
+
+from ..serializers import BreakdownTaskResponseSerializer, SuggestPriorityResponseSerializer
+from . import priority_model
+from .client import InferenceError, get_client
+from .inference_log import get_writer
+from .semantic_cache import acached, cached, get_cache
+from .streaming import SubtaskStreamParser
+
+# what the views validate answers with; answers they would reject are not cached
+RESPONSE_SERIALIZERS = {
+    "breakdown-task": BreakdownTaskResponseSerializer,
+    "suggest-priority": SuggestPriorityResponseSerializer,
+}
+
+
+def analyze_task_for_breakdown(title, description="", provider=None, user_id=None):
+    """
+    Ask the model to split a task into subtasks:
+
+        {
+          "subtasks": [{"title": "...", "estimated_time": "..."}, ...],
+          "reasoning": "..."
+        }
+
+    Cached answers are only reused for the same `user_id`.
+    """
+    return _infer(
+        "breakdown-task",
+        "breakdown",
+        (title, description),
+        _breakdown_context(provider, user_id),
+        provider,
+    )
+
+
+def suggest_priority(title, description="", due_date=None, provider=None, user_id=None):
+    """
+    Suggest a priority, weighing urgency signals and the due date:
+
+        {"suggested_priority": "high", "confidence": 0.95, "reasoning": "..."}
+
+    The local classifier (trained on `user_id`'s / everyone's history)
+    answers when it is confident enough; otherwise the LLM is asked.
+    """
+    fast = _classify(title, description, due_date, user_id)
+    if fast is not None:
+        return fast
+    return _infer(
+        "suggest-priority",
+        "suggest_priority",
+        (title, description, due_date),
+        _priority_context(due_date, provider, user_id),
+        provider,
+    )
+
+
+def suggest_priorities(items, provider=None, user_id=None):
+    """
+    suggest_priority for many tasks ({"title", "description", "due_date"})
+    at once. Returns one result per item, in order; an item the model
+    could not answer gets its InferenceError instead.
+
+    Items the classifier and the cache cannot answer are all submitted
+    before any is awaited, so the client's micro-batcher sends them to the
+    provider in as few calls as the batch size allows.
+    """
+    semantic = get_cache("suggest-priority")
+    results, pending = [], []
+    for item in items:
+        args = (item["title"], item.get("description", ""), item.get("due_date"))
+        fast = _classify(*args, user_id)
+        if fast is not None:
+            results.append(fast)
+            continue
+
+        start = time.perf_counter()
+        text, context = "\n".join(args[:2]), _priority_context(args[2], provider, user_id)
+        if semantic is not None:
+            value, hit = semantic.get(text, context)
+            if value is not None:
+                _log("suggest-priority", args, provider, start, output=value, cache_hit=hit)
+                results.append(value)
+                continue
+
+        future = get_client().submit("suggest_priority", *args, provider=provider)
+        pending.append((len(results), args, text, context, start, future))
+        results.append(None)
+
+    for index, args, text, context, start, future in pending:
+        try:
+            value = future.result()
+        except InferenceError as exc:
+            _log("suggest-priority", args, provider, start, error=str(exc))
+            results[index] = exc
+            continue
+        if semantic is not None and _valid("suggest-priority", value):
+            semantic.set(text, value, context, cost_ms=(time.perf_counter() - start) * 1000)
+        _log("suggest-priority", args, provider, start, output=value)
+        results[index] = value
+    return results
+
+
+async def aanalyze_task_for_breakdown(title, description="", provider=None, user_id=None):
+    return await _ainfer(
+        "breakdown-task",
+        "breakdown",
+        (title, description),
+        _breakdown_context(provider, user_id),
+        provider,
+    )
+
+
+async def asuggest_priority(title, description="", due_date=None, provider=None, user_id=None):
+    fast = _classify(title, description, due_date, user_id)
+    if fast is not None:
+        return fast
+    return await _ainfer(
+        "suggest-priority",
+        "suggest_priority",
+        (title, description, due_date),
+        _priority_context(due_date, provider, user_id),
+        provider,
+    )
+
+
+async def astream_breakdown(title, description="", provider=None, user_id=None):
+    """
+    Async iterator of ("subtask", {...}) as each subtask is parsed from the
+    provider's stream, then ("done", full result). Answers from the response
+    cache when it can; closing the iterator cancels the provider call.
+    """
+    start = time.perf_counter()
+    args, context = (title, description), _breakdown_context(provider, user_id)
+    semantic = get_cache("breakdown-task")
+    text = "\n".join(args)
+
+    if semantic is not None:
+        value, hit = semantic.get(text, context)
+        if value is not None:
+            _log("breakdown-task", args, provider, start, output=value, cache_hit=hit)
+            for subtask in value.get("subtasks", []):
+                yield "subtask", subtask
+            yield "done", value
+            return
+
+    parser = SubtaskStreamParser()
+    error = "cancelled"
+    try:
+        async for chunk in get_client().astream("stream_breakdown", *args, provider=provider):
+            for subtask in parser.feed(chunk):
+                yield "subtask", subtask
+        try:
+            result = parser.result()
+        except ValueError:
+            raise InferenceError("Model returned an invalid response.")
+        error = ""
+    except Exception as exc:
+        error = str(exc) or type(exc).__name__
+        raise
+    finally:
+        if error:
+            _log("breakdown-task", args, provider, start, error=error)
+
+    if semantic is not None and _valid("breakdown-task", result):
+        semantic.set(text, result, context, cost_ms=(time.perf_counter() - start) * 1000)
+    _log("breakdown-task", args, provider, start, output=result)
+    yield "done", result
+
+
+def _breakdown_context(provider, user_id):
+    # the cache is shared by every user of the process: answers echo the
+    # task's title, so they are never handed to another user
+    return (user_id, provider)
+
+
+def _priority_context(due_date, provider, user_id):
+    # per user, as for breakdowns; urgency depends on how far away the due
+    # date is, so answers are only reused for the same due date on the same day
+    return (user_id, provider, due_date and due_date.isoformat(), date.today().isoformat())
+
+
+def _classify(title, description, due_date, user_id):
+    start = time.perf_counter()
+    prediction = priority_model.predict(title, description, due_date, user_id)
+    if prediction is None or prediction[1] < settings.AI_PRIORITY_MODEL_THRESHOLD:
+        return None
+
+    priority, confidence = prediction
+    result = {
+        "suggested_priority": priority,
+        "confidence": round(confidence, 2),
+        "reasoning": "Predicted from similar tasks in your history.",
+    }
+    args = (title, description, due_date)
+    model_name = f"priority-clf:{priority_model.get_models().version}"
+    _log("suggest-priority", args, None, start, output=result, model_name=model_name)
+    return result
+
+
+def _infer(endpoint, method, args, context, provider):
+    start = time.perf_counter()
+    try:
+        result, hit = cached(
+            endpoint, "\n".join(args[:2]), context,
+            lambda: get_client().run(method, *args, provider=provider),
+            lambda value: _valid(endpoint, value),
+        )
+    except InferenceError as exc:
+        _log(endpoint, args, provider, start, error=str(exc))
+        raise
+    _log(endpoint, args, provider, start, output=result, cache_hit=hit)
+    return result
+
+
+async def _ainfer(endpoint, method, args, context, provider):
+    start = time.perf_counter()
+    try:
+        result, hit = await acached(
+            endpoint, "\n".join(args[:2]), context,
+            lambda: get_client().arun(method, *args, provider=provider),
+            lambda value: _valid(endpoint, value),
+        )
+    except InferenceError as exc:
+        _log(endpoint, args, provider, start, error=str(exc))
+        raise
+    _log(endpoint, args, provider, start, output=result, cache_hit=hit)
+    return result
+
+
+def _valid(endpoint, value):
+    return RESPONSE_SERIALIZERS[endpoint](data=value).is_valid()
+
+
+def _log(endpoint, args, provider, start, output=None, cache_hit="", error="", model_name=None):
+    # buffered in process; the row is inserted later in a batch
+    payload = dict(zip(("title", "description", "due_date"), args))
+    if payload.get("due_date") is not None:
+        payload["due_date"] = payload["due_date"].isoformat()
+    get_writer().write(
+        endpoint=endpoint,
+        model_name=model_name or get_client().model_name(provider),
+        input_payload=payload,
+        output_payload=output,
+        latency_ms=round((time.perf_counter() - start) * 1000),
+        cache_hit=cache_hit,
+        error=error,
+    )
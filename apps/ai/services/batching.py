@@ -0,0 +1,60 @@
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent calls into batches: items wait until
+    `max_batch_size` are queued or `max_wait_ms` have passed since the
+    first one, then `call(items)` answers the whole batch and each caller
+    gets its own result. Lives on the InferenceClient's event loop.
+
+    At most `max_in_flight` batches run at once; items arriving while all
+    are busy wait here and go out together when one finishes, so batches
+    grow with the load instead of queueing up half empty.
+    """
+
+    def __init__(self, call, max_batch_size=32, max_wait_ms=10, max_in_flight=None):
+        self.call = call
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_in_flight = max_in_flight
+        self.pending = []  # (item, future)
+        self.in_flight = 0
+        self._timer = None
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((item, future))
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self.flush)
+        return await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # callers that gave up (cancelled) are left out
+        self.pending = [(item, future) for item, future in self.pending if not future.done()]
+        while self.pending and (self.max_in_flight is None or self.in_flight < self.max_in_flight):
+            batch = self.pending[:self.max_batch_size]
+            self.pending = self.pending[self.max_batch_size:]
+            self.in_flight += 1
+            asyncio.ensure_future(self.run(batch))
+
+    async def run(self, batch):
+        try:
+            results = await self.call([item for item, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self.in_flight -= 1
+            if self.pending:
+                self.flush()
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .batching import MicroBatcher
+from .providers import ProviderError
+
+logger = logging.getLogger(__name__)
+
+# retry backoff: full jitter over an exponential window
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 4.0
+
+
+class InferenceError(Exception):
+    """Raised when a call fails after its retries (or is not retryable)."""
+
+
+def unexpected(name, exc):
+    """
+    InferenceError for a provider failure that is not a ProviderError (a
+    bug in the provider): logged with its traceback, and not retried.
+    """
+    logger.error("%s: unexpected provider error", name, exc_info=exc)
+    return InferenceError(f"{name}: unexpected {type(exc).__name__}")
+
+
+def backoff(attempt):
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class InferenceClient:
+    """
+    Runs provider calls on one background event loop per process.
+
+    Request threads hand their call to that loop and wait for the result,
+    so all of them share each provider's connection pool and concurrency
+    limit, and a slow model only costs a waiting thread instead of a
+    thread doing blocking network I/O.
+
+    Methods listed in `batching` ({method: {"max_batch_size", "max_wait_ms"}})
+    are micro-batched for providers that implement `<method>_batch`:
+    concurrent calls from any thread are sent to the provider together.
+    """
+
+    def __init__(self, providers=None, default=None, batching=None):
+        self.config = providers if providers is not None else settings.AI_PROVIDERS
+        self.default = default or settings.AI_PROVIDER
+        self.batching = batching if batching is not None else settings.AI_BATCHING
+        self._providers = {}
+        self._semaphores = {}
+        self._batchers = {}
+        self._loop = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        with self._lock:
+            # a forked worker inherits the object but not the loop thread
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                self._providers, self._semaphores, self._batchers = {}, {}, {}
+                threading.Thread(
+                    target=self._loop.run_forever, name="ai-inference", daemon=True
+                ).start()
+            return self._loop
+
+    def provider(self, name=None):
+        name = name or self.default
+        if name not in self._providers:
+            options = dict(self.config[name])
+            backend = import_string(options.pop("backend"))
+            self._providers[name] = backend(name, **options)
+            self._semaphores[name] = asyncio.Semaphore(self._providers[name].max_concurrency)
+        return self._providers[name]
+
+    def model_name(self, provider=None):
+        name = provider or self.default
+        options = self.config[name]
+        return options.get("model") or import_string(options["backend"]).model or name
+
+    async def call(self, method, *args, provider=None):
+        """
+        `await provider.<method>(*args)` with the provider's concurrency
+        limit, timeout and retries. Must run on `self.loop`.
+        """
+        backend = self.provider(provider)
+        semaphore = self._semaphores[backend.name]
+
+        for attempt in range(backend.max_retries + 1):
+            try:
+                async with semaphore:
+                    return await asyncio.wait_for(
+                        getattr(backend, method)(*args), backend.timeout
+                    )
+            except asyncio.TimeoutError:
+                error = InferenceError(f"{backend.name}: timed out after {backend.timeout}s")
+            except ProviderError as exc:
+                if not exc.retryable:
+                    raise InferenceError(str(exc)) from exc
+                error = InferenceError(str(exc))
+            except Exception as exc:
+                raise unexpected(backend.name, exc) from exc
+
+            if attempt < backend.max_retries:
+                await asyncio.sleep(backoff(attempt))
+        raise error
+
+    async def dispatch(self, method, *args, provider=None):
+        """`call`, through the method's micro-batcher when it has one."""
+        backend = self.provider(provider)
+        options = self.batching.get(method)
+        if options is None or not hasattr(backend, f"{method}_batch"):
+            return await self.call(method, *args, provider=provider)
+
+        key = (backend.name, method)
+        if key not in self._batchers:
+
+            async def call_batch(items):
+                results = await self.call(f"{method}_batch", items, provider=backend.name)
+                if len(results) != len(items):
+                    raise InferenceError(
+                        f"{backend.name}: {len(results)} results for {len(items)} inputs"
+                    )
+                return results
+
+            self._batchers[key] = MicroBatcher(
+                call_batch, max_in_flight=backend.max_concurrency, **options
+            )
+        return await self._batchers[key].submit(args)
+
+    def submit(self, method, *args, provider=None):
+        """Schedule a call on the inference loop; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(
+            self.dispatch(method, *args, provider=provider), self.loop
+        )
+
+    def run(self, method, *args, provider=None):
+        """Blocking call, for sync views and workers."""
+        return self.submit(method, *args, provider=provider).result()
+
+    async def arun(self, method, *args, provider=None):
+        """Awaitable call, for async views running on another loop."""
+        return await asyncio.wrap_future(self.submit(method, *args, provider=provider))
+
+    async def astream(self, method, *args, provider=None):
+        """
+        Async iterator over a streaming provider method's chunks, for async
+        views on another loop. The provider's timeout applies to the wait
+        for each chunk; streams are not retried. Closing the iterator (e.g.
+        the client went away) cancels the provider call.
+        """
+        caller = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        def put(item):
+            if not caller.is_closed():
+                caller.call_soon_threadsafe(queue.put_nowait, item)
+
+        async def produce():
+            # every way out puts `done` or an exception, or the caller waits forever
+            try:
+                backend = self.provider(provider)
+                stream = getattr(backend, method)(*args)
+                try:
+                    async with self._semaphores[backend.name]:
+                        while True:
+                            try:
+                                put(await asyncio.wait_for(anext(stream), backend.timeout))
+                            except StopAsyncIteration:
+                                break
+                finally:
+                    await stream.aclose()
+                put(done)
+            except asyncio.TimeoutError:
+                put(InferenceError(f"{backend.name}: no output for {backend.timeout}s"))
+            except ProviderError as exc:
+                put(InferenceError(str(exc)))
+            except asyncio.CancelledError:
+                # by the caller closing the iterator, or the loop shutting down
+                put(InferenceError("stream cancelled"))
+                raise
+            except Exception as exc:
+                # a provider bug: an InferenceError too, like `call` raises
+                put(unexpected(provider or self.default, exc))
+
+        future = asyncio.run_coroutine_threadsafe(produce(), self.loop)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        providers = list(self._providers.values())
+
+        async def shutdown():
+            for backend in providers:
+                await backend.aclose()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = InferenceClient()
+        return _client
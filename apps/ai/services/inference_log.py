@@ -0,0 +1,162 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from apps.ai.models import InferenceLog
+from apps.common.benchmarks import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceLogWriter:
+    """
+    Buffers InferenceLog rows in process and writes them with one
+    bulk_create once `batch_size` rows are queued or every
+    `flush_interval` seconds (background thread; None disables it).
+    `close()` drains the buffer on worker shutdown.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=2.0, max_buffer=10_000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.buffer = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def write(self, **fields):
+        with self._lock:
+            if len(self.buffer) >= self.max_buffer:
+                # the database is not keeping up; never let logging grow without bound
+                self.dropped += 1
+                return
+            self.buffer.append(InferenceLog(**fields))
+            full = len(self.buffer) >= self.batch_size
+        self._ensure_thread()
+        if full:
+            if self._thread is not None:
+                self._wakeup.set()
+            else:
+                self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self.buffer = self.buffer, []
+            if not batch:
+                return 0
+            try:
+                InferenceLog.objects.bulk_create(batch, batch_size=self.batch_size)
+            except Exception:
+                logger.exception("dropped %s inference log rows", len(batch))
+                return 0
+            return len(batch)
+
+    def close(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _ensure_thread(self):
+        if self.flush_interval is None or self._thread is not None or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="inference-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+        connection.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = InferenceLogWriter(
+                batch_size=settings.AI_LOG_BATCH_SIZE,
+                flush_interval=settings.AI_LOG_FLUSH_INTERVAL,
+            )
+            atexit.register(_writer.close)
+        return _writer
+
+
+def close_writer():
+    """Drain buffered rows; gunicorn calls this from worker_exit."""
+    if _writer is not None:
+        _writer.close()
+
+
+def latency_percentiles(queryset):
+    """
+    [{"endpoint", "model_name", "calls", "p50_ms", "p95_ms", "p99_ms"}, ...]
+    over the successful model calls in `queryset` (cache hits excluded).
+    """
+    queryset = queryset.filter(error="", cache_hit="")
+    if connection.vendor == "postgresql":
+        return _latency_percentiles_sql(queryset)
+
+    samples = {}
+    rows = queryset.order_by().values_list("endpoint", "model_name", "latency_ms")
+    for endpoint, model_name, latency_ms in rows.iterator():
+        samples.setdefault((endpoint, model_name), []).append(latency_ms)
+    return [
+        {
+            "endpoint": endpoint,
+            "model_name": model_name,
+            "calls": len(values),
+            "p50_ms": round(percentile(values, 50), 1),
+            "p95_ms": round(percentile(values, 95), 1),
+            "p99_ms": round(percentile(values, 99), 1),
+        }
+        for (endpoint, model_name), values in sorted(samples.items())
+    ]
+
+
+def _latency_percentiles_sql(queryset):
+    # percentiles computed in the database, so only one row per group is transferred
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    table = InferenceLog._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT endpoint, model_name, COUNT(*),
+                   PERCENTILE_CONT(ARRAY[0.5, 0.95, 0.99]) WITHIN GROUP (ORDER BY latency_ms)
+            FROM {table}
+            WHERE id IN ({sql})
+            GROUP BY endpoint, model_name
+            ORDER BY endpoint, model_name
+            """,
+            params,
+        )
+        return [
+            {
+                "endpoint": endpoint,
+                "model_name": model_name,
+                "calls": calls,
+                "p50_ms": round(p50, 1),
+                "p95_ms": round(p95, 1),
+                "p99_ms": round(p99, 1),
+            }
+            for endpoint, model_name, calls, (p50, p95, p99) in cursor.fetchall()
+        ]
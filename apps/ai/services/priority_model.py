@@ -0,0 +1,204 @@
+"""
+Local priority classifier trained on the users' own Task.priority labels.
+
+Needs the ML stack (requirements-ml.txt); without it `predict` returns None
+and suggest_priority always asks the LLM.
+
+Artifacts live in settings.AI_PRIORITY_MODEL_DIR:
+
+    <dir>/CURRENT                 name of the active version
+    <dir>/<version>/meta.json     training stats
+    <dir>/<version>/global.joblib
+    <dir>/<version>/user-<id>.joblib   per-tenant models for users with enough history
+"""
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+try:
+    import joblib
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.linear_model import SGDClassifier
+except ImportError:  # ML stack not installed
+    joblib = None
+
+from apps.tasks.models import Task
+
+LABELS = ["low", "medium", "high"]
+N_FEATURES = 2 ** 18
+
+
+def due_token(due_date, today):
+    """Bucketed time-to-due as a pseudo word, so one text model sees it."""
+    if due_date is None:
+        return "zzdue_none"
+    days = (due_date - today).days
+    if days < 0:
+        return "zzdue_overdue"
+    for limit, name in ((0, "today"), (1, "1d"), (3, "3d"), (7, "7d"), (30, "30d")):
+        if days <= limit:
+            return f"zzdue_{name}"
+    return "zzdue_later"
+
+
+def document(title, description, due_date, today):
+    return f"{title} {description} {due_token(due_date, today)}"
+
+
+def vectorizer():
+    # stateless: nothing to fit or store, and transform is a single pass over the text
+    return HashingVectorizer(
+        n_features=N_FEATURES,
+        ngram_range=(1, 2),
+        alternate_sign=False,
+        norm="l2",
+    )
+
+
+def is_holdout(pk):
+    # stable 10% validation split
+    return zlib.crc32(str(pk).encode()) % 10 == 0
+
+
+def task_rows(queryset, chunk_size=5000):
+    """(document, label, pk) for `queryset`, with due dates relative to creation."""
+    rows = queryset.values_list(
+        "pk", "title", "description", "due_date", "created_at", "priority"
+    ).iterator(chunk_size=chunk_size)
+    for pk, title, description, due_date, created_at, priority in rows:
+        yield document(title, description, due_date, timezone.localdate(created_at)), priority, pk
+
+
+def train(rows, chunk_size=5000):
+    """
+    Fit an SGD logistic regression over `rows` in chunks (bounded memory
+    whatever the history size). Returns (model, stats).
+    """
+    vec = vectorizer()
+    model = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=0)
+    holdout = ([], [])
+    trained = 0
+
+    def fit(docs, labels):
+        model.partial_fit(vec.transform(docs), labels, classes=LABELS)
+
+    docs, labels = [], []
+    for doc, label, pk in rows:
+        if is_holdout(pk):
+            holdout[0].append(doc)
+            holdout[1].append(label)
+            continue
+        docs.append(doc)
+        labels.append(label)
+        if len(docs) >= chunk_size:
+            fit(docs, labels)
+            trained += len(docs)
+            docs, labels = [], []
+    if docs:
+        fit(docs, labels)
+        trained += len(docs)
+
+    if not trained:
+        return None, {"samples": 0}
+    accuracy = model.score(vec.transform(holdout[0]), holdout[1]) if holdout[0] else None
+    return model, {"samples": trained, "holdout": len(holdout[0]), "accuracy": accuracy}
+
+
+class PriorityModels:
+    """
+    The active version's models, loaded once per worker: the global model
+    up front, per-user models on first use.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.version = None
+        self.global_model = None
+        self.user_models = {}
+        self.vec = None
+        self._lock = threading.Lock()
+
+        current = os.path.join(directory, "CURRENT")
+        if joblib is None or not os.path.exists(current):
+            return
+        with open(current) as fh:
+            self.version = fh.read().strip()
+        path = os.path.join(directory, self.version, "global.joblib")
+        if os.path.exists(path):
+            self.global_model = joblib.load(path)
+        self.vec = vectorizer()
+
+    def model_for(self, user_id):
+        if self.version is None:
+            return None
+        if user_id is None:
+            return self.global_model
+        with self._lock:
+            if user_id not in self.user_models:
+                path = os.path.join(self.directory, self.version, f"user-{user_id}.joblib")
+                self.user_models[user_id] = joblib.load(path) if os.path.exists(path) else None
+            return self.user_models[user_id] or self.global_model
+
+    def predict(self, title, description="", due_date=None, user_id=None, today=None):
+        """(priority, confidence) or None when no model is available."""
+        model = self.model_for(user_id)
+        if model is None:
+            return None
+        features = self.vec.transform([document(title, description, due_date, today or date.today())])
+        probabilities = model.predict_proba(features)[0]
+        best = probabilities.argmax()
+        return str(model.classes_[best]), float(probabilities[best])
+
+
+_models = None
+_models_lock = threading.Lock()
+
+
+def get_models():
+    global _models
+    with _models_lock:
+        if _models is None:
+            _models = PriorityModels(settings.AI_PRIORITY_MODEL_DIR)
+        return _models
+
+
+def predict(title, description="", due_date=None, user_id=None):
+    return get_models().predict(title, description, due_date, user_id)
+
+
+def save_version(directory, models, stats):
+    """
+    Write `models` ({"global" | "user-<id>": model}) as a new version and
+    make it CURRENT. Returns the version name.
+    """
+    version = time.strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, version)
+    os.makedirs(path, exist_ok=True)
+    for name, model in models.items():
+        joblib.dump(model, os.path.join(path, f"{name}.joblib"))
+    with open(os.path.join(path, "meta.json"), "w") as fh:
+        json.dump({"version": version, "models": stats}, fh, indent=2, default=str)
+
+    # atomic switch for workers starting up later
+    tmp = os.path.join(directory, "CURRENT.tmp")
+    with open(tmp, "w") as fh:
+        fh.write(version)
+    os.replace(tmp, os.path.join(directory, "CURRENT"))
+    return version
+
+
+def tenants_with_history(min_samples):
+    return list(
+        Task.objects
+        .values("user_id")
+        .annotate(n=Count("pk"))
+        .filter(n__gte=min_samples)
+        .values_list("user_id", flat=True)
+    )
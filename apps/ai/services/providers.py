@@ -0,0 +1,251 @@
+import asyncio
+import json
+import re
+from datetime import date
+
+import httpx
+
+
+class ProviderError(Exception):
+    """A provider call failed; `retryable` errors are retried by the client."""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class BaseProvider:
+    """
+    One model backend. Subclasses implement the coroutines below; the
+    InferenceClient adds pooling, concurrency limits, timeouts and retries.
+
+    `options` is the provider's entry in settings.AI_PROVIDERS.
+    """
+
+    name = None
+    model = None
+
+    def __init__(self, name, **options):
+        self.name = name
+        self.options = options
+        self.model = options.get("model", self.model)
+        self.max_concurrency = options.get("max_concurrency", 8)
+        self.timeout = options.get("timeout", 20.0)
+        self.max_retries = options.get("max_retries", 2)
+
+    async def breakdown(self, title, description):
+        """{"subtasks": [{"title", "estimated_time"}, ...], "reasoning"}"""
+        raise NotImplementedError
+
+    async def suggest_priority(self, title, description, due_date):
+        """{"suggested_priority", "confidence", "reasoning"}"""
+        raise NotImplementedError
+
+    # Providers that can answer many inputs in one model call define
+    # `<method>_batch(items)`, taking a list of argument tuples and returning
+    # the results in the same order; the InferenceClient then micro-batches
+    # concurrent calls to <method> (settings.AI_BATCHING).
+
+    async def stream_breakdown(self, title, description):
+        """
+        The breakdown JSON document as text chunks, as the model produces
+        it. Providers without streaming send it in one piece.
+        """
+        yield json.dumps(await self.breakdown(title, description))
+
+    async def aclose(self):
+        pass
+
+
+# Stub provider: deterministic answers computed locally, for tests and offline load tests
+
+URGENT_WORDS = {"urgent", "asap", "critical", "blocker", "bug", "fix", "outage", "deadline"}
+LOW_WORDS = {"someday", "maybe", "idea", "later", "optional", "nice"}
+
+
+def stub_breakdown(title, description=""):
+    topic = title.strip().rstrip(".")
+    steps = ["Plan", "Do", "Review"]
+    if description:
+        steps.insert(1, "Gather inputs for")
+    return {
+        "subtasks": [
+            {"title": f"{step} {topic}".strip(), "estimated_time": f"{index + 1}h"}
+            for index, step in enumerate(steps)
+        ],
+        "reasoning": f"Split '{topic}' into {len(steps)} sequential steps.",
+    }
+
+
+def stub_priority(title, description="", due_date=None, today=None):
+    words = set(re.findall(r"\w+", f"{title} {description}".lower()))
+    score = len(words & URGENT_WORDS) - len(words & LOW_WORDS)
+    if due_date is not None:
+        days = (due_date - (today or date.today())).days
+        score += 2 if days <= 1 else 1 if days <= 7 else 0
+
+    priority = "high" if score >= 2 else "medium" if score >= 0 else "low"
+    return {
+        "suggested_priority": priority,
+        "confidence": round(min(0.5 + 0.15 * abs(score), 0.95), 2),
+        "reasoning": f"Urgency score {score} from keywords and due date.",
+    }
+
+
+class StubProvider(BaseProvider):
+    """
+    Answers locally after `latency_ms`, so the endpoints can be load
+    tested without network access or API keys.
+    """
+
+    model = "stub"
+
+    def __init__(self, name, **options):
+        super().__init__(name, **options)
+        self.latency = options.get("latency_ms", 0) / 1000
+        self.stream_chunk_size = options.get("stream_chunk_size", 16)
+        self.batch_item_latency = options.get("batch_item_latency_ms", 0) / 1000
+
+    async def breakdown(self, title, description):
+        await asyncio.sleep(self.latency)
+        return stub_breakdown(title, description)
+
+    async def stream_breakdown(self, title, description):
+        # the latency is spread over the chunks, like tokens arriving
+        text = json.dumps(stub_breakdown(title, description))
+        size = self.stream_chunk_size
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        for chunk in chunks:
+            await asyncio.sleep(self.latency / len(chunks))
+            yield chunk
+
+    async def suggest_priority(self, title, description, due_date):
+        await asyncio.sleep(self.latency)
+        return stub_priority(title, description, due_date)
+
+    async def suggest_priority_batch(self, items):
+        # one call's latency plus a small cost per item, like a batched forward pass
+        await asyncio.sleep(self.latency + self.batch_item_latency * len(items))
+        return [stub_priority(*item) for item in items]
+
+
+# OpenAI-compatible chat completions over a pooled HTTP client
+
+BREAKDOWN_PROMPT = (
+    "Break the task into 3-7 concrete subtasks. Reply with JSON only: "
+    '{"subtasks": [{"title": str, "estimated_time": str like "2h"}], "reasoning": str}'
+)
+PRIORITY_PROMPT = (
+    "Suggest a priority (low, medium or high) for the task, weighing urgency, "
+    "impact and the due date. Reply with JSON only: "
+    '{"suggested_priority": str, "confidence": float 0-1, "reasoning": str}'
+)
+PRIORITY_BATCH_PROMPT = (
+    "Suggest a priority (low, medium or high) for each numbered task, weighing "
+    "urgency, impact and the due date. Reply with JSON only, one result per task "
+    'in the same order: {"results": [{"suggested_priority": str, '
+    '"confidence": float 0-1, "reasoning": str}]}'
+)
+
+
+class OpenAIProvider(BaseProvider):
+    model = "gpt-4o-mini"
+
+    def __init__(self, name, **options):
+        super().__init__(name, **options)
+        self.base_url = options.get("base_url", "https://api.openai.com/v1")
+        self.api_key = options.get("api_key", "")
+        self._http = None
+
+    @property
+    def http(self):
+        # created lazily on the client's event loop; keep-alive connections are reused
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+        return self._http
+
+    def payload(self, system, user, **extra):
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            "response_format": {"type": "json_object"},
+            **extra,
+        }
+
+    def check(self, response):
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ProviderError(f"{self.name}: HTTP {response.status_code}", retryable=True)
+        if response.status_code >= 400:
+            raise ProviderError(f"{self.name}: HTTP {response.status_code}")
+
+    async def complete(self, system, user):
+        try:
+            response = await self.http.post("/chat/completions", json=self.payload(system, user))
+        except httpx.TransportError as exc:
+            raise ProviderError(f"{self.name}: {exc}", retryable=True) from exc
+        self.check(response)
+
+        try:
+            return json.loads(response.json()["choices"][0]["message"]["content"])
+        except (KeyError, IndexError, ValueError) as exc:
+            raise ProviderError(f"{self.name}: unparseable response") from exc
+
+    async def breakdown(self, title, description):
+        return await self.complete(BREAKDOWN_PROMPT, f"Title: {title}\nDescription: {description}")
+
+    async def stream_breakdown(self, title, description):
+        payload = self.payload(
+            BREAKDOWN_PROMPT, f"Title: {title}\nDescription: {description}", stream=True
+        )
+        try:
+            async with self.http.stream("POST", "/chat/completions", json=payload) as response:
+                self.check(response)
+                # server-sent events: "data: {chunk}" lines, then "data: [DONE]"
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        break
+                    try:
+                        content = json.loads(data)["choices"][0]["delta"].get("content")
+                    except (KeyError, IndexError, ValueError) as exc:
+                        raise ProviderError(f"{self.name}: unparseable stream chunk") from exc
+                    if content:
+                        yield content
+        except httpx.TransportError as exc:
+            raise ProviderError(f"{self.name}: {exc}", retryable=True) from exc
+
+    async def suggest_priority(self, title, description, due_date):
+        return await self.complete(
+            PRIORITY_PROMPT,
+            f"Title: {title}\nDescription: {description}\n"
+            f"Due date: {due_date or 'none'}\nToday: {date.today()}",
+        )
+
+    async def suggest_priority_batch(self, items):
+        tasks = "\n\n".join(
+            f"{number}. Title: {title}\nDescription: {description}\nDue date: {due_date or 'none'}"
+            for number, (title, description, due_date) in enumerate(items, 1)
+        )
+        result = await self.complete(PRIORITY_BATCH_PROMPT, f"Today: {date.today()}\n\n{tasks}")
+        results = result.get("results") if isinstance(result, dict) else None
+        if not isinstance(results, list) or len(results) != len(items):
+            raise ProviderError(f"{self.name}: expected {len(items)} results")
+        return results
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
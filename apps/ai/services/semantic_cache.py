@@ -0,0 +1,231 @@
+import copy
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+EMBEDDING_DIM = 4096
+STATS_KEY = "ai:cache-stats:{endpoint}:{name}"
+STATS = ("exact_hits", "semantic_hits", "misses", "saved_ms")
+
+# candidates (by shared features) compared exactly per lookup
+MAX_CANDIDATES = 32
+
+
+def normalize(text):
+    return " ".join(word.lower() for word in WORD_RE.findall(text or ""))
+
+
+def _bucket(feature):
+    digest = hashlib.blake2b(feature.encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "little") % EMBEDDING_DIM
+
+
+def hashed_embedding(text):
+    """
+    Deterministic local embedding: hashed words, word bigrams and character
+    trigrams (so "report" / "reports" still overlap), L2 normalised, as a
+    sparse {dimension: weight} dict.
+    """
+    words = normalize(text).split()
+    features = Counter(_bucket(word) for word in words)
+    for word in words:
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            features[_bucket(f"#{padded[i:i + 3]}")] += 0.5
+    for a, b in zip(words, words[1:]):
+        features[_bucket(f"{a} {b}")] += 0.5
+    norm = math.sqrt(sum(weight * weight for weight in features.values()))
+    return {dim: weight / norm for dim, weight in features.items()} if norm else {}
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(dim, 0.0) for dim, weight in a.items())
+
+
+class SemanticCache:
+    """
+    LRU cache of model answers for one endpoint.
+
+    Lookups try the exact normalized text first, then the most similar
+    cached text by embedding cosine (>= `threshold`). `context` must match
+    exactly (the user, plus e.g. the due date for priorities): the cache is
+    shared by the whole process, so callers put the user in it to keep
+    answers from crossing tenants. Candidates come from an
+    inverted index over embedding dimensions, so a lookup only compares
+    entries that share features with the query.
+    """
+
+    def __init__(self, endpoint, threshold=0.8, ttl=3600, max_entries=5000, embed=hashed_embedding):
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embed = embed
+        self.entries = OrderedDict()  # (context, text) -> (vector, value, expires, cost_ms)
+        self.postings = defaultdict(set)  # dimension -> keys
+        self._lock = threading.Lock()
+
+    def get(self, text, context=()):
+        """(value, "exact" | "semantic") or (None, None)."""
+        key = (context, normalize(text))
+        now = time.monotonic()
+        with self._lock:
+            kind, entry = "exact_hits", self._live(key, now)
+            if entry is None:
+                kind, entry = "semantic_hits", self._nearest(key, now)
+            if entry is not None:
+                self.entries.move_to_end(entry[0])
+                value, cost_ms = copy.deepcopy(entry[1][1]), entry[1][3]
+
+        if entry is None:
+            record(self.endpoint, "misses")
+            return None, None
+        record(self.endpoint, kind)
+        record(self.endpoint, "saved_ms", int(cost_ms))
+        return value, kind.split("_")[0]
+
+    def set(self, text, value, context=(), cost_ms=0):
+        key = (context, normalize(text))
+        vector = self.embed(key[1])
+        with self._lock:
+            self._remove(key)
+            self.entries[key] = (vector, copy.deepcopy(value), time.monotonic() + self.ttl, cost_ms)
+            for dim in vector:
+                self.postings[dim].add(key)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.postings.clear()
+
+    def _live(self, key, now):
+        entry = self.entries.get(key)
+        if entry is not None and entry[2] < now:
+            self._remove(key)
+            return None
+        return None if entry is None else (key, entry)
+
+    def _nearest(self, key, now):
+        context, text = key
+        vector = self.embed(text)
+        overlap = Counter()
+        for dim in vector:
+            overlap.update(k for k in self.postings.get(dim, ()) if k[0] == context)
+
+        best, best_score = None, self.threshold
+        for candidate, _ in overlap.most_common(MAX_CANDIDATES):
+            found = self._live(candidate, now)
+            if found is not None:
+                score = cosine(vector, found[1][0])
+                if score >= best_score:
+                    best, best_score = found, score
+        return best
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            for dim in entry[0]:
+                keys = self.postings.get(dim)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.postings[dim]
+
+
+def record(endpoint, name, amount=1):
+    key = STATS_KEY.format(endpoint=endpoint, name=name)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, amount)
+
+
+def cache_stats(endpoints):
+    keys = {
+        (endpoint, name): STATS_KEY.format(endpoint=endpoint, name=name)
+        for endpoint in endpoints
+        for name in STATS
+    }
+    values = cache.get_many(list(keys.values()))
+    stats = {}
+    for endpoint in endpoints:
+        row = {name: values.get(keys[endpoint, name], 0) for name in STATS}
+        hits = row["exact_hits"] + row["semantic_hits"]
+        total = hits + row["misses"]
+        row["hit_rate"] = round(hits / total, 4) if total else 0.0
+        stats[endpoint] = row
+    return stats
+
+
+def reset_cache_stats(endpoints):
+    cache.delete_many([
+        STATS_KEY.format(endpoint=endpoint, name=name) for endpoint in endpoints for name in STATS
+    ])
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(endpoint):
+    """The process-wide SemanticCache for `endpoint`, or None if disabled."""
+    if not settings.AI_CACHE_ENABLED:
+        return None
+    with _caches_lock:
+        if endpoint not in _caches:
+            _caches[endpoint] = SemanticCache(
+                endpoint,
+                embed=import_string(settings.AI_CACHE_EMBEDDING),
+                **settings.AI_CACHE.get(endpoint, {}),
+            )
+        return _caches[endpoint]
+
+
+def cached(endpoint, text, context, compute, valid=None):
+    """
+    compute() through the endpoint's cache: (value, "exact" | "semantic" | "").
+    Errors, and values `valid(value)` rejects, are never cached.
+    """
+    semantic = get_cache(endpoint)
+    if semantic is None:
+        return compute(), ""
+
+    value, hit = semantic.get(text, context)
+    if value is not None:
+        return value, hit
+
+    start = time.perf_counter()
+    value = compute()
+    if valid is None or valid(value):
+        semantic.set(text, value, context, cost_ms=(time.perf_counter() - start) * 1000)
+    return value, ""
+
+
+async def acached(endpoint, text, context, compute, valid=None):
+    """`cached` for a coroutine function `compute`."""
+    semantic = get_cache(endpoint)
+    if semantic is None:
+        return await compute(), ""
+
+    value, hit = semantic.get(text, context)
+    if value is not None:
+        return value, hit
+
+    start = time.perf_counter()
+    value = await compute()
+    if valid is None or valid(value):
+        semantic.set(text, value, context, cost_ms=(time.perf_counter() - start) * 1000)
+    return value, ""
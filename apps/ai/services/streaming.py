@@ -0,0 +1,64 @@
+import json
+
+
+class SubtaskStreamParser:
+    """
+    Incremental parser for a breakdown JSON document that arrives in
+    chunks: `feed(chunk)` returns the objects of the top-level "subtasks"
+    array that the chunk completed, so they can be sent on before the
+    model has finished. `result()` parses the whole document at the end.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_key = None
+        self.array_depth = None  # depth inside the "subtasks" array while in it
+        self.item_start = None
+
+    def feed(self, chunk):
+        self.text += chunk
+        items = []
+        text = self.text
+        for i in range(self.pos, len(text)):
+            char = text[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self.last_key = text[self.string_start + 1:i]
+                continue
+
+            if char == '"':
+                self.in_string = True
+                self.string_start = i
+            elif char in "[{":
+                self.depth += 1
+                if char == "[" and self.depth == 2 and self.last_key == "subtasks":
+                    self.array_depth = 2
+                elif char == "{" and self.array_depth == 2 and self.depth == 3:
+                    self.item_start = i
+            elif char in "]}":
+                if char == "}" and self.item_start is not None and self.depth == 3:
+                    try:
+                        items.append(json.loads(text[self.item_start:i + 1]))
+                    except ValueError:
+                        pass
+                    self.item_start = None
+                elif char == "]" and self.depth == 2:
+                    self.array_depth = None
+                self.depth -= 1
+        self.pos = len(text)
+        return items
+
+    def result(self):
+        """The complete document; ValueError if it is not valid JSON."""
+        return json.loads(self.text)
@@ -0,0 +1,125 @@
+import logging
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from celery import shared_task
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.tasks.cache import bump_data_version
+from apps.tasks.models import SubTask
+from apps.tasks.ordering import ORDER_STEP, next_order_index
+
+from .models import AIJob
+from .serializers import (
+    BreakdownTaskRequestSerializer,
+    BreakdownTaskResponseSerializer,
+    SuggestPriorityRequestSerializer,
+    SuggestPriorityResponseSerializer,
+)
+from .services import ai_engine
+from .services.client import InferenceError
+
+# kind -> (engine, request serializer, response serializer)
+JOBS = {
+    "breakdown-task": (
+        ai_engine.analyze_task_for_breakdown,
+        BreakdownTaskRequestSerializer,
+        BreakdownTaskResponseSerializer,
+    ),
+    "suggest-priority": (
+        ai_engine.suggest_priority,
+        SuggestPriorityRequestSerializer,
+        SuggestPriorityResponseSerializer,
+    ),
+}
+
+# longer than any call can take with its retries (see AI_PROVIDERS timeouts)
+STALE_AFTER = timedelta(minutes=5)
+
+logger = logging.getLogger(__name__)
+
+HOURS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(h|hr|hour|m|min|minute)", re.IGNORECASE)
+
+
+@shared_task(ignore_result=True, acks_late=True)
+def run_ai_job(job_id):
+    """
+    Run a queued AIJob. The result lives on the job row, so the Celery
+    result backend is not used.
+    """
+    # claim it: a duplicate delivery of a job another worker is running is a
+    # no-op, but a job left "running" by a worker that died is taken over
+    now = timezone.now()
+    claimable = Q(status="queued") | Q(status="running", started_at__lt=now - STALE_AFTER)
+    claimed = AIJob.objects.filter(claimable, pk=job_id).update(status="running", started_at=now)
+    if not claimed:
+        return
+    job = AIJob.objects.select_related("task").get(pk=job_id)
+    try:
+        run(job)
+    except Exception:
+        # a job must never be left "running": the client polls until it isn't
+        logger.exception("AI job %s failed", job_id)
+        job.subtasks_created = 0  # rolled back with the transaction, if it got that far
+        finish(job, "failed", error="The job failed unexpectedly.")
+
+
+def run(job):
+    engine, request_serializer_class, response_serializer_class = JOBS[job.kind]
+
+    request = request_serializer_class(data=job.input_payload)
+    request.is_valid(raise_exception=True)
+    kwargs = dict(request.validated_data, user_id=job.user_id)
+
+    try:
+        result = engine(**kwargs)
+    except InferenceError as exc:
+        return finish(job, "failed", error=str(exc))
+
+    output = response_serializer_class(data=result)
+    if not output.is_valid():
+        return finish(job, "failed", error="Model returned an invalid response.")
+
+    with transaction.atomic():
+        task = job.task
+        if job.create_subtasks and task is not None and task.is_active:
+            job.subtasks_created = create_subtasks(task, output.validated_data["subtasks"])
+        finish(job, "succeeded", result=output.validated_data)
+
+
+def finish(job, status, result=None, error=""):
+    job.status = status
+    job.result = result
+    job.error = error
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "result", "error", "subtasks_created", "finished_at"])
+
+
+def create_subtasks(task, suggestions):
+    """Append the suggested subtasks after the task's existing ones."""
+    start = next_order_index(task.pk)
+    SubTask.objects.bulk_create([
+        SubTask(
+            parent_task=task,
+            title=suggestion["title"][:255],
+            estimated_hours=estimated_hours(suggestion.get("estimated_time", "")),
+            order_index=start + index * ORDER_STEP,
+        )
+        for index, suggestion in enumerate(suggestions)
+    ])
+    bump_data_version(task.user_id)
+    return len(suggestions)
+
+
+def estimated_hours(text):
+    """"2h" / "1.5 hours" / "30 min" -> Decimal hours, None if unparseable."""
+    match = HOURS_RE.search(text or "")
+    if match is None:
+        return None
+    value = Decimal(match.group(1))
+    if match.group(2).lower().startswith("m"):
+        value /= 60
+    return min(value, Decimal("99.99")).quantize(Decimal("0.01"))
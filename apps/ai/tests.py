@@ -1,3 +1,700 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from celery.contrib.testing.worker import start_worker
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.common.asgi import CancelOnDisconnect
+from apps.tasks.models import SubTask, Task
+from TaskMaster.celery import app as celery_app
+
+from .models import AIJob, InferenceLog
+from .services import ai_engine, priority_model
+from .services.client import InferenceClient, InferenceError
+from .services.inference_log import InferenceLogWriter, get_writer, latency_percentiles
+from .services.providers import BaseProvider, ProviderError
+from .services.semantic_cache import SemanticCache, cache_stats
+from .services.streaming import SubtaskStreamParser
+from .tasks import STALE_AFTER, run_ai_job
+
+User = get_user_model()
+
+
+class FlakyProvider(BaseProvider):
+    """Fails `failures` times with a retryable error, then answers; with `crash` it raises."""
+
+    def __init__(self, name, **options):
+        super().__init__(name, **options)
+        self.failures = options.get("failures", 0)
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    async def suggest_priority(self, title, description, due_date):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.options.get("latency", 0))
+            if self.options.get("crash"):
+                raise RuntimeError("provider bug")
+            if self.calls <= self.failures:
+                raise ProviderError("busy", retryable=True)
+            return {"suggested_priority": "low", "confidence": 0.5, "reasoning": ""}
+        finally:
+            self.in_flight -= 1
+
+
+def flaky_client(**options):
+    options.setdefault("timeout", 1.0)
+    return InferenceClient(
+        providers={"flaky": {"backend": "apps.ai.tests.FlakyProvider", **options}},
+        default="flaky",
+    )
+
+
+class BatchingProvider(BaseProvider):
+    """Answers suggest_priority batches with each title; records batch sizes."""
+
+    def __init__(self, name, **options):
+        super().__init__(name, **options)
+        self.batches = []
+
+    async def suggest_priority(self, title, description, due_date):
+        return (await self.suggest_priority_batch([(title, description, due_date)]))[0]
+
+    async def suggest_priority_batch(self, items):
+        self.batches.append(len(items))
+        await asyncio.sleep(self.options.get("latency", 0))
+        if self.options.get("fail"):
+            raise ProviderError("bad batch")
+        return [{"suggested_priority": "low", "confidence": 0.5, "reasoning": title} for title, _, _ in items]
+
+
+def batching_client(max_batch_size=4, max_wait_ms=50, **options):
+    return InferenceClient(
+        providers={"batching": {"backend": "apps.ai.tests.BatchingProvider", "timeout": 1, **options}},
+        default="batching",
+        batching={"suggest_priority": {"max_batch_size": max_batch_size, "max_wait_ms": max_wait_ms}},
+    )
+
+
+class StreamingProvider(BaseProvider):
+    """
+    Streams a fixed breakdown in `chunk_size` pieces; with `hang` it stops
+    after the first subtask and waits, to test cancellation, with `crash`
+    it raises there.
+    """
+
+    DOCUMENT = json.dumps({
+        "subtasks": [
+            {"title": "Outline {the} \"talk\"", "estimated_time": "30m"},
+            {"title": "Write slides", "estimated_time": "2h"},
+        ],
+        "reasoning": "Two steps.",
+    })
+
+    def __init__(self, name, **options):
+        super().__init__(name, **options)
+        self.cancelled = threading.Event()
+
+    async def stream_breakdown(self, title, description):
+        size = self.options.get("chunk_size", 7)
+        cut = self.DOCUMENT.index("}") + 1
+        finished = False
+        try:
+            for i in range(0, len(self.DOCUMENT), size):
+                if self.options.get("hang") and i >= cut:
+                    await asyncio.sleep(60)
+                if self.options.get("crash") and i >= cut:
+                    raise RuntimeError("provider bug")
+                yield self.DOCUMENT[i:i + size]
+            finished = True
+        finally:
+            if not finished:
+                self.cancelled.set()
+
+
+def streaming_client(**options):
+    return InferenceClient(
+        providers={"streaming": {"backend": "apps.ai.tests.StreamingProvider", "timeout": 5, **options}},
+        default="streaming",
+    )
+
+
+@mock.patch("apps.ai.services.client.backoff", lambda attempt: 0)
+class InferenceClientTests(SimpleTestCase):
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_retries_retryable_errors(self):
+        self.client = flaky_client(failures=2, max_retries=2)
+        self.assertEqual(self.client.run("suggest_priority", "t", "", None)["suggested_priority"], "low")
+        self.assertEqual(self.client.provider().calls, 3)
+
+    def test_gives_up_after_max_retries(self):
+        self.client = flaky_client(failures=5, max_retries=1)
+        with self.assertRaises(InferenceError):
+            self.client.run("suggest_priority", "t", "", None)
+        self.assertEqual(self.client.provider().calls, 2)
+
+    def test_provider_bugs_are_inference_errors(self):
+        self.client = flaky_client(crash=True, max_retries=2)
+        with self.assertLogs("apps.ai.services.client", "ERROR"):
+            with self.assertRaisesMessage(InferenceError, "flaky: unexpected RuntimeError"):
+                self.client.run("suggest_priority", "t", "", None)
+        self.assertEqual(self.client.provider().calls, 1)
+
+    def test_timeout(self):
+        self.client = flaky_client(latency=0.5, timeout=0.05, max_retries=0)
+        with self.assertRaises(InferenceError):
+            self.client.run("suggest_priority", "t", "", None)
+
+    def test_concurrency_limit(self):
+        self.client = flaky_client(latency=0.02, max_concurrency=3)
+        futures = [self.client.submit("suggest_priority", "t", "", None) for _ in range(12)]
+        for future in futures:
+            future.result()
+        self.assertEqual(self.client.provider().peak, 3)
+
+
+class MicroBatchingTests(SimpleTestCase):
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_coalesces_concurrent_calls(self):
+        self.client = batching_client(max_batch_size=4)
+        futures = [self.client.submit("suggest_priority", f"t{i}", "", None) for i in range(10)]
+        self.assertEqual(
+            [future.result()["reasoning"] for future in futures], [f"t{i}" for i in range(10)]
+        )
+        self.assertEqual(sorted(self.client.provider().batches), [2, 4, 4])
+
+    def test_partial_batch_waits_for_the_window(self):
+        self.client = batching_client(max_batch_size=4, max_wait_ms=50)
+        start = time.perf_counter()
+        self.assertEqual(self.client.run("suggest_priority", "t", "", None)["reasoning"], "t")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.045)
+        self.assertEqual(self.client.provider().batches, [1])
+
+    def test_batches_grow_while_the_provider_is_busy(self):
+        self.client = batching_client(max_batch_size=16, max_wait_ms=1, max_concurrency=1, latency=0.1)
+        first = self.client.submit("suggest_priority", "first", "", None)
+        time.sleep(0.03)
+        futures = [self.client.submit("suggest_priority", f"t{i}", "", None) for i in range(8)]
+        for future in [first, *futures]:
+            future.result()
+        self.assertEqual(self.client.provider().batches, [1, 8])
+
+    def test_batch_errors_reach_every_caller(self):
+        self.client = batching_client(fail=True, max_retries=0)
+        futures = [self.client.submit("suggest_priority", f"t{i}", "", None) for i in range(3)]
+        for future in futures:
+            with self.assertRaises(InferenceError):
+                future.result()
+        self.assertEqual(self.client.provider().batches, [3])
+
+
+class StreamingTests(SimpleTestCase):
+
+    def test_parser_emits_each_subtask_once_complete(self):
+        document = StreamingProvider.DOCUMENT
+        expected = json.loads(document)["subtasks"]
+        for size in (1, 2, 5, len(document)):
+            parser = SubtaskStreamParser()
+            items = []
+            for i in range(0, len(document), size):
+                items += parser.feed(document[i:i + size])
+                if i + size < document.index("}") + 1:
+                    self.assertEqual(items, [])
+            self.assertEqual(items, expected)
+            self.assertEqual(parser.result()["reasoning"], "Two steps.")
+
+    def test_closing_the_stream_cancels_the_provider(self):
+        client = streaming_client(hang=True)
+        self.addCleanup(client.close)
+
+        async def first_chunk():
+            stream = client.astream("stream_breakdown", "t", "")
+            chunk = await anext(stream)
+            await stream.aclose()
+            return chunk
+
+        self.assertEqual(asyncio.run(first_chunk()), StreamingProvider.DOCUMENT[:7])
+        self.assertTrue(client.provider().cancelled.wait(2))
+
+    def test_provider_bugs_reach_the_caller(self):
+        client = streaming_client(crash=True)
+        self.addCleanup(client.close)
+
+        async def chunks():
+            return [chunk async for chunk in client.astream("stream_breakdown", "t", "")]
+
+        with self.assertLogs("apps.ai.services.client", "ERROR"):
+            with self.assertRaisesMessage(InferenceError, "streaming: unexpected RuntimeError"):
+                asyncio.run(asyncio.wait_for(chunks(), 5))
+
+    def test_cancel_on_disconnect(self):
+        cancelled = []
+
+        async def app(scope, receive, send):
+            await receive()
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def run():
+            messages = asyncio.Queue()
+            await messages.put({"type": "http.request", "body": b"", "more_body": False})
+            task = asyncio.ensure_future(CancelOnDisconnect(app)({"type": "http"}, messages.get, None))
+            await asyncio.sleep(0.01)
+            await messages.put({"type": "http.disconnect"})
+            await asyncio.wait_for(task, 1)
+
+        asyncio.run(run())
+        self.assertEqual(cancelled, [True])
+
+
+class SemanticCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = SemanticCache("test-endpoint", threshold=0.8, ttl=60, max_entries=2)
+
+    def test_exact_then_semantic_match(self):
+        self.cache.set("Write weekly report", {"answer": 1}, cost_ms=120)
+
+        self.assertEqual(self.cache.get("  write WEEKLY report! "), ({"answer": 1}, "exact"))
+        self.assertEqual(self.cache.get("Write the weekly report"), ({"answer": 1}, "semantic"))
+        self.assertEqual(self.cache.get("Write monthly budget"), (None, None))
+        self.assertEqual(self.cache.get("Write weekly report", context=("other",)), (None, None))
+
+        stats = cache_stats(["test-endpoint"])["test-endpoint"]
+        self.assertEqual(stats["exact_hits"], 1)
+        self.assertEqual(stats["semantic_hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["saved_ms"], 240)
+
+    def test_lru_eviction(self):
+        self.cache.set("first task", 1)
+        self.cache.set("second task", 2)
+        self.cache.get("first task")
+        self.cache.set("third task", 3)
+
+        self.assertEqual(self.cache.get("second task"), (None, None))
+        self.assertEqual(self.cache.get("first task")[0], 1)
+        self.assertFalse(any(("second task" in key) for keys in self.cache.postings.values() for _, key in keys))
+
+    def test_ttl(self):
+        self.cache.ttl = -1
+        self.cache.set("expired task", 1)
+        self.assertEqual(self.cache.get("expired task"), (None, None))
+        self.assertEqual(self.cache.entries, {})
+
+
+class InferenceLogTests(TestCase):
+
+    def log(self, writer, latency_ms, endpoint="suggest-priority", **fields):
+        writer.write(endpoint=endpoint, model_name="stub", latency_ms=latency_ms, **fields)
+
+    def test_flushes_in_batches(self):
+        writer = InferenceLogWriter(batch_size=3, flush_interval=None)
+        self.log(writer, 10)
+        self.log(writer, 20)
+        self.assertEqual(InferenceLog.objects.count(), 0)
+
+        with self.assertNumQueries(1):
+            self.log(writer, 30)
+        self.assertEqual(InferenceLog.objects.count(), 3)
+
+        self.log(writer, 40)
+        writer.close()
+        self.assertEqual(InferenceLog.objects.count(), 4)
+
+    def test_percentiles(self):
+        writer = InferenceLogWriter(batch_size=1000, flush_interval=None)
+        for latency_ms in range(1, 101):
+            self.log(writer, latency_ms)
+        self.log(writer, 0, cache_hit="exact")
+        self.log(writer, 9999, error="timed out")
+        self.log(writer, 5, endpoint="breakdown-task")
+        writer.flush()
+
+        results = latency_percentiles(InferenceLog.objects.all())
+        self.assertEqual([(r["endpoint"], r["calls"]) for r in results], [
+            ("breakdown-task", 1), ("suggest-priority", 100),
+        ])
+        self.assertEqual(
+            (results[1]["p50_ms"], results[1]["p95_ms"], results[1]["p99_ms"]),
+            (50.5, 95.0, 99.0),
+        )
+
+
+@skipIf(priority_model.joblib is None, "scikit-learn not installed")
+class PriorityModelTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="clf@example.com", username="clf", password="pass12345"
+        )
+        tasks = []
+        for i in range(60):
+            tasks += [
+                Task(user=cls.user, title=f"urgent production outage {i}", priority="high"),
+                Task(user=cls.user, title=f"someday read article {i}", priority="low"),
+                Task(user=cls.user, title=f"weekly team sync notes {i}", priority="medium"),
+            ]
+        Task.objects.bulk_create(tasks)
+
+    def setUp(self):
+        get_writer().flush()
+        InferenceLog.objects.all().delete()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        model, stats = priority_model.train(priority_model.task_rows(Task.objects.all()))
+        self.assertGreater(stats["accuracy"], 0.9)
+        self.version = priority_model.save_version(self.directory, {"global": model}, {"global": stats})
+        self.settings = override_settings(AI_PRIORITY_MODEL_DIR=self.directory)
+        self.settings.enable()
+        priority_model._models = None
+
+    def tearDown(self):
+        self.settings.disable()
+        priority_model._models = None
+
+    def test_confident_prediction_skips_the_llm(self):
+        with mock.patch.object(ai_engine, "_infer") as infer:
+            result = ai_engine.suggest_priority("urgent production outage", user_id=self.user.pk)
+        infer.assert_not_called()
+        self.assertEqual(result["suggested_priority"], "high")
+
+        get_writer().flush()
+        log = InferenceLog.objects.get()
+        self.assertEqual(log.model_name, f"priority-clf:{self.version}")
+
+    def test_low_confidence_falls_back_to_llm(self):
+        with override_settings(AI_PRIORITY_MODEL_THRESHOLD=1.01):
+            result = ai_engine.suggest_priority("urgent production outage")
+        self.assertEqual(get_writer().flush(), 1)
+        self.assertEqual(InferenceLog.objects.get().model_name, "stub")
+        self.assertEqual(result["suggested_priority"], "high")
+
+
+class AIEndpointTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="ai@example.com", username="ai", password="pass12345"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_breakdown_task(self):
+        response = self.client.post(
+            "/api/ai/breakdown-task/", {"title": "Write weekly report"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [subtask["title"] for subtask in response.json()["subtasks"]],
+            ["Plan Write weekly report", "Do Write weekly report", "Review Write weekly report"],
+        )
+
+    def test_suggest_priority(self):
+        response = self.client.post("/api/ai/suggest-priority/", {
+            "title": "Fix login outage",
+            "due_date": str(date.today() + timedelta(days=1)),
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["suggested_priority"], "high")
+
+    def test_suggest_priority_batch(self):
+        tomorrow = str(date.today() + timedelta(days=1))
+        response = self.client.post("/api/ai/suggest-priority/batch/", {"tasks": [
+            {"title": "Fix login outage", "due_date": tomorrow},
+            {"title": "Tidy the wiki someday"},
+            {"title": "Fix login outage", "due_date": tomorrow},
+        ]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["suggested_priority"] for result in response.json()["results"]],
+            ["high", "low", "high"],
+        )
+
+        for tasks in ([], [{"title": "t"}] * 201):
+            response = self.client.post("/api/ai/suggest-priority/batch/", {"tasks": tasks}, format="json")
+            self.assertEqual(response.status_code, 400)
+
+    def test_suggest_priority_batch_reports_item_errors(self):
+        error = InferenceError("stub: timed out")
+        with mock.patch.object(ai_engine, "suggest_priorities", return_value=[error]):
+            response = self.client.post(
+                "/api/ai/suggest-priority/batch/", {"tasks": [{"title": "t"}]}, format="json"
+            )
+        self.assertEqual(response.json()["results"], [{"error": "stub: timed out"}])
+
+    def test_cached_answers_stay_with_their_user(self):
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(
+            email="ai-other@example.com", username="ai-other", password="pass12345"
+        ))
+        due_date = str(date.today() + timedelta(days=3))
+        requests = [
+            ("/api/ai/breakdown-task/", {"title": "Draft quarterly tenant report"}),
+            ("/api/ai/suggest-priority/", {"title": "Review quarterly tenant budget", "due_date": due_date}),
+        ]
+        for url, data in requests:
+            self.client.post(url, data, format="json")
+            similar = dict(data, title=data["title"].replace("quarterly", "the quarterly"))
+            other.post(url, similar, format="json")
+            self.client.post(url, similar, format="json")
+
+        get_writer().flush()
+        logs = InferenceLog.objects.order_by("created_at", "pk")
+        self.assertEqual(
+            [(log.endpoint, log.cache_hit) for log in logs if "tenant" in log.input_payload["title"]],
+            [
+                ("breakdown-task", ""), ("breakdown-task", ""), ("breakdown-task", "semantic"),
+                ("suggest-priority", ""), ("suggest-priority", ""), ("suggest-priority", "semantic"),
+            ],
+        )
+
+    def test_provider_bugs_are_reported_like_other_inference_errors(self):
+        client = flaky_client(crash=True)
+        self.addCleanup(client.close)
+        data = {"title": "Crashing priority"}
+        with mock.patch.object(ai_engine, "get_client", return_value=client):
+            with self.assertLogs("apps.ai.services.client", "ERROR"):
+                single = self.client.post("/api/ai/suggest-priority/", data, format="json")
+                batch = self.client.post("/api/ai/suggest-priority/batch/", {"tasks": [data]}, format="json")
+                with self.assertRaisesMessage(InferenceError, "flaky: unexpected RuntimeError"):
+                    async_to_sync(ai_engine.asuggest_priority)(**data)
+
+        self.assertEqual(
+            (single.status_code, single.json()), (503, {"detail": "flaky: unexpected RuntimeError"})
+        )
+        self.assertEqual(batch.json()["results"], [{"error": "flaky: unexpected RuntimeError"}])
+
+    def test_invalid_answers_are_not_cached(self):
+        client = mock.Mock()
+        client.model_name.return_value = "mock"
+        client.run.side_effect = [
+            {"subtasks": [{"estimated_time": "1h"}]},  # malformed: a subtask without a title
+            {"subtasks": [{"title": "Plan", "estimated_time": "1h"}], "reasoning": "One step."},
+        ]
+        with mock.patch.object(ai_engine, "get_client", return_value=client):
+            statuses = [
+                self.client.post(
+                    "/api/ai/breakdown-task/", {"title": "Migrate billing cronjobs"}, format="json"
+                ).status_code
+                for _ in range(3)
+            ]
+        self.assertEqual(statuses, [502, 200, 200])
+        self.assertEqual(client.run.call_count, 2)
+
+    def test_validation(self):
+        response = self.client.post("/api/ai/breakdown-task/", {"title": "  "}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_calls_are_logged_and_reported(self):
+        self.client.post("/api/ai/breakdown-task/", {"title": "Plan offsite"}, format="json")
+        get_writer().flush()
+        log = InferenceLog.objects.get(input_payload__title="Plan offsite")
+        self.assertEqual((log.endpoint, log.model_name, log.error), ("breakdown-task", "stub", ""))
+
+        self.assertEqual(self.client.get("/api/ai/latency/").status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        results = self.client.get("/api/ai/latency/").json()["results"]
+        self.assertIn("breakdown-task", [row["endpoint"] for row in results])
+
+
+class AIJobTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="jobs@example.com", username="jobs", password="pass12345"
+        )
+        cls.task = Task.objects.create(user=cls.user, title="Launch website")
+        SubTask.objects.create(parent_task=cls.task, title="existing", order_index=1024)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def enqueue(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/ai/jobs/", data, format="json")
+
+    def test_breakdown_job_creates_subtasks(self):
+        response = self.enqueue({
+            "kind": "breakdown-task",
+            "title": "Launch website",
+            "task": str(self.task.pk),
+            "create_subtasks": True,
+        })
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["id"]
+        self.assertEqual(response["Location"], f"/api/ai/jobs/{job_id}/")
+
+        job = self.client.get(f"/api/ai/jobs/{job_id}/").json()
+        self.assertEqual((job["status"], job["subtasks_created"]), ("succeeded", 3))
+        self.assertEqual(
+            list(self.task.subtasks.values_list("title", "estimated_hours")),
+            [
+                ("existing", None),
+                ("Plan Launch website", Decimal("1.00")),
+                ("Do Launch website", Decimal("2.00")),
+                ("Review Launch website", Decimal("3.00")),
+            ],
+        )
+
+    def test_priority_job_and_failures(self):
+        job_id = self.enqueue({"kind": "suggest-priority", "title": "Fix outage asap"}).json()["id"]
+        job = self.client.get(f"/api/ai/jobs/{job_id}/").json()
+        self.assertEqual(job["result"]["suggested_priority"], "high")
+
+        with mock.patch.object(ai_engine, "_infer", side_effect=InferenceError("down")):
+            job_id = self.enqueue({"kind": "suggest-priority", "title": "Later"}).json()["id"]
+        job = self.client.get(f"/api/ai/jobs/{job_id}/").json()
+        self.assertEqual((job["status"], job["error"]), ("failed", "down"))
+
+    def test_unexpected_errors_fail_the_job(self):
+        data = {"kind": "breakdown-task", "title": "Launch", "task": str(self.task.pk), "create_subtasks": True}
+        with mock.patch("apps.ai.tasks.create_subtasks", side_effect=RuntimeError("disk full")):
+            with self.assertLogs("apps.ai.tasks", "ERROR"):
+                job_id = self.enqueue(data).json()["id"]
+        job = self.client.get(f"/api/ai/jobs/{job_id}/").json()
+        self.assertEqual(
+            (job["status"], job["error"], job["subtasks_created"]),
+            ("failed", "The job failed unexpectedly.", 0),
+        )
+
+        job = AIJob.objects.create(user=self.user, kind="suggest-priority", input_payload={})
+        with self.assertLogs("apps.ai.tasks", "ERROR"):
+            run_ai_job(str(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+
+    def test_job_of_a_lost_worker_is_taken_over(self):
+        job = AIJob.objects.create(
+            user=self.user, kind="suggest-priority", status="running",
+            started_at=timezone.now(), input_payload={"title": "Fix outage"},
+        )
+        run_ai_job(str(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "running")
+
+        AIJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - STALE_AFTER * 2)
+        run_ai_job(str(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "succeeded")
+
+    def test_validation_and_ownership(self):
+        response = self.enqueue({"kind": "suggest-priority", "title": "x", "create_subtasks": True})
+        self.assertEqual(response.status_code, 400)
+
+        other = User.objects.create_user(email="other@example.com", username="other", password="pass12345")
+        job = AIJob.objects.create(user=other, kind="suggest-priority")
+        self.assertEqual(self.client.get(f"/api/ai/jobs/{job.pk}/").status_code, 404)
+
+
+class AIJobWorkerTests(TransactionTestCase):
+    """The non-eager path: a real worker consuming the in-memory broker."""
+
+    def setUp(self):
+        celery_app.conf.task_always_eager = False
+        self.addCleanup(setattr, celery_app.conf, "task_always_eager", True)
+
+    def test_job_runs_on_worker(self):
+        user = User.objects.create_user(email="worker@example.com", username="worker", password="pass12345")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with start_worker(celery_app, perform_ping_check=False, shutdown_timeout=10):
+            job_id = client.post(
+                "/api/ai/jobs/", {"kind": "breakdown-task", "title": "Ship it"}, format="json"
+            ).json()["id"]
+            for _ in range(100):
+                job = client.get(f"/api/ai/jobs/{job_id}/").json()
+                if job["status"] == "succeeded":
+                    break
+                time.sleep(0.05)
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(len(job["result"]["subtasks"]), 3)
+
+
+class BreakdownStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="stream@example.com", username="stream", password="pass12345"
+        )
+
+    def stream(self, client, title):
+        async def events():
+            with mock.patch("apps.ai.services.ai_engine.get_client", return_value=client):
+                response = await self.async_client.post(
+                    "/api/ai/breakdown-task/stream/",
+                    {"title": title},
+                    content_type="application/json",
+                    headers={"Authorization": f"Bearer {AccessToken.for_user(self.user)}"},
+                )
+                self.assertEqual(response["Content-Type"], "text/event-stream")
+                return [chunk.decode() async for chunk in response.streaming_content]
+
+        return async_to_sync(events)()
+
+    def test_streams_subtasks_then_done(self):
+        client = streaming_client()
+        self.addCleanup(client.close)
+        events = self.stream(client, "Conference talk stream")
+        self.assertEqual([event.split("\n")[0] for event in events], [
+            "event: subtask", "event: subtask", "event: done",
+        ])
+        self.assertIn('"estimated_time": "30m"', events[0])
+        self.assertIn('"subtasks": 2', events[2])
+
+        get_writer().flush()
+        self.assertEqual(
+            InferenceLog.objects.get(input_payload__title="Conference talk stream").error, ""
+        )
+
+    def test_provider_bug_ends_the_stream_with_an_error(self):
+        client = streaming_client(crash=True)
+        self.addCleanup(client.close)
+        with self.assertLogs("apps.ai.services.client", "ERROR"):
+            events = self.stream(client, "Crashing stream")
+
+        self.assertEqual([event.split("\n")[0] for event in events], ["event: error"])
+        get_writer().flush()
+        self.assertEqual(
+            InferenceLog.objects.get(input_payload__title="Crashing stream").error,
+            "streaming: unexpected RuntimeError",
+        )
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.post(
+            "/api/ai/breakdown-task/stream/", {"title": "x"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 401)
@@ -1,15 +1,14 @@
-# Create DefaultRouter()
-# Register AIViewSet with basename="ai"
+from django.urls import include, path
+from rest_framework.routers import SimpleRouter
 
-# Add custom routes:
-# POST /api/ai/breakdown-task/
-# POST /api/ai/suggest-priority/
+from .views import AIJobViewSet, AIViewSet, breakdown_task_stream
 
-# users/urls.py
-from django.urls import path
-from . import views
+# SimpleRouter: the API root view already comes from apps.tasks.urls
+router = SimpleRouter()
+router.register(r"ai/jobs", AIJobViewSet, basename="ai-job")
+router.register(r"ai", AIViewSet, basename="ai")
 
 urlpatterns = [
-    # path('ai/breakdown-task', views.BreakdownTaskView.as_view(), name='breakdown'),
-    # path('ai/suggest-priority', views.SuggestPriorityView.as_view(), name ='Suggest'),
+    path("ai/breakdown-task/stream/", breakdown_task_stream, name="ai-breakdown-task-stream"),
+    path("", include(router.urls)),
 ]
@@ -1,24 +1,226 @@
-from django.shortcuts import render
+import json
+import logging
+from datetime import timedelta
 
-# Create your views here.
-# Class: AIViewSet(viewsets.ViewSet)
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-# permission_classes = [IsAuthenticated]  # only logged-in users
+from .models import AIJob, InferenceLog
+from .serializers import (
+    AIJobCreateSerializer,
+    AIJobSerializer,
+    BreakdownTaskRequestSerializer,
+    BreakdownTaskResponseSerializer,
+    SubtaskSuggestionSerializer,
+    SuggestPriorityBatchRequestSerializer,
+    SuggestPriorityRequestSerializer,
+    SuggestPriorityResponseSerializer,
+)
+from .services import ai_engine
+from .services.client import InferenceError
+from .services.inference_log import latency_percentiles
+from .tasks import run_ai_job
 
-# Action 1: breakdown_task (POST)
-# URL: /api/ai/breakdown-task/
+logger = logging.getLogger(__name__)
 
-# Steps inside method:
-# 1. Validate request using BreakdownTaskRequestSerializer
-# 2. Call analyze_task_for_breakdown(title, description)
-# 3. Log input + output in InferenceLog (if you implemented it)
-# 4. Return BreakdownTaskResponseSerializer(data)
 
-# Action 2: suggest_priority (POST)
-# URL: /api/ai/suggest-priority/
+class AIViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
 
-# Steps inside method:
-# 1. Validate request using SuggestPriorityRequestSerializer
-# 2. Call suggest_priority(title, description, due_date)
-# 3. Log inference
-# 4. Return SuggestPriorityResponseSerializer(data)
+    def infer(self, request_serializer_class, response_serializer_class, engine, request, **extra):
+        serializer = request_serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            result = engine(**serializer.validated_data, **extra)
+        except InferenceError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        output = response_serializer_class(data=result)
+        if not output.is_valid():
+            return Response(
+                {"detail": "Model returned an invalid response."},
+                status=status.HTTP_502_BAD_GATEWAY,
+            )
+        return Response(output.validated_data)
+
+    @action(detail=False, methods=["post"], url_path="breakdown-task")
+    def breakdown_task(self, request):
+        return self.infer(
+            BreakdownTaskRequestSerializer,
+            BreakdownTaskResponseSerializer,
+            ai_engine.analyze_task_for_breakdown,
+            request,
+            user_id=request.user.pk,
+        )
+
+    @action(detail=False, methods=["post"], url_path="suggest-priority")
+    def suggest_priority(self, request):
+        return self.infer(
+            SuggestPriorityRequestSerializer,
+            SuggestPriorityResponseSerializer,
+            ai_engine.suggest_priority,
+            request,
+            user_id=request.user.pk,
+        )
+
+    @action(detail=False, methods=["post"], url_path="suggest-priority/batch")
+    def suggest_priority_batch(self, request):
+        """
+        {"tasks": [{"title", "description", "due_date"}, ...]} (up to 200)
+        -> {"results": [...]} in the same order; an item that failed has
+        {"error": "..."} in place of a suggestion.
+        """
+        serializer = SuggestPriorityBatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        for result in ai_engine.suggest_priorities(
+            serializer.validated_data["tasks"], user_id=request.user.pk
+        ):
+            if isinstance(result, InferenceError):
+                results.append({"error": str(result)})
+                continue
+            output = SuggestPriorityResponseSerializer(data=result)
+            if output.is_valid():
+                results.append(output.validated_data)
+            else:
+                results.append({"error": "Model returned an invalid response."})
+        return Response({"results": results})
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def latency(self, request):
+        """
+        p50 / p95 / p99 model latency per endpoint and model, last ?days=7
+        """
+        try:
+            days = min(max(int(request.query_params.get("days", 7)), 1), 90)
+        except ValueError:
+            days = 7
+
+        logs = InferenceLog.objects.filter(created_at__gte=timezone.now() - timedelta(days=days))
+        return Response({"days": days, "results": latency_percentiles(logs)})
+
+
+class AIJobViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Queued AI calls: POST returns 202 with the job right away, the Celery
+    workers run it, clients poll GET /api/ai/jobs/{id}/ for the result.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = AIJobSerializer
+
+    def get_queryset(self):
+        return AIJob.objects.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = AIJobCreateSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            job = serializer.save()
+            # the worker must see the row, so enqueue only once it is committed
+            transaction.on_commit(
+                lambda: run_ai_job.apply_async((str(job.pk),), task_id=str(job.pk))
+            )
+
+        job.refresh_from_db()
+        return Response(
+            AIJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": f"{request.path}{job.pk}/"},
+        )
+
+
+async def breakdown_task_stream(request):
+    """
+    POST /api/ai/breakdown-task/stream/ - the breakdown as server-sent events:
+
+        event: subtask   data: {"title": ..., "estimated_time": ...}   (one per subtask, as parsed)
+        event: done      data: {"subtasks": <count>, "reasoning": ...}
+        event: error     data: {"detail": ...}
+
+    Async view: serve it from the ASGI app (TaskMaster/asgi.py), the WSGI
+    handler would buffer the whole stream. A client that disconnects
+    cancels the provider call.
+    """
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+
+    # DRF authentication / parsing on a plain async view
+    drf_request = Request(
+        request,
+        parsers=[JSONParser()],
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    try:
+        user = await sync_to_async(lambda: drf_request.user)()
+        if not user.is_authenticated:
+            raise NotAuthenticated()
+        serializer = BreakdownTaskRequestSerializer(data=drf_request.data)
+        serializer.is_valid(raise_exception=True)
+    except APIException as exc:
+        return JsonResponse(
+            exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail},
+            status=exc.status_code,
+            safe=False,
+        )
+
+    response = StreamingHttpResponse(
+        breakdown_events(**serializer.validated_data, user_id=user.pk),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: don't buffer the stream
+    return response
+
+
+# like DRF views: session-authenticated requests are CSRF checked by SessionAuthentication
+# (set directly, the csrf_exempt decorator of Django < 5 would hide that the view is async)
+breakdown_task_stream.csrf_exempt = True
+
+
+async def breakdown_events(title, description="", user_id=None):
+    try:
+        async for kind, payload in ai_engine.astream_breakdown(title, description, user_id=user_id):
+            if kind == "subtask":
+                subtask = SubtaskSuggestionSerializer(data=payload)
+                if subtask.is_valid():
+                    yield sse("subtask", subtask.validated_data)
+                continue
+
+            output = BreakdownTaskResponseSerializer(data=payload)
+            if not output.is_valid():
+                yield sse("error", {"detail": "Model returned an invalid response."})
+                return
+            yield sse("done", {
+                "subtasks": len(output.validated_data["subtasks"]),
+                "reasoning": output.validated_data["reasoning"],
+            })
+    except InferenceError as exc:
+        yield sse("error", {"detail": str(exc)})
+    except Exception:
+        # headers are sent already: end the stream with an event, not a 500
+        logger.exception("breakdown stream failed")
+        yield sse("error", {"detail": "Inference failed."})
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
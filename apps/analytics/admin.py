@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import DailyTaskStats
+
+
+@admin.register(DailyTaskStats)
+class DailyTaskStatsAdmin(admin.ModelAdmin):
+    list_display = ("user", "date", "created", "completed", "cancelled", "overdue")
+    ordering = ("-date",)
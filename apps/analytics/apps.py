@@ -3,3 +3,4 @@ from django.apps import AppConfig
 
 class AnalyticsConfig(AppConfig):
     name = "apps.analytics"
+    default_auto_field = "django.db.models.BigAutoField"
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.analytics.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Backfill / rebuild the daily task rollups from the Task table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", dest="users", help="user id (repeatable); default all users")
+
+    def handle(self, *args, **options):
+        # one transaction, so the summary never sees a half rebuilt user
+        with transaction.atomic():
+            rows = rebuild(options["users"])
+        self.stdout.write(self.style.SUCCESS(f"wrote {rows} daily rollup rows"))
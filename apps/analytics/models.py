@@ -1,3 +1,35 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class DailyTaskStats(models.Model):
+    """
+    Per-user, per-day task counters, maintained incrementally by
+    apps.analytics.rollups from the task write paths.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_task_stats"
+    )
+
+    date = models.DateField()
+
+    # tasks created / completed / cancelled on this day
+    created = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+
+    # open active tasks due on this day (overdue once the day has passed)
+    overdue = models.IntegerField(default=0)
+
+    # sum of created_at -> completed_at for the tasks completed on this day
+    completion_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "date")
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.user_id} {self.date}"
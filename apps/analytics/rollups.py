@@ -0,0 +1,111 @@
+from collections import Counter, defaultdict
+
+from django.db.models import BigIntegerField, Case, F, Value, When
+from django.utils import timezone
+
+from apps.tasks.models import Task
+
+from .models import DailyTaskStats
+
+# Task fields the rollups depend on
+SNAPSHOT_FIELDS = (
+    "user_id", "created_at", "status", "completed_at", "cancelled_at", "due_date", "is_active",
+)
+COUNTERS = ("created", "completed", "cancelled", "overdue", "completion_seconds")
+OPEN_STATUSES = ("pending", "in_progress")
+
+
+def snapshot(task):
+    """The rollup-relevant state of a Task instance (same shape as .values())."""
+    return {field: getattr(task, field) for field in SNAPSHOT_FIELDS}
+
+
+def contributions(state):
+    """
+    {(day, counter): amount} one task in `state` adds to its user's rollups.
+    Incremental updates apply the difference between two states; the
+    rebuild sums it over every task, so both always agree.
+    """
+    counts = Counter()
+    if state is None:
+        return counts
+
+    counts[timezone.localdate(state["created_at"]), "created"] += 1
+
+    if state["status"] == "completed" and state["completed_at"]:
+        day = timezone.localdate(state["completed_at"])
+        counts[day, "completed"] += 1
+        counts[day, "completion_seconds"] += max(
+            0, int((state["completed_at"] - state["created_at"]).total_seconds())
+        )
+
+    if state["status"] == "cancelled" and state["cancelled_at"]:
+        counts[timezone.localdate(state["cancelled_at"]), "cancelled"] += 1
+
+    if state["is_active"] and state["status"] in OPEN_STATUSES and state["due_date"]:
+        counts[state["due_date"], "overdue"] += 1
+
+    return counts
+
+
+def record_task_changes(user_id, changes):
+    """
+    Apply [(before, after), ...] task states (None for a task that did not
+    exist / no longer exists) to the user's rollups: one INSERT for missing
+    days and one UPDATE, whatever the number of tasks. Call it inside the
+    transaction that writes the tasks.
+    """
+    delta = Counter()
+    for before, after in changes:
+        delta.update(contributions(after))
+        delta.subtract(contributions(before))
+
+    by_day = defaultdict(dict)
+    for (day, counter), amount in delta.items():
+        if amount:
+            by_day[day][counter] = amount
+    if not by_day:
+        return
+
+    DailyTaskStats.objects.bulk_create(
+        [DailyTaskStats(user_id=user_id, date=day) for day in by_day],
+        ignore_conflicts=True,
+    )
+
+    updates = {}
+    for counter in COUNTERS:
+        whens = [
+            When(date=day, then=Value(amounts[counter]))
+            for day, amounts in by_day.items()
+            if counter in amounts
+        ]
+        if whens:
+            updates[counter] = F(counter) + Case(*whens, default=Value(0), output_field=BigIntegerField())
+    DailyTaskStats.objects.filter(user_id=user_id, date__in=list(by_day)).update(**updates)
+
+
+def rebuild(user_ids=None, batch_size=5000):
+    """
+    Recompute the rollups from the Task table, for `user_ids` or everyone.
+    Returns the number of rows written.
+    """
+    tasks = Task.objects.all()
+    stats = DailyTaskStats.objects.all()
+    if user_ids is not None:
+        tasks = tasks.filter(user_id__in=user_ids)
+        stats = stats.filter(user_id__in=user_ids)
+
+    rows = defaultdict(Counter)
+    for state in tasks.values(*SNAPSHOT_FIELDS).iterator(chunk_size=batch_size):
+        for (day, counter), amount in contributions(state).items():
+            rows[state["user_id"], day][counter] += amount
+
+    stats.delete()
+    DailyTaskStats.objects.bulk_create(
+        [
+            DailyTaskStats(user_id=user_id, date=day, **counts)
+            for (user_id, day), counts in rows.items()
+        ],
+        batch_size=batch_size,
+    )
+    return len(rows)
@@ -1,3 +1,70 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.tasks.models import Task
+
+from .models import DailyTaskStats
+from .rollups import rebuild
+
+User = get_user_model()
+
+
+class TaskRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="rollups@example.com", username="rollups", password="pass12345"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.localdate()
+
+    def rows(self):
+        return list(
+            DailyTaskStats.objects
+            .filter(user=self.user)
+            .exclude(created=0, completed=0, cancelled=0, overdue=0, completion_seconds=0)
+            .values("date", "created", "completed", "cancelled", "overdue", "completion_seconds")
+        )
+
+    def write_tasks(self):
+        yesterday = str(self.today - timedelta(days=1))
+        ids = [
+            self.client.post("/api/tasks/", {"title": f"T{i}", "due_date": yesterday}).json()["id"]
+            for i in range(4)
+        ]
+        self.client.post(f"/api/tasks/{ids[0]}/complete/")
+        self.client.patch(f"/api/tasks/{ids[1]}/", {"status": "cancelled"})
+        self.client.delete(f"/api/tasks/{ids[2]}/")
+        self.client.post("/api/tasks/bulk/", {
+            "create": [{"title": "B", "status": "completed"}],
+            "update": [{"id": ids[1], "status": "pending"}, {"id": ids[3], "due_date": None}],
+            "delete": [ids[0]],
+        }, format="json")
+        return ids
+
+    def test_incremental_matches_rebuild(self):
+        self.write_tasks()
+        incremental = self.rows()
+
+        rebuild([self.user.pk])
+        self.assertEqual(self.rows(), incremental)
+
+    def test_summary(self):
+        self.write_tasks()
+        data = self.client.get("/api/analytics/summary/", {"days": 7}).json()
 
-# Create your tests here.
+        # ids[1] is open again and overdue; ids[0] / ids[2] deleted, ids[3] no due date
+        self.assertEqual(data["overdue"], 1)
+        self.assertEqual(data["totals"]["created"], 5)
+        self.assertEqual(data["totals"]["completed"], 2)
+        self.assertEqual(data["totals"]["cancelled"], 0)
+        self.assertEqual(data["period"], data["totals"])
+        self.assertEqual(Task.objects.filter(user=self.user, status="completed").count(), 2)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path("summary/", views.SummaryView.as_view(), name="analytics_summary"),
+]
@@ -1,3 +1,52 @@
-from django.shortcuts import render
+from datetime import timedelta
 
-# Create your views here.
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import DailyTaskStats
+
+COUNTERS = ("created", "completed", "cancelled", "completion_seconds")
+
+
+def summarize(rows):
+    totals = rows.aggregate(**{name: Sum(name) for name in COUNTERS})
+    totals = {name: value or 0 for name, value in totals.items()}
+    seconds = totals.pop("completion_seconds")
+    totals["avg_completion_hours"] = (
+        round(seconds / totals["completed"] / 3600, 2) if totals["completed"] else None
+    )
+    return totals
+
+
+class SummaryView(APIView):
+    """
+    Dashboard numbers from the daily rollups (apps.analytics.rollups), so
+    the cost depends on the number of active days, not the number of tasks.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            days = min(max(int(request.query_params.get("days", 30)), 1), 366)
+        except ValueError:
+            days = 30
+
+        today = timezone.localdate()
+        start = today - timedelta(days=days - 1)
+        stats = DailyTaskStats.objects.filter(user=request.user)
+        period = stats.filter(date__gte=start, date__lte=today)
+
+        return Response({
+            "days": days,
+            "overdue": stats.filter(date__lt=today).aggregate(n=Sum("overdue"))["n"] or 0,
+            "due_today": stats.filter(date=today).values_list("overdue", flat=True).first() or 0,
+            "totals": summarize(stats),
+            "period": summarize(period),
+            "daily": list(
+                period.values("date", "created", "completed", "cancelled")
+            ),
+        })
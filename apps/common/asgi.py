@@ -0,0 +1,43 @@
+import asyncio
+
+
+class CancelOnDisconnect:
+    """
+    ASGI middleware: once the request body has been read, watch for the
+    client disconnecting and cancel the request task, so a streaming
+    response (e.g. server-sent events) stops and its upstream work is
+    cancelled instead of running to the end. Django >= 5.0 does this itself.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        body_read = asyncio.Event()
+
+        async def wrapped_receive():
+            message = await receive()
+            if message["type"] == "http.disconnect" or not message.get("more_body", False):
+                body_read.set()
+            return message
+
+        app = asyncio.ensure_future(self.app(scope, wrapped_receive, send))
+
+        async def watch():
+            await body_read.wait()
+            # the app no longer reads from `receive`, so the next message is the disconnect
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            app.cancel()
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await app
+        except asyncio.CancelledError:
+            if not watcher.done():
+                raise
+        finally:
+            watcher.cancel()
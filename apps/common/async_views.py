@@ -0,0 +1,111 @@
+"""
+Plain async views for DRF endpoints under ASGI.
+
+DRF's APIView is sync only, so the async read views (apps.tasks.views,
+apps.users.views) do its request handling themselves: authentication,
+JSON rendering and exception responses, through these helpers.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.urls import URLPattern
+from django.utils.cache import patch_vary_headers
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+def render(data, status=status.HTTP_200_OK, headers=None):
+    """`data` as JSON, rendered exactly like the DRF views render it."""
+    response = HttpResponse(
+        JSONRenderer().render(data),
+        status=status,
+        headers=headers,
+        content_type=JSONRenderer.media_type,
+    )
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
+def error_response(exc, request):
+    """What DRF's exception handling returns for `exc`."""
+    if isinstance(exc, Http404):
+        exc = exceptions.NotFound(*exc.args)
+
+    headers = {}
+    code = exc.status_code
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        authenticators = request.authenticators
+        auth_header = authenticators[0].authenticate_header(request) if authenticators else None
+        if auth_header:
+            headers["WWW-Authenticate"] = auth_header
+        else:
+            code = status.HTTP_403_FORBIDDEN
+    if getattr(exc, "wait", None):
+        headers["Retry-After"] = str(int(exc.wait))
+
+    data = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+    return render(data, status=code, headers=headers)
+
+
+async def authenticate(request):
+    """
+    Authenticate the DRF `request` with its authenticators, awaiting
+    `aauthenticate` where an authenticator has one and running it in a
+    thread otherwise. Returns the user; raises NotAuthenticated when no
+    authenticator accepts the request.
+    """
+    for authenticator in request.authenticators:
+        if hasattr(authenticator, "aauthenticate"):
+            user_auth = await authenticator.aauthenticate(request)
+        else:
+            user_auth = await sync_to_async(authenticator.authenticate)(request)
+        if user_auth is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth
+            return request.user
+
+    raise exceptions.NotAuthenticated()
+
+
+def wants_json(request):
+    # the browsable API and ?format= stay with the sync views
+    return "format" not in request.GET and "html" not in request.headers.get("Accept", "")
+
+
+def read_view(view, handler):
+    """
+    Async view serving GET JSON requests with `handler(request, **kwargs)`
+    and everything else with the sync `view`. Authentication and API
+    exceptions raised by `handler` become the usual DRF error responses.
+    """
+
+    async def async_view(request, *args, **kwargs):
+        if request.method != "GET" or "format" in kwargs or not wants_json(request):
+            return await sync_to_async(view)(request, *args, **kwargs)
+
+        drf_request = Request(
+            request,
+            authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+        )
+        try:
+            await authenticate(drf_request)
+            return await handler(drf_request, *args, **kwargs)
+        except (exceptions.APIException, Http404) as exc:
+            return error_response(exc, drf_request)
+
+    # like DRF views: session-authenticated requests are CSRF checked by SessionAuthentication
+    # (set directly, the csrf_exempt decorator of Django < 5 would hide that the view is async)
+    async_view.csrf_exempt = True
+    async_view.__doc__ = handler.__doc__
+    return async_view
+
+
+def with_async_reads(patterns, handlers):
+    """`patterns` (e.g. a router's urls) with the views named in `handlers` wrapped by read_view."""
+    return [
+        URLPattern(pattern.pattern, read_view(pattern.callback, handlers[pattern.name]),
+                   pattern.default_args, pattern.name)
+        if getattr(pattern, "name", None) in handlers else pattern
+        for pattern in patterns
+    ]
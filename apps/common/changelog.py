@@ -0,0 +1,51 @@
+from django.core.cache import cache
+
+
+class CacheChangeLog:
+    """
+    Append-only change log kept in the shared cache, one sequence per key.
+
+    Lets every worker keep a derived structure in process memory and catch
+    up on other workers' writes by replaying the changes it has not seen,
+    instead of rebuilding from the database. `since()` returns None whenever
+    the log cannot be replayed (evicted entries, too far behind), which
+    callers treat as "rebuild from the database".
+    """
+
+    def __init__(self, prefix, max_replay=500, timeout=60 * 60 * 24):
+        self.prefix = prefix
+        self.max_replay = max_replay
+        self.timeout = timeout
+
+    def seq_key(self, key):
+        return f"{self.prefix}:seq:{key}"
+
+    def entry_key(self, key, seq):
+        return f"{self.prefix}:log:{key}:{seq}"
+
+    def current(self, key):
+        return cache.get(self.seq_key(key), 0)
+
+    def append(self, key, change):
+        seq_key = self.seq_key(key)
+        cache.add(seq_key, 0, None)
+        seq = cache.incr(seq_key)
+        cache.set(self.entry_key(key, seq), change, self.timeout)
+        return seq
+
+    def since(self, key, seq):
+        """
+        (current_seq, changes after `seq`) or (current_seq, None) if the
+        caller has to rebuild.
+        """
+        current = self.current(key)
+        if current == seq:
+            return current, []
+        if current < seq or current - seq > self.max_replay:
+            return current, None
+
+        keys = [self.entry_key(key, n) for n in range(seq + 1, current + 1)]
+        entries = cache.get_many(keys)
+        if len(entries) != len(keys):
+            return current, None
+        return current, [entries[k] for k in keys]
@@ -0,0 +1,38 @@
+"""
+How the web process connects to PostgreSQL.
+
+`connection_mode` turns a DATABASES entry into one of MODES; "pool" uses
+the pooled backend in apps.common.db_pool.base. Importable from settings
+(it doesn't import Django's database layer).
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+MODES = ("direct", "pool", "pgbouncer")
+
+
+def connection_mode(database, mode, pool=None):
+    """
+    A copy of the PostgreSQL DATABASES entry `database` set up for `mode`:
+
+    direct     a new connection per request, as CONN_MAX_AGE has it
+    pool       a connection pool per worker process (ENGINE
+               "apps.common.db_pool"), connections go back to it at the end
+               of each request; `pool` holds psycopg_pool.ConnectionPool
+               options (min_size, max_size, max_lifetime, max_idle, timeout)
+    pgbouncer  through PgBouncer in transaction pooling mode, where each
+               transaction may run on a different server connection: no
+               server-side cursors and no prepared statements
+    """
+    if mode not in MODES:
+        raise ImproperlyConfigured(f"Database connection mode must be one of {', '.join(MODES)}, not {mode!r}")
+
+    database = dict(database, OPTIONS=dict(database.get("OPTIONS", {})))
+    if mode == "pool":
+        database["ENGINE"] = "apps.common.db_pool"
+        database["CONN_MAX_AGE"] = 0
+        database["OPTIONS"]["pool"] = dict(pool) if pool else True
+    elif mode == "pgbouncer":
+        database["DISABLE_SERVER_SIDE_CURSORS"] = True
+        database["OPTIONS"]["prepare_threshold"] = None
+        database["OPTIONS"].pop("server_side_binding", None)
+    return database
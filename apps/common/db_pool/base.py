@@ -0,0 +1,98 @@
+import os
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from psycopg import IsolationLevel
+from psycopg_pool import ConnectionPool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The PostgreSQL backend with a psycopg_pool connection pool per process,
+    configured by OPTIONS["pool"] (True, or ConnectionPool options such as
+    min_size, max_size, max_lifetime, max_idle and timeout). That's the
+    option Django 5.1 added to its own backend, so moving to it is an ENGINE
+    change.
+
+    Closing the connection (at the end of each request: CONN_MAX_AGE must be
+    0) hands it back to the pool. With CONN_HEALTH_CHECKS the pool checks a
+    connection before handing it out, replacing it if the server closed it.
+    """
+
+    # (alias, pid): pool; a forked worker can't use its parent's connections
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        options = self.settings_dict["OPTIONS"].get("pool")
+        if self.alias == NO_DB_ALIAS or not options:
+            return None
+
+        key = (self.alias, os.getpid())
+        with self._pools_lock:
+            if key not in self._pools:
+                params = self.get_connection_params()
+                # Django sets autocommit again after every checkout
+                params["autocommit"] = True
+                check = ConnectionPool.check_connection if self.settings_dict["CONN_HEALTH_CHECKS"] else None
+                self._pools[key] = ConnectionPool(
+                    kwargs=params,
+                    check=check,
+                    name=f"django-{self.alias}",
+                    open=False,
+                    **(options if isinstance(options, dict) else {}),
+                )
+            return self._pools[key]
+
+    def check_settings(self):
+        super().check_settings()
+        if self.settings_dict["OPTIONS"].get("pool") and self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured("Pooled connections go back to the pool after each request: set CONN_MAX_AGE to 0.")
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pool", None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        pool.open()  # no-op once open
+        connection = pool.getconn()
+        # as the parent class does for a new connection
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        try:
+            self.isolation_level = IsolationLevel(isolation_level or IsolationLevel.READ_COMMITTED)
+        except ValueError:
+            pool.putconn(connection)
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {isolation_level} "
+                f"specified. Use one of the psycopg.IsolationLevel values."
+            )
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # the pool rolls back a connection left in a transaction, and
+            # discards a broken one
+            self.connection._pool.putconn(self.connection)
+        self.connection = None
+
+
+def close_pools():
+    """Close this process's pools, e.g. when a gunicorn worker exits."""
+    pid = os.getpid()
+    with DatabaseWrapper._pools_lock:
+        keys = [key for key in DatabaseWrapper._pools if key[1] == pid]
+        pools = [DatabaseWrapper._pools.pop(key) for key in keys]
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,257 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import InvalidPage
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorEncoder(json.JSONEncoder):
+    # full precision, unlike DjangoJSONEncoder which drops microseconds
+    def default(self, o):
+        if hasattr(o, "isoformat"):
+            return o.isoformat()
+        return str(o)
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page number pagination by default, keyset (cursor) pagination on request.
+
+    Clients opt in with `?pagination=cursor` (first page) and then follow the
+    `next` / `previous` links, which carry `?cursor=...`. The cursor stores the
+    values of the current ordering fields plus the primary key of the edge row,
+    so every page is a bounded index range scan: no COUNT(*) and no OFFSET.
+    """
+
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    invalid_cursor_message = "Invalid cursor"
+    invalid_ordering_message = (
+        "Cursor pagination only supports plain field ordering, not {ordering}. "
+        "Use page number pagination for this request."
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.is_keyset(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        queryset, position, reverse = self.get_keyset_queryset(queryset, request)
+        return self.get_keyset_page(list(queryset), position, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views, with the async ORM."""
+        self.keyset = self.is_keyset(request)
+        if self.keyset:
+            queryset, position, reverse = self.get_keyset_queryset(queryset, request)
+            return self.get_keyset_page([row async for row in queryset], position, reverse)
+
+        # PageNumberPagination.paginate_queryset, with the COUNT and the page awaited
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        bottom = (number - 1) * paginator.per_page
+        top = bottom + paginator.per_page
+        if top + paginator.orphans >= paginator.count:
+            top = paginator.count
+        rows = [row async for row in queryset[bottom:top]]
+        self.page = paginator._get_page(rows, number, paginator)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+    def is_keyset(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == "cursor"
+        )
+
+    def get_keyset_queryset(self, queryset, request):
+        """(query for the requested page plus one row, cursor position, reverse)"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_keys(queryset)
+
+        position, reverse = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        if position is not None:
+            queryset = queryset.filter(self.get_after_filter(position, reverse))
+        return queryset[:self.page_size + 1], position, reverse
+
+    def get_keyset_page(self, rows, position, reverse):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position = None
+        self.previous_position = None
+        if rows:
+            if has_more or reverse:
+                self.next_position = self.get_position(rows[-1])
+            if position is not None and (has_more or not reverse):
+                self.previous_position = self.get_position(rows[0])
+
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["required"] = ["results"]
+        return response_schema
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return self.build_link(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if self.previous_position is None:
+            return None
+        return self.build_link(self.previous_position, reverse=True)
+
+    # keys
+
+    def get_keys(self, queryset):
+        """
+        Resolve the queryset ordering to (field, descending) pairs with the
+        primary key appended as tiebreaker, so positions are always unique.
+        """
+        opts = queryset.model._meta
+        ordering = list(queryset.query.order_by or opts.ordering)
+
+        keys = []
+        for item in ordering:
+            # expressions and annotations (e.g. the ?q= search rank) have no column to key on
+            name = item.lstrip("-") if isinstance(item, str) else None
+            field = None
+            if name is not None and name not in queryset.query.annotations:
+                try:
+                    field = opts.pk if name == "pk" else opts.get_field(name)
+                except FieldDoesNotExist:
+                    pass
+            if field is None:
+                raise ValidationError({
+                    self.mode_query_param: self.invalid_ordering_message.format(ordering=name or item)
+                })
+            keys.append((field, item.startswith("-")))
+
+        if not any(field.primary_key for field, _ in keys):
+            descending = keys[-1][1] if keys else False
+            keys.append((opts.pk, descending))
+
+        return keys
+
+    def get_order_by(self, reverse):
+        order_by = []
+        for field, descending in self.keys:
+            expression = F(field.attname)
+            nulls = {}
+            if field.null:
+                # NULLs always sort after values when paging forward
+                nulls = {"nulls_first": True} if reverse else {"nulls_last": True}
+            if descending != reverse:
+                order_by.append(expression.desc(**nulls))
+            else:
+                order_by.append(expression.asc(**nulls))
+        return order_by
+
+    def get_after_filter(self, position, reverse):
+        """
+        Rows strictly after `position` in the (possibly reversed) ordering:
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+
+        for (field, descending), value in zip(self.keys, position):
+            name = field.attname
+            beyond = self.get_beyond_filter(field, descending != reverse, value, reverse)
+            if beyond is not None:
+                condition |= equal & beyond
+            equal &= Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+
+        # redundant bound on the leading key lets the planner start the
+        # index scan at the cursor instead of filtering from the top
+        field, descending = self.keys[0]
+        value = position[0]
+        if value is not None and not (field.null and not reverse):
+            lookup = "lte" if descending != reverse else "gte"
+            condition &= Q(**{f"{field.attname}__{lookup}": value})
+
+        return condition
+
+    def get_beyond_filter(self, field, descending, value, reverse):
+        name = field.attname
+        if value is None:
+            # NULLs are last going forward and first going backward
+            return Q(**{f"{name}__isnull": False}) if reverse else None
+
+        beyond = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+        if field.null and not reverse:
+            beyond |= Q(**{f"{name}__isnull": True})
+        return beyond
+
+    def get_position(self, row):
+        if isinstance(row, dict):
+            return [row[field.attname] for field, _ in self.keys]
+        return [getattr(row, field.attname) for field, _ in self.keys]
+
+    # cursor encoding
+
+    def build_link(self, position, reverse):
+        payload = json.dumps({"p": position, "r": reverse}, cls=CursorEncoder)
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            values = payload["p"]
+            if len(values) != len(self.keys):
+                raise ValueError
+            position = [
+                None if value is None else field.to_python(value)
+                for (field, _), value in zip(self.keys, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, bool(payload.get("r"))
@@ -1,3 +1,73 @@
-from django.test import TestCase
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .db_pool import connection_mode
+from .db_pool.base import DatabaseWrapper, close_pools
+
+DATABASE = {
+    "ENGINE": "django.db.backends.postgresql",
+    "NAME": "taskmaster",
+    "USER": "taskmaster",
+    "PASSWORD": "secret",
+    "HOST": "db.example.com",
+    "PORT": "5432",
+    "CONN_MAX_AGE": 0,
+    "CONN_HEALTH_CHECKS": True,
+    "AUTOCOMMIT": True,
+    "ATOMIC_REQUESTS": False,
+    "TIME_ZONE": None,
+    "OPTIONS": {"sslmode": "require"},
+}
+
+
+class ConnectionModeTests(SimpleTestCase):
+
+    def test_direct_is_unchanged(self):
+        self.assertEqual(connection_mode(DATABASE, "direct"), DATABASE)
+
+    def test_pool(self):
+        database = connection_mode(DATABASE, "pool", pool={"max_size": 4, "max_lifetime": 600})
+
+        self.assertEqual(database["ENGINE"], "apps.common.db_pool")
+        self.assertEqual(database["CONN_MAX_AGE"], 0)
+        self.assertEqual(database["OPTIONS"], {"sslmode": "require", "pool": {"max_size": 4, "max_lifetime": 600}})
+        self.assertNotIn("pool", DATABASE["OPTIONS"])
+
+    def test_pgbouncer(self):
+        database = connection_mode(DATABASE, "pgbouncer")
+
+        self.assertEqual(database["ENGINE"], DATABASE["ENGINE"])
+        self.assertTrue(database["DISABLE_SERVER_SIDE_CURSORS"])
+        self.assertIsNone(database["OPTIONS"]["prepare_threshold"])
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            connection_mode(DATABASE, "pgpool")
+
+
+class PooledDatabaseWrapperTests(SimpleTestCase):
+
+    def tearDown(self):
+        close_pools()
+
+    def test_pool_per_alias(self):
+        settings_dict = connection_mode(DATABASE, "pool", pool={"min_size": 1, "max_size": 4})
+        wrapper = DatabaseWrapper(settings_dict, alias="pooled")
+
+        pool = wrapper.pool
+        # not opened (no connection made) until the first request needs one
+        self.assertTrue(pool.closed)
+        self.assertEqual((pool.min_size, pool.max_size), (1, 4))
+        self.assertIsNotNone(pool._check)
+        self.assertNotIn("pool", pool.kwargs)
+        self.assertEqual(pool.kwargs["sslmode"], "require")
+        self.assertIs(DatabaseWrapper(settings_dict, alias="pooled").pool, pool)
+
+    def test_no_pool(self):
+        self.assertIsNone(DatabaseWrapper(dict(DATABASE), alias="direct").pool)
+
+    def test_persistent_connections_rejected(self):
+        settings_dict = dict(connection_mode(DATABASE, "pool"), CONN_MAX_AGE=60)
+
+        with self.assertRaises(ImproperlyConfigured):
+            DatabaseWrapper(settings_dict, alias="pooled").check_settings()
@@ -1,5 +1,12 @@
+from collections import defaultdict
+
 from django.contrib import admin
+from django.db import transaction
+from apps.analytics.rollups import SNAPSHOT_FIELDS, record_task_changes, snapshot
 from .models import Task, SubTask, Tag, TaskDependency, TaskTag
+from .cache import bump_data_version
+from .search import refresh_search_documents
+from .duplicates import refresh_duplicate_index
 
 
 @admin.register(Task)
@@ -17,6 +24,38 @@ class TaskAdmin(admin.ModelAdmin):
     search_fields = ("title", "description")
     ordering = ("-created_at",)
 
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            before = (
+                Task.objects.filter(pk=obj.pk).values(*SNAPSHOT_FIELDS).first()
+                if change else None
+            )
+            if before and before["user_id"] != obj.user_id:
+                # moved to another user: it leaves the previous owner's rollups and reads
+                record_task_changes(before["user_id"], [(before, None)])
+                bump_data_version(before["user_id"])
+                before = None
+            obj.stamp_status()
+            super().save_model(request, obj, form, change)
+            record_task_changes(obj.user_id, [(before, snapshot(obj))])
+        bump_data_version(obj.user_id)
+        refresh_search_documents([obj.pk])
+        refresh_duplicate_index([obj.pk])
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Task.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        # hard deletes, unlike the API's soft delete: undo the tasks' rollups
+        with transaction.atomic():
+            changes = defaultdict(list)
+            for before in queryset.values(*SNAPSHOT_FIELDS):
+                changes[before["user_id"]].append((before, None))
+            super().delete_queryset(request, queryset)
+            for user_id, user_changes in changes.items():
+                record_task_changes(user_id, user_changes)
+                bump_data_version(user_id)
+
 
 @admin.register(SubTask)
 class SubTaskAdmin(admin.ModelAdmin):
@@ -24,6 +63,26 @@ class SubTaskAdmin(admin.ModelAdmin):
     list_filter = ("status",)
     ordering = ("order_index",)
 
+    def save_model(self, request, obj, form, change):
+        previous = (
+            SubTask.objects.filter(pk=obj.pk).values_list("parent_task__user_id", flat=True).first()
+            if change else None
+        )
+        super().save_model(request, obj, form, change)
+        # subtasks are nested in task reads
+        for user_id in {previous, obj.parent_task.user_id} - {None}:
+            bump_data_version(user_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_data_version(obj.parent_task.user_id)
+
+    def delete_queryset(self, request, queryset):
+        user_ids = set(queryset.values_list("parent_task__user_id", flat=True))
+        super().delete_queryset(request, queryset)
+        for user_id in user_ids:
+            bump_data_version(user_id)
+
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
@@ -32,4 +91,34 @@ class TagAdmin(admin.ModelAdmin):
 
 
 admin.site.register(TaskDependency)
-admin.site.register(TaskTag)
+
+
+@admin.register(TaskTag)
+class TaskTagAdmin(admin.ModelAdmin):
+    list_display = ("task", "tag", "created_at")
+
+    def save_model(self, request, obj, form, change):
+        previous = (
+            TaskTag.objects.filter(pk=obj.pk).values_list("task_id", "task__user_id").first()
+            if change else None
+        )
+        super().save_model(request, obj, form, change)
+        rows = [(obj.task_id, obj.task.user_id)]
+        if previous:
+            rows.append(previous)
+        self.task_tags_changed(rows)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.task_tags_changed([(obj.task_id, obj.task.user_id)])
+
+    def delete_queryset(self, request, queryset):
+        rows = list(queryset.values_list("task_id", "task__user_id"))
+        super().delete_queryset(request, queryset)
+        self.task_tags_changed(rows)
+
+    def task_tags_changed(self, rows):
+        # TaskTag has no signal receivers (see apps.tasks.signals); rows are (task_id, user_id)
+        for user_id in {user_id for _, user_id in rows}:
+            bump_data_version(user_id)
+        refresh_search_documents({task_id for task_id, _ in rows})
@@ -0,0 +1,169 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from apps.common.async_views import render
+
+VERSION_KEY = "tasks:version:{user_id}"
+RESPONSE_KEY = "tasks:response:{user_id}:{version}:{digest}"
+STATS_KEY = "tasks:cache-stats:{name}"
+STATS = ("hits", "misses", "not_modified")
+
+
+def get_data_version(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # random, so an evicted version can never resurrect old responses
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_data_version(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid.uuid4().hex, None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_data_version(user_id):
+    """
+    Invalidate every cached task read for `user_id` once the current
+    transaction commits (bumping earlier would let a concurrent read cache
+    pre-commit data under the new version).
+    """
+    key = VERSION_KEY.format(user_id=user_id)
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
+
+
+def record(name):
+    key = STATS_KEY.format(name=name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+async def arecord(name):
+    key = STATS_KEY.format(name=name)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 0, None)
+        await cache.aincr(key)
+
+
+def response_key(request, user_id, version, media_type):
+    """(cache key, ETag / Cache-Control headers) of a task read."""
+    digest = hashlib.sha1(f"{request.get_full_path()}|{media_type}".encode()).hexdigest()
+    etag = f'"{hashlib.sha1(f"{version}:{digest}".encode()).hexdigest()}"'
+    key = RESPONSE_KEY.format(user_id=user_id, version=version, digest=digest)
+    return key, {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def etag_matches(if_none_match, etag):
+    """
+    If-None-Match check: the header's entity tags (a comma separated list or
+    `*`) compared to `etag` with the weak comparison GET requires, i.e. the
+    opaque tags must be equal and W/ prefixes are ignored.
+    """
+    tags = parse_etags(if_none_match or "")
+    if tags == ["*"]:
+        return True
+    return etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+
+
+def cache_stats():
+    values = cache.get_many([STATS_KEY.format(name=name) for name in STATS])
+    stats = {name: values.get(STATS_KEY.format(name=name), 0) for name in STATS}
+    served = stats["hits"] + stats["not_modified"]
+    total = served + stats["misses"]
+    stats["hit_rate"] = round(served / total, 4) if total else 0.0
+    return stats
+
+
+def reset_cache_stats():
+    cache.delete_many([STATS_KEY.format(name=name) for name in STATS])
+
+
+class CachedReadMixin:
+    """
+    Serve list/retrieve from a per-user versioned cache with ETag support.
+
+    The cache key contains the user's data version, so every write path only
+    has to call `bump_data_version(user_id)`; stale entries are never read
+    again and simply expire.
+    """
+
+    response_cache_timeout = 300
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not settings.TASK_RESPONSE_CACHE:
+            return handler(request, *args, **kwargs)
+
+        user_id = request.user.pk
+        key, headers = response_key(
+            request, user_id, get_data_version(user_id), request.accepted_media_type
+        )
+        if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+            record("not_modified")
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = cache.get(key)
+        if data is not None:
+            record("hits")
+            return Response(data, headers=headers)
+
+        record("misses")
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, self.response_cache_timeout)
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+
+async def acached_response(handler, request, timeout=CachedReadMixin.response_cache_timeout):
+    """
+    CachedReadMixin.cached_response for async views: `handler` is a
+    coroutine function returning the response data. Entries are shared
+    with the sync views (same keys for JSON responses).
+    """
+    if not settings.TASK_RESPONSE_CACHE:
+        return render(await handler())
+
+    user_id = request.user.pk
+    key, headers = response_key(
+        request, user_id, await aget_data_version(user_id), JSONRenderer.media_type
+    )
+    if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+        await arecord("not_modified")
+        return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    data = await cache.aget(key)
+    if data is not None:
+        await arecord("hits")
+        return render(data, headers=headers)
+
+    await arecord("misses")
+    data = await handler()
+    await cache.aset(key, data, timeout)
+    return render(data, headers=headers)
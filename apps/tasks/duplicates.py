@@ -0,0 +1,206 @@
+import hashlib
+import random
+import struct
+import zlib
+from collections import defaultdict
+
+from django.db.models import Count
+
+from .models import Task, TaskLSHBucket
+from .search import build_document
+
+# 64 MinHash values in 16 LSH bands of 4: tasks whose shingle sets have a
+# Jaccard similarity of 0.7 share a band ~99% of the time, at 0.3 ~12%
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# minimum estimated Jaccard similarity for a near-duplicate
+DUPLICATE_THRESHOLD = 0.7
+
+# candidates verified per lookup, so one very common bucket can't make it linear
+MAX_CANDIDATES = 500
+
+# multiply-shift hashes ((a * x + b) mod 2**64) >> 32 stand in for permutations
+_MASK = (1 << 64) - 1
+_rng = random.Random(1)
+PERMUTATIONS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERM)]
+_PACK = struct.Struct(f"<{NUM_PERM}I")
+
+
+def shingles(title, description=""):
+    """Hashed character trigrams of the normalized title + description."""
+    text = f" {build_document(title, description, [])} "
+    return {zlib.crc32(text[i:i + 3].encode()) for i in range(len(text) - 2)}
+
+
+def signature(title, description=""):
+    """MinHash signature as NUM_PERM packed uint32 (stored in Task.minhash)."""
+    hashes = shingles(title, description)
+    if not hashes:
+        return b""
+    # the shift is monotonic, so it is applied once to the minimum
+    return _PACK.pack(*(
+        min((a * x + b) & _MASK for x in hashes) >> 32 for a, b in PERMUTATIONS
+    ))
+
+
+def band_keys(minhash):
+    """One bucket key per band: equal keys mean the band is identical."""
+    if not minhash:
+        return []
+    minhash = bytes(minhash)
+    width = ROWS * 4
+    return [
+        int.from_bytes(
+            hashlib.blake2b(minhash[band * width:(band + 1) * width], digest_size=8,
+                            salt=band.to_bytes(2, "little")).digest(),
+            "little",
+            signed=True,
+        )
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    if not a or not b:
+        return 0.0
+    return _similarity(_PACK.unpack(bytes(a)), _PACK.unpack(bytes(b)))
+
+
+def _similarity(a, b):
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def sign(tasks):
+    """Set `minhash` on unsaved / in-memory tasks from their title and description."""
+    for task in tasks:
+        task.minhash = signature(task.title, task.description)
+
+
+def refresh_buckets(tasks, new=False):
+    """
+    Replace the LSH buckets of `tasks` (already signed) with one DELETE
+    (skipped for `new` tasks) and one INSERT.
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return
+    if not new:
+        TaskLSHBucket.objects.filter(task_id__in=[task.pk for task in tasks]).delete()
+    TaskLSHBucket.objects.bulk_create(
+        [
+            TaskLSHBucket(task_id=task.pk, user_id=task.user_id, key=key)
+            for task in tasks
+            for key in band_keys(task.minhash)
+        ],
+        batch_size=5000,
+    )
+
+
+def refresh_duplicate_index(task_ids):
+    """Re-sign `task_ids` and rebuild their buckets (rebuild command / admin)."""
+    tasks = list(Task.objects.filter(pk__in=list(task_ids)).only("id", "user_id", "title", "description"))
+    sign(tasks)
+    Task.objects.bulk_update(tasks, ["minhash"], batch_size=1000)
+    refresh_buckets(tasks)
+
+
+def find_duplicates(user_id, minhash, threshold=DUPLICATE_THRESHOLD, exclude=None, limit=5):
+    """
+    The user's active tasks whose signature is at least `threshold` similar
+    to `minhash`, most similar first: [{"id", "title", "similarity"}, ...].
+    Only tasks sharing an LSH bucket are compared.
+    """
+    keys = band_keys(minhash)
+    if not keys:
+        return []
+
+    # tasks sharing the most bands are the most similar ones
+    candidates = (
+        TaskLSHBucket.objects
+        .filter(user_id=user_id, key__in=keys, task__is_active=True)
+        .exclude(task_id=exclude)
+        .values("task_id")
+        .annotate(shared=Count("id"))
+        .order_by("-shared")
+        .values_list("task_id", flat=True)[:MAX_CANDIDATES]
+    )
+    matches = []
+    for pk, title, other in Task.objects.filter(pk__in=list(candidates)).values_list("pk", "title", "minhash"):
+        score = similarity(minhash, other)
+        if score >= threshold:
+            matches.append({"id": pk, "title": title, "similarity": round(score, 3)})
+    matches.sort(key=lambda match: -match["similarity"])
+    return matches[:limit]
+
+
+def duplicate_groups(user_id, threshold=DUPLICATE_THRESHOLD):
+    """
+    Groups of near-duplicate active tasks for the user, largest first:
+    [[{"id", "title", "similarity"}, ...], ...] with the oldest task first
+    and similarities relative to it.
+
+    The bands are recomputed from Task.minhash in memory (one read of the
+    user's tasks instead of BANDS bucket rows each); only signatures sharing
+    a band are compared, each distinct signature once.
+    """
+    rows = {
+        pk: (title, bytes(minhash), created_at)
+        for pk, title, minhash, created_at in (
+            Task.objects
+            .filter(user_id=user_id, is_active=True)
+            .exclude(minhash=b"")
+            .order_by("created_at")
+            .values_list("pk", "title", "minhash", "created_at")
+        )
+    }
+
+    # identical signatures are duplicates without comparing anything
+    oldest = {}
+    for pk, (_, minhash, _) in rows.items():
+        oldest.setdefault(minhash, pk)
+    values = {minhash: _PACK.unpack(minhash) for minhash in oldest}
+
+    buckets = defaultdict(list)
+    for minhash in oldest:
+        for key in band_keys(minhash):
+            buckets[key].append(minhash)
+
+    parent = {}
+
+    def find(key):
+        while parent.get(key, key) != key:
+            parent[key] = parent.get(parent[key], parent[key])
+            key = parent[key]
+        return key
+
+    for members in buckets.values():
+        # compare against a representative instead of every pair
+        while len(members) > 1:
+            head, rest = members[0], []
+            for minhash in members[1:]:
+                if find(minhash) == find(head):
+                    continue
+                if _similarity(values[head], values[minhash]) >= threshold:
+                    parent[find(minhash)] = find(head)
+                else:
+                    rest.append(minhash)
+            members = rest
+
+    groups = defaultdict(list)
+    for pk, (_, minhash, _) in rows.items():
+        groups[find(minhash)].append(pk)
+
+    result = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        first = values[rows[members[0]][1]]
+        result.append([
+            {"id": pk, "title": rows[pk][0], "similarity": round(_similarity(first, values[rows[pk][1]]), 3)}
+            for pk in members
+        ])
+    result.sort(key=lambda group: (-len(group), group[0]["title"]))
+    return result
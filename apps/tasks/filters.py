@@ -1,5 +1,7 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 from .models import Task
+from .search import get_search_backend
 from django.utils import timezone
 
 
@@ -63,3 +65,22 @@ class TaskFilter(filters.FilterSet):
             return queryset.filter(due_date__gt=today)
 
         return queryset
+
+
+class TaskSearchBackend(BaseFilterBackend):
+    """
+    ?q= full-text search (ranked, prefix and typo tolerant), see apps.tasks.search.
+    Results are ordered by relevance unless ?ordering= is given.
+    """
+
+    search_param = "q"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+
+        queryset = get_search_backend().search(queryset, query)
+        if OrderingFilter.ordering_param not in request.query_params:
+            queryset = queryset.order_by("-search_rank", "-created_at")
+        return queryset
@@ -0,0 +1,278 @@
+import heapq
+import threading
+from collections import OrderedDict, defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.common.changelog import CacheChangeLog
+
+from .models import Task, TaskDependency
+
+# Only "blocks" dependencies take part in ordering; "related_to" is informational.
+BLOCKS = "blocks"
+DONE_STATUSES = ("completed", "cancelled")
+
+# Every worker keeps the adjacency of recently used users in memory and
+# replays the other workers' dependency writes from this log.
+changelog = CacheChangeLog("tasks:deps")
+MAX_CACHED_GRAPHS = 1000
+
+_graphs = OrderedDict()  # user_id -> (log seq, DependencyGraph), LRU order
+_lock = threading.Lock()
+
+
+class DependencyGraph:
+    """
+    One user's "blocks" dependencies: `depends_on[task]` are the tasks that
+    must finish before `task`, `dependents[task]` the reverse.
+    """
+
+    def __init__(self, edges=()):
+        self.depends_on = defaultdict(set)
+        self.dependents = defaultdict(set)
+        for task_id, depends_on_id in edges:
+            self.add(task_id, depends_on_id)
+
+    def add(self, task_id, depends_on_id):
+        self.depends_on[task_id].add(depends_on_id)
+        self.dependents[depends_on_id].add(task_id)
+
+    def remove(self, task_id, depends_on_id):
+        self.depends_on[task_id].discard(depends_on_id)
+        self.dependents[depends_on_id].discard(task_id)
+
+    def apply(self, change):
+        op, task_id, depends_on_id = change
+        getattr(self, op)(task_id, depends_on_id)
+
+    def upstream(self, task_id):
+        """Every task `task_id` transitively depends on."""
+        seen = set()
+        stack = list(self.depends_on.get(task_id, ()))
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                stack.extend(self.depends_on.get(node, ()))
+        return seen
+
+    def would_cycle(self, task_id, depends_on_id):
+        """
+        True if making `task_id` depend on `depends_on_id` closes a cycle,
+        i.e. `depends_on_id` already (transitively) depends on `task_id`.
+        Only the part of the graph upstream of `depends_on_id` is visited.
+        """
+        if task_id == depends_on_id:
+            return True
+        seen = {depends_on_id}
+        stack = [depends_on_id]
+        while stack:
+            for node in self.depends_on.get(stack.pop(), ()):
+                if node == task_id:
+                    return True
+                if node not in seen:
+                    seen.add(node)
+                    stack.append(node)
+        return False
+
+    def topological_order(self, nodes):
+        """
+        `nodes` (an ordered iterable of task ids) with every task after the
+        tasks it depends on; ties keep the order of `nodes`. Edges to tasks
+        outside `nodes` are ignored.
+        """
+        position = {node: i for i, node in enumerate(nodes)}
+        pending = {
+            node: sum(1 for dep in self.depends_on.get(node, ()) if dep in position)
+            for node in position
+        }
+        ready = [(position[node], node) for node, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+
+        order = []
+        while ready:
+            _, node = heapq.heappop(ready)
+            order.append(node)
+            for dependent in self.dependents.get(node, ()):
+                if dependent in pending:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        heapq.heappush(ready, (position[dependent], dependent))
+        return order
+
+    def blocked(self, open_tasks):
+        """Open tasks waiting on at least one other open task."""
+        return {
+            node for node in open_tasks
+            if any(dep in open_tasks for dep in self.depends_on.get(node, ()))
+        }
+
+    def critical_path(self, weights):
+        """
+        Heaviest dependency chain through the tasks in `weights`
+        ({task_id: hours}, in a stable order): (task ids first to last, hours).
+        """
+        total, previous = {}, {}
+        for node in self.topological_order(weights):
+            best = None
+            for dep in self.depends_on.get(node, ()):
+                if dep in total and (best is None or total[dep] > total[best]):
+                    best = dep
+            total[node] = weights[node] + (total[best] if best is not None else 0)
+            previous[node] = best
+
+        if not total:
+            return [], Decimal("0")
+        node = max(total, key=total.get)
+        hours = total[node]
+        path = []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return path[::-1], hours
+
+
+def load_graph(user_id):
+    edges = TaskDependency.objects.filter(
+        task__user_id=user_id, dependency_type=BLOCKS
+    ).values_list("task_id", "depends_on_id")
+    return DependencyGraph(edges)
+
+
+def get_graph(user_id):
+    """
+    The user's graph from this worker's memory, caught up with the change
+    log; rebuilt from the database when the log cannot be replayed. Without
+    a shared cache (settings.TASK_GRAPH_CACHE off) the log would only hold
+    this worker's writes, so the graph is always loaded from the database.
+    """
+    if not settings.TASK_GRAPH_CACHE:
+        return load_graph(user_id)
+
+    with _lock:
+        entry = _graphs.get(user_id)
+        if entry is not None:
+            seq, graph = entry
+            current, changes = changelog.since(user_id, seq)
+            if changes is not None:
+                for change in changes:
+                    graph.apply(change)
+                _graphs[user_id] = (current, graph)
+                _graphs.move_to_end(user_id)
+                return graph
+
+        # read the sequence first: writes landing during the load are replayed later
+        current = changelog.current(user_id)
+        graph = load_graph(user_id)
+        _graphs[user_id] = (current, graph)
+        _graphs.move_to_end(user_id)
+        while len(_graphs) > MAX_CACHED_GRAPHS:
+            _graphs.popitem(last=False)
+        return graph
+
+
+def record_change(user_id, op, task_id, depends_on_id):
+    """Publish a dependency write to every worker once it commits."""
+    transaction.on_commit(
+        lambda: changelog.append(user_id, (op, task_id, depends_on_id))
+    )
+
+
+def add_dependency(task, depends_on, dependency_type=BLOCKS):
+    """
+    Make `task` depend on `depends_on`, rejecting duplicates, cross-user
+    links and anything that would close a cycle.
+
+    The cycle check reads the committed edges from the database under the
+    user's row lock, not the in-memory graph: another worker's edge may not
+    have reached this worker's change log yet (it is published on commit).
+    """
+    if task.user_id != depends_on.user_id:
+        raise ValidationError("Tasks belong to different users")
+
+    with transaction.atomic():
+        # one dependency writer per user, so two inserts cannot close a cycle together
+        list(
+            get_user_model().objects
+            .select_for_update()
+            .filter(pk=task.user_id)
+            .values_list("pk", flat=True)
+        )
+        if TaskDependency.objects.filter(task=task, depends_on=depends_on).exists():
+            raise ValidationError("Dependency already exists")
+        if dependency_type == BLOCKS and would_cycle_sql(task.pk, depends_on.pk):
+            raise ValidationError("Dependency would create a cycle")
+        return TaskDependency.objects.create(
+            task=task, depends_on=depends_on, dependency_type=dependency_type
+        )
+
+
+def analyze(user_id):
+    """
+    Topological order of the user's active tasks, the blocked / startable
+    open tasks and the critical path of the remaining work, weighted by the
+    `estimated_hours` of each task's unfinished subtasks.
+    """
+    rows = (
+        Task.objects
+        .filter(user_id=user_id, is_active=True)
+        .annotate(hours=Coalesce(
+            Sum("subtasks__estimated_hours", filter=~Q(subtasks__status="completed")),
+            Value(Decimal("0")),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ))
+        .order_by("created_at", "pk")
+        .values_list("id", "status", "hours")
+    )
+    graph = get_graph(user_id)
+
+    nodes, weights = [], {}
+    for task_id, status, hours in rows:
+        nodes.append(task_id)
+        if status not in DONE_STATUSES:
+            weights[task_id] = hours
+
+    blocked = graph.blocked(weights.keys())
+    path, hours = graph.critical_path(weights)
+    return {
+        "order": graph.topological_order(nodes),
+        "blocked": [node for node in weights if node in blocked],
+        "unblocked": [node for node in weights if node not in blocked],
+        "critical_path": {"tasks": path, "hours": hours},
+    }
+
+
+# The cycle check of add_dependency (and bench_task_graph's reference).
+UPSTREAM_SQL = """
+WITH RECURSIVE upstream(id) AS (
+    SELECT depends_on_id FROM {table}
+    WHERE task_id = %s AND dependency_type = %s
+    UNION
+    SELECT d.depends_on_id FROM {table} d
+    JOIN upstream u ON d.task_id = u.id
+    WHERE d.dependency_type = %s
+)
+SELECT 1 FROM upstream WHERE id = %s LIMIT 1
+"""
+
+
+def would_cycle_sql(task_id, depends_on_id):
+    """`DependencyGraph.would_cycle` as one recursive-CTE query."""
+    if task_id == depends_on_id:
+        return True
+    pk = Task._meta.pk
+    sql = UPSTREAM_SQL.format(table=TaskDependency._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            pk.get_db_prep_value(depends_on_id, connection),
+            BLOCKS,
+            BLOCKS,
+            pk.get_db_prep_value(task_id, connection),
+        ])
+        return cursor.fetchone() is not None
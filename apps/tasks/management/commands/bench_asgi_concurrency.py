@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.common.benchmarks import summarize, write_report
+from apps.tasks.models import SubTask
+from apps.tasks.seed import get_bench_user, seed_tasks
+
+PROFILES = ("wsgi", "asgi")
+
+# gunicorn config for the run: the repo's, plus a sleep before every query
+# standing in for a database across the network
+CONFIG = """
+exec(open({config!r}).read())
+
+
+def post_worker_init(worker):
+    import time
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep({latency})
+        return execute(sql, params, many, context)
+
+    def add_delay(sender, connection, **kwargs):
+        # the wrapper object outlives its connections
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    connection_created.connect(add_delay, weak=False)
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Hot read paths (task list / retrieve, subtask list, auth/me) at 10-500 concurrent "
+        "clients against gunicorn in the WSGI (gthread) and ASGI (uvicorn) profiles"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", default="10,50,100,250,500", help="comma separated concurrency levels")
+        parser.add_argument("--seconds", type=float, default=10, help="per concurrency level")
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--tasks", type=int, default=2000)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--profiles", default=",".join(PROFILES))
+        parser.add_argument(
+            "--response-cache", action="store_true",
+            help="keep TASK_RESPONSE_CACHE on (off by default, so every read reaches the database)",
+        )
+        parser.add_argument(
+            "--query-latency-ms", type=float, default=0,
+            help="added to every query, e.g. the round trip to a networked database",
+        )
+        parser.add_argument("--output", default="bench_asgi_concurrency.json")
+
+    def handle(self, *args, **options):
+        levels = [int(value) for value in options["clients"].split(",")]
+        profiles = options["profiles"].split(",")
+        if set(profiles) - set(PROFILES):
+            raise CommandError(f"--profiles: choose from {', '.join(PROFILES)}")
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        user = get_bench_user("asgi")
+        if not user.tasks.exists():
+            seed_tasks(user, options["tasks"])
+            tasks = list(user.tasks.filter(is_active=True)[:200])
+            SubTask.objects.bulk_create(
+                SubTask(parent_task=task, title=f"step {index}", order_index=index * 1000)
+                for task in tasks for index in range(3)
+            )
+        token = str(AccessToken.for_user(user))
+        task_ids = list(user.tasks.filter(is_active=True).values_list("pk", flat=True)[:100])
+        paths = ["/api/tasks/", "/api/tasks/?page=2", "/api/subtasks/", "/api/auth/me/"]
+        paths += [f"/api/tasks/{pk}/" for pk in task_ids[:len(paths)]]
+
+        report = {
+            "seconds": options["seconds"],
+            "workers": options["workers"],
+            "response_cache": options["response_cache"],
+            "query_latency_ms": options["query_latency_ms"],
+            "paths": paths,
+        }
+        for profile in profiles:
+            report[profile] = []
+            with self.server(profile, options) as base_url:
+                for clients in levels:
+                    result = asyncio.run(self.load(base_url, token, paths, clients, options["seconds"]))
+                    report[profile].append(result)
+                    self.stdout.write(
+                        f"{profile:<5} clients={clients:<4} {result['throughput_rps']:>7} req/s  "
+                        f"p50={result['p50_ms']}ms  p99={result['p99_ms']}ms  errors={result['errors']}"
+                    )
+
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
+
+    @contextmanager
+    def server(self, profile, options):
+        """gunicorn with this repo's gunicorn.conf.py in `profile`, on the current settings."""
+        env = dict(
+            os.environ,
+            GUNICORN_PROFILE=profile,
+            DJANGO_SETTINGS_MODULE=os.environ["DJANGO_SETTINGS_MODULE"],
+            TASK_RESPONSE_CACHE=str(options["response_cache"]),
+        )
+        base_url = f"http://127.0.0.1:{options['port']}"
+        with tempfile.NamedTemporaryFile("w", suffix=".py") as config, tempfile.TemporaryFile() as log:
+            config.write(CONFIG.format(
+                config=str(settings.BASE_DIR / "gunicorn.conf.py"),
+                latency=options["query_latency_ms"] / 1000,
+            ))
+            config.flush()
+            command = [
+                sys.executable, "-m", "gunicorn",
+                "--config", config.name,
+                "--bind", f"127.0.0.1:{options['port']}",
+                "--workers", str(options["workers"]),
+                "--max-requests", "0",  # no worker recycling mid-run
+            ]
+            process = subprocess.Popen(
+                command, cwd=settings.BASE_DIR, env=env, stdout=log, stderr=log, start_new_session=True
+            )
+            try:
+                self.wait_ready(base_url, process, log)
+                yield base_url
+            finally:
+                process.send_signal(signal.SIGQUIT)  # quick shutdown, no graceful wait
+                try:
+                    process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    os.killpg(process.pid, signal.SIGKILL)  # the workers too
+                    process.wait()
+
+    def wait_ready(self, base_url, process, log, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                log.seek(0)
+                raise CommandError(f"gunicorn exited:\n{log.read().decode(errors='replace')}")
+            try:
+                httpx.get(f"{base_url}/api/auth/me/", timeout=1)
+                return
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        raise CommandError(f"gunicorn did not answer on {base_url} within {timeout}s")
+
+    async def load(self, base_url, token, paths, clients, seconds):
+        """`clients` closed-loop clients, each cycling through `paths`, for `seconds`."""
+        latencies, errors = [], 0
+        limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+        async with httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {token}"},
+            limits=limits,
+            timeout=60,
+        ) as client:
+            deadline = time.perf_counter() + seconds
+
+            async def run(offset):
+                nonlocal errors
+                index = offset
+                while time.perf_counter() < deadline:
+                    path = paths[index % len(paths)]
+                    index += 1
+                    start = time.perf_counter()
+                    try:
+                        response = await client.get(path)
+                    except httpx.HTTPError:
+                        errors += 1
+                        continue
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(run(offset) for offset in range(clients)))
+            elapsed = time.perf_counter() - start
+
+        return dict(
+            summarize(latencies),
+            clients=clients,
+            errors=errors,
+            throughput_rps=round(len(latencies) / elapsed, 1),
+        )
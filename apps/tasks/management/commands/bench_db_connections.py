@@ -0,0 +1,107 @@
+import copy
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.common.benchmarks import summarize, write_report
+from apps.common.db_pool import MODES, connection_mode
+from apps.common.db_pool.base import close_pools
+from apps.tasks.models import SubTask, Task
+from apps.tasks.seed import get_bench_user, seed_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        "p50/p99 of a task list request's queries, connection handling included, with a "
+        "new connection per request (direct) and with the pooled backend (pool), on the "
+        "default (PostgreSQL) database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4, help="request threads, as in a gthread worker")
+        parser.add_argument("--requests", type=int, default=500, help="per thread")
+        parser.add_argument("--pool-size", type=int, default=4)
+        parser.add_argument("--tasks", type=int, default=1000)
+        parser.add_argument("--modes", default="direct,pool")
+        parser.add_argument("--output", default="bench_db_connections.json")
+
+    def handle(self, *args, **options):
+        default = connections["default"]
+        if default.vendor != "postgresql":
+            raise CommandError("needs a PostgreSQL default database (e.g. a local one, migrated)")
+        modes = options["modes"].split(",")
+        if set(modes) - set(MODES):
+            raise CommandError(f"--modes: choose from {', '.join(MODES)}")
+
+        user = get_bench_user("db")
+        if not user.tasks.exists():
+            seed_tasks(user, options["tasks"])
+            SubTask.objects.bulk_create(
+                SubTask(parent_task=task, title=f"step {index}", order_index=index * 1000)
+                for task in user.tasks.all()[:200] for index in range(3)
+            )
+        default.close()
+
+        report = {
+            "host": default.settings_dict["HOST"],
+            "sslmode": default.settings_dict["OPTIONS"].get("sslmode"),
+            "threads": options["threads"],
+            "requests_per_thread": options["requests"],
+            "runs": {},
+        }
+        for mode in modes:
+            alias = f"bench_{mode}"
+            pool = {"min_size": options["pool_size"], "max_size": options["pool_size"]}
+            connections.settings[alias] = connection_mode(copy.deepcopy(default.settings_dict), mode, pool=pool)
+            result = self.run(alias, user.pk, options["threads"], options["requests"])
+            report["runs"][mode] = result
+            self.stdout.write(
+                f"{mode:<9} {result['throughput_rps']:>7} req/s  p50={result['p50_ms']}ms  "
+                f"p99={result['p99_ms']}ms  connections opened={result['connections_opened']}"
+            )
+            close_pools()
+
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
+
+    def run(self, alias, user_id, threads, requests):
+        latencies, lock = [], threading.Lock()
+
+        def request():
+            # the task list's queries: count, page, the page's subtasks
+            tasks = Task.objects.using(alias).filter(user_id=user_id, is_active=True)
+            tasks.count()
+            page = list(tasks.order_by("-created_at").values_list("pk", flat=True)[:20])
+            list(SubTask.objects.using(alias).filter(parent_task_id__in=page))
+
+        def worker():
+            connection = connections[alias]
+            request()  # warm up (and fill the pool)
+            connection.close()
+            samples = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                request()
+                # what request_finished does (close_old_connections)
+                connection.close_if_unusable_or_obsolete()
+                samples.append((time.perf_counter() - start) * 1000)
+            with lock:
+                latencies.extend(samples)
+
+        start = time.perf_counter()
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        pool = getattr(connections[alias], "pool", None)
+        return dict(
+            summarize(latencies),
+            throughput_rps=round(len(latencies) / elapsed, 1),
+            # server connections opened, warm-up included
+            connections_opened=pool.get_stats()["connections_num"] if pool else threads * (requests + 1),
+        )
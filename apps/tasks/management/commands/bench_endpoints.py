@@ -0,0 +1,360 @@
+import json
+import logging
+import random
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.common.benchmarks import summarize, write_report
+from apps.tasks import urls as task_urls
+from apps.tasks.models import SubTask, Task, TaskDependency
+from apps.tasks.seed import get_bench_user, parse_scale, seed_dataset
+from apps.users import google
+from apps.users import urls as user_urls
+from apps.users.tokens import RefreshToken
+
+PASSWORD = "bench-Passw0rd"
+GOOGLE_CLIENT_ID = "bench-client.apps.googleusercontent.com"
+THRESHOLDS = settings.BASE_DIR / "apps" / "tasks" / "bench_thresholds.json"
+
+# `request(fixtures)` -> (path, JSON body or None), run untimed before each call
+Scenario = namedtuple("Scenario", "route method variant request")
+
+
+class Fixtures:
+    """The scale's user, ids the scenarios pick from, and fresh rows for destructive writes."""
+
+    def __init__(self, user, seed=0):
+        self.user = user
+        self.rng = random.Random(seed)
+        tasks = Task.objects.filter(user=user, is_active=True).order_by("pk")
+        self.task_ids = [str(pk) for pk in tasks.values_list("pk", flat=True)[:500]]
+        self.parent_ids = [
+            str(pk) for pk in tasks.filter(subtasks__isnull=False).values_list("pk", flat=True).distinct()[:200]
+        ]
+        self.subtask_ids = [
+            str(pk) for pk in SubTask.objects.filter(parent_task_id__in=self.parent_ids).values_list("pk", flat=True)
+        ]
+        self.dependent_ids = [
+            str(pk) for pk in TaskDependency.objects.filter(task__user=user, task__is_active=True)
+            .values_list("task_id", flat=True).distinct()[:200]
+        ]
+        if not (self.task_ids and self.parent_ids and self.dependent_ids):
+            raise CommandError(f"{user.email} needs tasks with subtasks and dependencies (seed_bench_data)")
+
+        self.google_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def task(self):
+        return self.rng.choice(self.task_ids)
+
+    def new_task(self):
+        task = Task.objects.create(user=self.user, title=f"bench scratch {uuid.uuid4().hex[:8]}")
+        return str(task.pk)
+
+    def new_subtask(self):
+        subtask = SubTask.objects.create(parent_task_id=self.rng.choice(self.parent_ids), title="bench scratch")
+        return str(subtask.pk)
+
+    def siblings(self):
+        parent_id = self.rng.choice(self.parent_ids)
+        return [str(pk) for pk in SubTask.objects.filter(parent_task_id=parent_id).values_list("pk", flat=True)]
+
+    def new_dependency(self):
+        task_id = self.new_task()
+        depends_on = self.task()
+        TaskDependency.objects.create(task_id=task_id, depends_on_id=depends_on)
+        return task_id, depends_on
+
+    def refresh_token(self):
+        return str(RefreshToken.for_user(self.user))
+
+    def google_jwks(self):
+        key = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self.google_key.public_key()))
+        return {"keys": [dict(key, kid="bench", alg="RS256")]}, 3600
+
+    def google_token(self):
+        now = int(time.time())
+        claims = {
+            "iss": "https://accounts.google.com",
+            "aud": GOOGLE_CLIENT_ID,
+            "sub": f"bench-{self.user.pk}",
+            "email": self.user.email,
+            "email_verified": True,
+            "iat": now,
+            "exp": now + 3600,
+        }
+        return jwt.encode(claims, self.google_key, algorithm="RS256", headers={"kid": "bench"})
+
+
+def _task_body():
+    return {"title": "bench review report", "priority": "high", "status": "pending",
+            "due_date": "2030-01-01", "tags": ["work", "urgent"]}
+
+
+SCENARIOS = [
+    Scenario("api-root", "GET", "", lambda f: (reverse("api-root"), None)),
+    Scenario("task-list", "GET", "", lambda f: (reverse("task-list"), None)),
+    Scenario("task-list", "GET", "page 5", lambda f: (reverse("task-list") + "?page=5", None)),
+    Scenario("task-list", "GET", "cursor", lambda f: (reverse("task-list") + "?pagination=cursor", None)),
+    Scenario("task-list", "GET", "filtered", lambda f: (reverse("task-list") + "?status=pending&priority=high", None)),
+    Scenario("task-list", "GET", "search", lambda f: (reverse("task-list") + "?q=review", None)),
+    Scenario("task-list", "POST", "", lambda f: (reverse("task-list"), dict(
+        _task_body(), subtasks=[{"title": "first step"}, {"title": "second step"}]
+    ))),
+    Scenario("task-bulk", "POST", "", lambda f: (reverse("task-bulk"), {
+        "create": [dict(_task_body(), title=f"bench bulk {index}") for index in range(5)],
+        "update": [{"id": f.task(), "priority": "low"}],
+        "delete": [f.new_task()],
+    })),
+    Scenario("task-graph", "GET", "", lambda f: (reverse("task-graph"), None)),
+    Scenario("task-duplicates", "GET", "", lambda f: (reverse("task-duplicates"), None)),
+    Scenario("task-detail", "GET", "", lambda f: (reverse("task-detail", args=[f.task()]), None)),
+    Scenario("task-detail", "PUT", "", lambda f: (reverse("task-detail", args=[f.task()]), _task_body())),
+    Scenario("task-detail", "PATCH", "", lambda f: (reverse("task-detail", args=[f.task()]), {"priority": "low"})),
+    Scenario("task-detail", "DELETE", "", lambda f: (reverse("task-detail", args=[f.new_task()]), None)),
+    Scenario("task-complete", "POST", "", lambda f: (reverse("task-complete", args=[f.task()]), None)),
+    Scenario("task-dependencies", "GET", "", lambda f: (
+        reverse("task-dependencies", args=[f.rng.choice(f.dependent_ids)]), None
+    )),
+    Scenario("task-dependencies", "POST", "", lambda f: (
+        reverse("task-dependencies", args=[f.new_task()]), {"depends_on": f.task()}
+    )),
+    Scenario("task-remove-dependency", "DELETE", "", lambda f: (
+        reverse("task-remove-dependency", args=f.new_dependency()), None
+    )),
+    Scenario("task-subtasks", "GET", "", lambda f: (reverse("task-subtasks", args=[f.rng.choice(f.parent_ids)]), None)),
+    Scenario("task-subtasks", "POST", "", lambda f: (reverse("task-subtasks", args=[f.task()]), {"title": "next step"})),
+    Scenario("subtasks-list", "GET", "", lambda f: (reverse("subtasks-list"), None)),
+    Scenario("subtasks-list", "POST", "", lambda f: (reverse("subtasks-list"), {"task_id": f.task(), "title": "next step"})),
+    Scenario("subtasks-detail", "GET", "", lambda f: (reverse("subtasks-detail", args=[f.rng.choice(f.subtask_ids)]), None)),
+    Scenario("subtasks-detail", "PUT", "", lambda f: (
+        reverse("subtasks-detail", args=[f.rng.choice(f.subtask_ids)]), {"title": "renamed step", "status": "pending"}
+    )),
+    Scenario("subtasks-detail", "PATCH", "", lambda f: (
+        reverse("subtasks-detail", args=[f.rng.choice(f.subtask_ids)]), {"status": "completed"}
+    )),
+    Scenario("subtasks-detail", "DELETE", "", lambda f: (reverse("subtasks-detail", args=[f.new_subtask()]), None)),
+    Scenario("subtasks-reorder", "POST", "", lambda f: (reverse("subtasks-reorder"), [
+        {"id": pk, "order_index": index} for index, pk in enumerate(reversed(f.siblings()))
+    ])),
+    Scenario("subtasks-move", "POST", "", lambda f: (
+        lambda ids: (reverse("subtasks-move", args=[ids[0]]), {"after": ids[-1] if len(ids) > 1 else None})
+    )(f.siblings())),
+    Scenario("register", "POST", "", lambda f: (lambda name: (reverse("register"), {
+        "email": f"{name}@taskmaster.local", "username": name, "password": PASSWORD, "password2": PASSWORD,
+    }))(f"bench-{uuid.uuid4().hex[:12]}")),
+    Scenario("login", "POST", "", lambda f: (reverse("login"), {"email": f.user.email, "password": PASSWORD})),
+    Scenario("me", "GET", "", lambda f: (reverse("me"), None)),
+    Scenario("logout", "POST", "", lambda f: (reverse("logout"), {"refresh": f.refresh_token()})),
+    Scenario("token_refresh", "POST", "", lambda f: (reverse("token_refresh"), {"refresh": f.refresh_token()})),
+    Scenario("google_login", "POST", "", lambda f: (reverse("google_login"), {"access_token": f.google_token()})),
+]
+
+
+def label(scenario):
+    return " ".join(part for part in (scenario.method, scenario.route, scenario.variant) if part)
+
+
+def routes(patterns):
+    """{(url name, method)} of `patterns`, methods from viewset actions / APIView handlers."""
+    found = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            found |= routes(pattern.url_patterns)
+            continue
+        callback = pattern.callback
+        if getattr(callback, "actions", None):
+            methods = callback.actions
+        elif hasattr(callback, "view_class"):
+            methods = [m for m in callback.view_class.http_method_names if m != "options" and hasattr(callback.view_class, m)]
+        else:
+            methods = [None]  # plain (async) view: any scenario for the name covers it
+        found |= {(pattern.name, method.upper() if method else None) for method in methods if method != "head"}
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        "Every route of apps.tasks.urls and apps.users.urls, in process, against seeded datasets "
+        "(seed_bench_data): throughput, p50/p95/p99 latency and queries per route, as JSON. "
+        "Fails when a route errors or breaks a threshold / regresses against a baseline report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scales", default="1k", help="comma separated, e.g. 1k,100k (seeded if missing)")
+        parser.add_argument("--repeat", type=int, default=30, help="timed calls per route")
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--route-seconds", type=float, default=10, help="stop a route's timed runs (after 3) past this")
+        parser.add_argument("--routes", default="", help="only scenarios whose label contains one of these (comma separated)")
+        parser.add_argument("--exclude", default="", help="skip scenarios whose label contains one of these")
+        parser.add_argument(
+            "--response-cache", action="store_true",
+            help="keep TASK_RESPONSE_CACHE on (off by default, so every read reaches the database)",
+        )
+        parser.add_argument(
+            "--thresholds", default=str(THRESHOLDS),
+            help='JSON {"<label>" or "*": {"<metric>": limit}}: maximums, minimums for *_rps ("" for none)',
+        )
+        parser.add_argument("--baseline", help="an earlier report to compare p95 and query counts with")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 / throughput regression vs --baseline")
+        parser.add_argument("--output", default="bench_endpoints.json")
+
+    def handle(self, *args, **options):
+        missing = (routes(task_urls.urlpatterns) | routes(user_urls.urlpatterns)) - {
+            key for scenario in SCENARIOS for key in ((scenario.route, scenario.method), (scenario.route, None))
+        }
+        if missing:
+            raise CommandError(f"routes without a scenario: {', '.join(sorted(f'{m} {n}' for n, m in missing))}")
+        try:
+            scales = {name: parse_scale(name) for name in options["scales"].split(",")}
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        def matches(scenario, parts):
+            return any(part in label(scenario) for part in parts.split(",") if part)
+
+        selected = [
+            scenario for scenario in SCENARIOS
+            if (not options["routes"] or matches(scenario, options["routes"])) and not matches(scenario, options["exclude"])
+        ]
+        report = {
+            "vendor": connection.vendor,
+            "response_cache": options["response_cache"],
+            "async_read_views": settings.ASYNC_READ_VIEWS,
+            "repeat": options["repeat"],
+            "scales": {},
+        }
+        for name, size in scales.items():
+            user = get_bench_user(f"scale-{name}")
+            if not user.tasks.exists():
+                self.stdout.write(f"{name}: seeding {size} tasks")
+                seed_dataset(user, size)
+            user.set_password(PASSWORD)
+            user.save(update_fields=["password"])
+
+            fixtures = Fixtures(user)
+            results = {}
+            with self.environment(fixtures, options):
+                client = Client(headers={"Authorization": f"Bearer {AccessToken.for_user(user)}"})
+                for scenario in selected:
+                    results[label(scenario)] = result = self.measure(client, fixtures, scenario, options)
+                    self.stdout.write(
+                        f"{name:>5} {label(scenario):<34} {result['throughput_rps']:>8} req/s  "
+                        f"p50={result['p50_ms']}ms  p95={result['p95_ms']}ms  p99={result['p99_ms']}ms  "
+                        f"queries={result['queries']}" + (f"  errors={result['errors']}" if result["errors"] else "")
+                    )
+            report["scales"][name] = {"tasks": user.tasks.filter(is_active=True).count(), "routes": results}
+
+        report["breaches"] = self.breaches(report, options)
+        write_report(options["output"], report)
+        for breach in report["breaches"]:
+            self.stderr.write(breach)
+        if report["breaches"]:
+            raise CommandError(f"{len(report['breaches'])} threshold breaches, report written to {options['output']}")
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
+
+    @contextmanager
+    def environment(self, fixtures, options):
+        """
+        Settings for the run, Google's certs endpoint served from a local key,
+        and no tracebacks logged for 500s (they are counted as errors).
+        """
+        saved = google._key_set
+        google._key_set = google.GoogleKeySet(fetch=fixtures.google_jwks)
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            with override_settings(
+                TASK_RESPONSE_CACHE=options["response_cache"],
+                GOOGLE_CLIENT_IDS=[GOOGLE_CLIENT_ID],
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ):
+                yield
+        finally:
+            google._key_set = saved
+            request_logger.setLevel(level)
+
+    def measure(self, client, fixtures, scenario, options):
+        call = getattr(client, scenario.method.lower())
+        latencies, queries, errors, failure = [], [], 0, None
+        deadline = time.perf_counter() + options["route_seconds"]
+
+        for run in range(options["warmup"] + options["repeat"]):
+            if run >= options["warmup"] + 3 and time.perf_counter() > deadline:
+                break
+            path, body = scenario.request(fixtures)
+            kwargs = {} if body is None else {"data": json.dumps(body), "content_type": "application/json"}
+            connection.queries_log.clear()  # a full log (9000 queries) would make every count 0
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                try:
+                    response = call(path, **kwargs)
+                except Exception as exc:  # the view raised: a 500
+                    errors += 1
+                    failure = failure or f"500 {exc!r}"
+                    continue
+                elapsed = (time.perf_counter() - start) * 1000
+            if response.status_code >= 400:
+                errors += 1
+                failure = failure or f"{response.status_code} {response.content[:200].decode(errors='replace')}"
+            if run < options["warmup"]:
+                continue
+            latencies.append(elapsed)
+            queries.append(len(captured))
+
+        queries.sort()
+        result = dict(
+            summarize(latencies),
+            throughput_rps=round(len(latencies) / (sum(latencies) / 1000), 1) if latencies else 0.0,
+            queries=queries[len(queries) // 2] if queries else 0,
+            queries_max=max(queries, default=0),
+            errors=errors,
+        )
+        if failure:
+            result["first_error"] = failure
+        return result
+
+    def breaches(self, report, options):
+        thresholds = {}
+        if options["thresholds"]:
+            with open(options["thresholds"]) as fh:
+                thresholds = json.load(fh)
+        baseline = {}
+        if options["baseline"]:
+            with open(options["baseline"]) as fh:
+                baseline = json.load(fh)["scales"]
+
+        breaches = []
+        for scale, data in report["scales"].items():
+            for name, result in data["routes"].items():
+                where = f"{scale} {name}"
+                if result["errors"]:
+                    breaches.append(f"{where}: {result['errors']} errors ({result['first_error']})")
+                limits = dict(thresholds.get("*", {}), **thresholds.get(name, {}))
+                for metric, limit in limits.items():
+                    value = result[metric]
+                    if value < limit if metric.endswith("_rps") else value > limit:
+                        breaches.append(f"{where}: {metric} {value} (limit {limit})")
+
+                before = baseline.get(scale, {}).get("routes", {}).get(name)
+                if before is None:
+                    continue
+                if result["p95_ms"] > before["p95_ms"] * (1 + options["tolerance"]):
+                    breaches.append(f"{where}: p95 {result['p95_ms']}ms (baseline {before['p95_ms']}ms)")
+                if result["throughput_rps"] < before["throughput_rps"] * (1 - options["tolerance"]):
+                    breaches.append(f"{where}: {result['throughput_rps']} req/s (baseline {before['throughput_rps']})")
+                if result["queries"] > before["queries"]:
+                    breaches.append(f"{where}: {result['queries']} queries (baseline {before['queries']})")
+        return breaches
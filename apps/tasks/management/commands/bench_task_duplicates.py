@@ -0,0 +1,88 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.common.benchmarks import time_call, write_report
+from apps.tasks.duplicates import (
+    DUPLICATE_THRESHOLD, duplicate_groups, find_duplicates, refresh_duplicate_index, signature, similarity,
+)
+from apps.tasks.models import Task, TaskLSHBucket
+from apps.tasks.seed import get_bench_user, seed_tasks
+
+
+class Command(BaseCommand):
+    help = "Near-duplicate lookup through the LSH buckets vs comparing against every task"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=100_000)
+        parser.add_argument("--probes", type=int, default=20, help="near-duplicate titles to look up")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", default="bench_task_duplicates.json")
+        parser.add_argument("--keep", action="store_true", help="keep the seeded user")
+
+    def handle(self, *args, **options):
+        user = get_bench_user(f"duplicates-{options['tasks']}")
+        existing = Task.objects.filter(user=user).count()
+        if existing < options["tasks"]:
+            self.stdout.write(f"seeding {options['tasks'] - existing} tasks for {user.email}")
+            seed_tasks(user, options["tasks"] - existing)
+
+        ids = list(Task.objects.filter(user=user).order_by("pk").values_list("pk", flat=True))
+        start = time.perf_counter()
+        if not TaskLSHBucket.objects.filter(user=user).exists():
+            for i in range(0, len(ids), 2000):
+                refresh_duplicate_index(ids[i:i + 2000])
+        index_seconds = time.perf_counter() - start
+
+        # existing tasks with a small edit, as a user re-typing them would
+        rng = random.Random(0)
+        probes = [
+            signature(f"{title}s", description)
+            for title, description in Task.objects.filter(
+                pk__in=rng.sample(ids, min(options["probes"], len(ids)))
+            ).values_list("title", "description")
+        ]
+        active = Task.objects.filter(user=user, is_active=True)
+
+        # best match per probe, as the create-time check uses it
+        def lsh():
+            return [
+                max((match["similarity"] for match in find_duplicates(user.pk, probe)), default=0.0)
+                for probe in probes
+            ]
+
+        def linear():
+            rows = list(active.values_list("minhash", flat=True))
+            return [
+                max((score for score in (round(similarity(probe, other), 3) for other in rows)
+                     if score >= DUPLICATE_THRESHOLD), default=0.0)
+                for probe in probes
+            ]
+
+        found, expected = lsh(), linear()
+        recall = sum(a == b for a, b in zip(found, expected)) / max(1, len(probes))
+        repeat = options["repeat"]
+        report = {
+            "vendor": connection.vendor,
+            "tasks": len(ids),
+            "buckets": TaskLSHBucket.objects.filter(user=user).count(),
+            "index_seconds": round(index_seconds, 2),
+            "probes": len(probes),
+            # probes whose best match is the one a full scan finds
+            "recall": round(recall, 4),
+            "signature": time_call(lambda: signature("Prepare the quarterly budget review"), repeat=100),
+            "find_duplicates_lsh": time_call(lsh, repeat=repeat),
+            "find_duplicates_linear": time_call(linear, repeat=min(repeat, 3), warmup=0),
+            "duplicate_groups": time_call(lambda: duplicate_groups(user.pk), repeat=repeat, warmup=0),
+        }
+        self.stdout.write(f"index built in {report['index_seconds']}s, best match agrees with a full scan for {report['recall']:.0%} of probes")
+        for name in ("signature", "find_duplicates_lsh", "find_duplicates_linear", "duplicate_groups"):
+            self.stdout.write(f"{name:<24} p50={report[name]['p50_ms']}ms p95={report[name]['p95_ms']}ms")
+
+        if not options["keep"]:
+            user.delete()
+
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
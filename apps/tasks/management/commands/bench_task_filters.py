@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from apps.common.benchmarks import time_call, write_report
+from apps.tasks.filters import TaskFilter
+from apps.tasks.models import Task
+from apps.tasks.seed import get_bench_user, seed_tasks
+
+
+class Command(BaseCommand):
+    help = "Record EXPLAIN plans and latency of the task list filters with and without the Task indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 1_000_000])
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--output", default="bench_task_filters.json")
+        parser.add_argument("--keep", action="store_true", help="keep the seeded users")
+
+    def handle(self, *args, **options):
+        report = {"vendor": connection.vendor, "runs": []}
+
+        for size in options["sizes"]:
+            user = get_bench_user(f"filters-{size}")
+            existing = Task.objects.filter(user=user).count()
+            if existing < size:
+                self.stdout.write(f"seeding {size - existing} tasks for {user.email}")
+                seed_tasks(user, size - existing)
+            self._analyze()
+
+            before = self._measure_without_indexes(user, options["repeat"])
+            after = self._measure(user, options["repeat"])
+            report["runs"].append({"tasks": size, "before": before, "after": after})
+
+            for name in after:
+                self.stdout.write(
+                    f"{size:>9} {name:<14} "
+                    f"before p50={before[name]['latency']['p50_ms']}ms "
+                    f"after p50={after[name]['latency']['p50_ms']}ms"
+                )
+
+            if not options["keep"]:
+                user.delete()
+
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
+
+    def _cases(self):
+        today = timezone.localdate()
+        return {
+            "default": {},
+            "status__in": {"status__in": "pending,in_progress"},
+            "priority__in": {"priority__in": "high,medium"},
+            "due_range": {
+                "due_date__gte": str(today - timedelta(days=7)),
+                "due_date__lte": str(today + timedelta(days=7)),
+            },
+            "overdue": {"timeline": "overdue"},
+        }
+
+    def _measure(self, user, repeat):
+        page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+        results = {}
+
+        for name, params in self._cases().items():
+            # same base queryset as TaskViewSet.get_queryset
+            base = Task.objects.filter(user=user, is_active=True)
+            qs = TaskFilter(params, queryset=base).qs.order_by("-created_at")
+
+            def run():
+                qs.count()
+                list(qs[:page_size])
+
+            results[name] = {
+                "params": params,
+                "explain": qs[:page_size].explain(),
+                "latency": time_call(run, repeat=repeat),
+            }
+
+        return results
+
+    def _measure_without_indexes(self, user, repeat):
+        # drop the Meta indexes for the "before" numbers and always put them back
+        with connection.schema_editor() as editor:
+            for index in Task._meta.indexes:
+                editor.remove_index(Task, index)
+        try:
+            self._analyze()
+            return self._measure(user, repeat)
+        finally:
+            with connection.schema_editor() as editor:
+                for index in Task._meta.indexes:
+                    editor.add_index(Task, index)
+            self._analyze()
+
+    def _analyze(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Task._meta.db_table}")
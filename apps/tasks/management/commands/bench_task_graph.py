@@ -0,0 +1,65 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.common.benchmarks import time_call, write_report
+from apps.tasks.graph import get_graph, load_graph, would_cycle_sql
+from apps.tasks.models import Task, TaskDependency
+from apps.tasks.seed import get_bench_user, seed_dependencies, seed_tasks
+
+
+class Command(BaseCommand):
+    help = "Compare in-memory and recursive-CTE cycle checks on a seeded dependency graph"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=10_000)
+        parser.add_argument("--dependencies", type=int, default=20_000)
+        parser.add_argument("--pairs", type=int, default=50, help="random (task, depends_on) pairs to check")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", default="bench_task_graph.json")
+        parser.add_argument("--keep", action="store_true", help="keep the seeded user")
+
+    def handle(self, *args, **options):
+        user = get_bench_user(f"graph-{options['tasks']}")
+        existing = Task.objects.filter(user=user).count()
+        if existing < options["tasks"]:
+            self.stdout.write(f"seeding {options['tasks'] - existing} tasks for {user.email}")
+            seed_tasks(user, options["tasks"] - existing)
+        if not TaskDependency.objects.filter(task__user=user).exists():
+            seeded = seed_dependencies(user, options["dependencies"])
+            self.stdout.write(f"seeding {seeded} dependencies")
+
+        rng = random.Random(0)
+        ids = list(Task.objects.filter(user=user).values_list("pk", flat=True))
+        pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(options["pairs"])]
+        graph = get_graph(user.pk)
+
+        def memory():
+            return [graph.would_cycle(a, b) for a, b in pairs]
+
+        def cte():
+            return [would_cycle_sql(a, b) for a, b in pairs]
+
+        mismatches = sum(x != y for x, y in zip(memory(), cte()))
+        report = {
+            "vendor": connection.vendor,
+            "tasks": len(ids),
+            "dependencies": TaskDependency.objects.filter(task__user=user).count(),
+            "pairs": len(pairs),
+            "mismatches": mismatches,
+            "load_graph": time_call(lambda: load_graph(user.pk), repeat=options["repeat"]),
+            "get_graph": time_call(lambda: get_graph(user.pk), repeat=options["repeat"]),
+            "would_cycle_memory": time_call(memory, repeat=options["repeat"]),
+            "would_cycle_cte": time_call(cte, repeat=options["repeat"]),
+        }
+        for name in ("load_graph", "get_graph", "would_cycle_memory", "would_cycle_cte"):
+            self.stdout.write(f"{name:<20} p50={report[name]['p50_ms']}ms p95={report[name]['p95_ms']}ms")
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"{mismatches} pairs disagree"))
+
+        if not options["keep"]:
+            user.delete()
+
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
@@ -0,0 +1,55 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from apps.common.benchmarks import time_call, write_report
+from apps.tasks.models import Task
+from apps.tasks.seed import get_bench_user, seed_tasks
+
+
+class Command(BaseCommand):
+    help = "Compare ?search= (SearchFilter icontains) with ?q= (full-text search) on the task list"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--terms", nargs="+", default=["report", "rev", "deplyo", "sprint demo"])
+        parser.add_argument("--output", default="bench_task_search.json")
+        parser.add_argument("--keep", action="store_true", help="keep the seeded user")
+
+    def handle(self, *args, **options):
+        user = get_bench_user(f"search-{options['tasks']}")
+        existing = Task.objects.filter(user=user).count()
+        if existing < options["tasks"]:
+            self.stdout.write(f"seeding {options['tasks'] - existing} tasks for {user.email}")
+            seed_tasks(user, options["tasks"] - existing)
+            call_command("rebuild_search_index", verbosity=0)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        report = {"vendor": connection.vendor, "tasks": options["tasks"], "terms": {}}
+
+        # measure the queries, not the response cache
+        with override_settings(TASK_RESPONSE_CACHE=False):
+            for term in options["terms"]:
+                row = {}
+                for param in ("search", "q"):
+                    url = f"/api/tasks/?{param}={term}"
+                    row[param] = {
+                        "count": client.get(url).json()["count"],
+                        "latency": time_call(lambda: client.get(url), repeat=options["repeat"]),
+                    }
+                report["terms"][term] = row
+                self.stdout.write(
+                    f"{term:<12} search: {row['search']['count']:>7} hits "
+                    f"p50={row['search']['latency']['p50_ms']}ms | "
+                    f"q: {row['q']['count']:>7} hits p50={row['q']['latency']['p50_ms']}ms"
+                )
+
+        if not options["keep"]:
+            user.delete()
+
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import Lag
+
+from apps.tasks.cache import bump_data_version
+from apps.tasks.models import SubTask
+from apps.tasks.ordering import rebalance
+
+
+class Command(BaseCommand):
+    help = "Re-spread subtask order_index for tasks whose sibling gaps are nearly used up"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-gap", type=int, default=8)
+
+    def handle(self, *args, **options):
+        crowded = (
+            SubTask.objects
+            .annotate(previous=Window(
+                Lag("order_index"),
+                partition_by=F("parent_task_id"),
+                order_by=F("order_index").asc(),
+            ))
+            .filter(order_index__lt=F("previous") + options["min_gap"])
+            .values_list("parent_task_id", "parent_task__user_id")
+        )
+
+        parents = set(crowded)
+        for parent_task_id, user_id in parents:
+            with transaction.atomic():
+                rebalance(parent_task_id)
+                bump_data_version(user_id)
+
+        self.stdout.write(self.style.SUCCESS(f"rebalanced {len(parents)} tasks"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks.models import Task
+from apps.tasks.search import refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = "Recompute Task.search_document (and the SQLite FTS tables) for all tasks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        ids = Task.objects.order_by("pk").values_list("pk", flat=True)
+
+        done = 0
+        last = None
+        while True:
+            page = ids.filter(pk__gt=last) if last else ids
+            batch = list(page[:batch_size])
+            if not batch:
+                break
+            refresh_search_documents(batch)
+            done += len(batch)
+            last = batch[-1]
+            if options["verbosity"] > 1:
+                self.stdout.write(f"indexed {done} tasks")
+
+        self.stdout.write(self.style.SUCCESS(f"search index rebuilt for {done} tasks"))
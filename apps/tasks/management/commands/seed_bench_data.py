@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tasks.seed import get_bench_user, parse_scale, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed one benchmark user per scale (bench-scale-1k@taskmaster.local, ...) with that many "
+        "tasks plus subtasks, tags, dependencies and search / duplicate indexes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scales", default="1k,100k", help="comma separated task counts, e.g. 1k,100k")
+        parser.add_argument("--subtasks-per-task", type=int, default=3, help="on average")
+        parser.add_argument("--tags-per-task", type=int, default=2, help="on average")
+        parser.add_argument("--reset", action="store_true", help="delete and reseed users that already have tasks")
+
+    def handle(self, *args, **options):
+        try:
+            scales = {label: parse_scale(label) for label in options["scales"].split(",")}
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for label, tasks in scales.items():
+            user = get_bench_user(f"scale-{label}")
+            if user.tasks.exists():
+                if not options["reset"]:
+                    self.stdout.write(f"{label}: {user.email} already seeded (--reset to reseed)")
+                    continue
+                user.tasks.all().delete()
+                user.tags.all().delete()
+
+            start = time.perf_counter()
+            counts = seed_dataset(
+                user,
+                tasks,
+                subtasks_per_task=options["subtasks_per_task"],
+                tags_per_task=options["tags_per_task"],
+            )
+            self.stdout.write(
+                f"{label}: {counts['tasks']} tasks, {counts['subtasks']} subtasks, "
+                f"{counts['dependencies']} dependencies for {user.email} "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks.cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters of the task response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="reset the counters after printing")
+
+    def handle(self, *args, **options):
+        for name, value in cache_stats().items():
+            self.stdout.write(f"{name:<13} {value}")
+
+        if options["reset"]:
+            reset_cache_stats()
+            self.stdout.write("counters reset")
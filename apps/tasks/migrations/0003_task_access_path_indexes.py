@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0002_remove_tag_usage_count_task_completed_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "is_active", "-created_at"],
+                name="task_user_active_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "due_date"], name="task_user_due_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_active", True),
+                    models.Q(("status", "completed"), _negated=True),
+                ),
+                fields=["user", "due_date"],
+                name="task_user_open_due_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:59
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+FTS_TABLES = {
+    "tasks_task_fts": "unicode61",
+    "tasks_task_fts_trigram": "trigram",
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    Task = apps.get_model("tasks", "Task")
+
+    if vendor == "postgresql":
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.add_index(
+            Task,
+            GinIndex(
+                SearchVector("search_document", config="simple"),
+                name="task_search_vector_idx",
+            ),
+        )
+        schema_editor.add_index(
+            Task,
+            GinIndex(
+                fields=["search_document"],
+                opclasses=["gin_trgm_ops"],
+                name="task_search_trgm_idx",
+            ),
+        )
+
+    elif vendor == "sqlite":
+        for table, tokenizer in FTS_TABLES.items():
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+                f"USING fts5(task_id UNINDEXED, document, tokenize='{tokenizer}')"
+            )
+
+
+def backfill_search_documents(apps, schema_editor, batch_size=2000):
+    # existing tasks; from here on writes keep their documents current
+    from apps.tasks.search import build_document
+
+    Task = apps.get_model("tasks", "Task")
+    TaskTag = apps.get_model("tasks", "TaskTag")
+    connection = schema_editor.connection
+    tasks = Task.objects.using(connection.alias).order_by("pk")
+
+    last = None
+    while True:
+        page = tasks.filter(pk__gt=last) if last else tasks
+        rows = list(page.values_list("pk", "title", "description")[:batch_size])
+        if not rows:
+            break
+        ids = [pk for pk, _, _ in rows]
+
+        tag_names = defaultdict(list)
+        tag_rows = TaskTag.objects.using(connection.alias).filter(task_id__in=ids)
+        for task_id, name in tag_rows.values_list("task_id", "tag__name"):
+            tag_names[task_id].append(name)
+
+        documents = {
+            pk: build_document(title, description, tag_names[pk]) for pk, title, description in rows
+        }
+        Task.objects.using(connection.alias).bulk_update(
+            [Task(pk=pk, search_document=document) for pk, document in documents.items()],
+            ["search_document"],
+        )
+        if connection.vendor == "sqlite":
+            placeholders = ", ".join(["%s"] * len(ids))
+            with connection.cursor() as cursor:
+                for table in FTS_TABLES:
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE task_id IN ({placeholders})",
+                        [pk.hex for pk in ids],
+                    )
+                    cursor.executemany(
+                        f"INSERT INTO {table} (task_id, document) VALUES (%s, %s)",
+                        [(pk.hex, document) for pk, document in documents.items()],
+                    )
+        last = ids[-1]
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS task_search_vector_idx")
+        schema_editor.execute("DROP INDEX IF EXISTS task_search_trgm_idx")
+
+    elif vendor == "sqlite":
+        for table in FTS_TABLES:
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0003_task_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
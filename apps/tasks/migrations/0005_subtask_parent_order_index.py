@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0004_task_search_document"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subtask",
+            index=models.Index(
+                fields=["parent_task", "order_index"], name="subtask_parent_order_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0005_subtask_parent_order_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="cancelled_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
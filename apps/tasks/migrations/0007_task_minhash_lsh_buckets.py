@@ -0,0 +1,64 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_duplicate_index(apps, schema_editor, batch_size=2000):
+    # existing tasks; from here on writes sign tasks and keep their buckets current
+    from apps.tasks.duplicates import band_keys, signature
+
+    Task = apps.get_model('tasks', 'Task')
+    TaskLSHBucket = apps.get_model('tasks', 'TaskLSHBucket')
+    db = schema_editor.connection.alias
+    tasks = Task.objects.using(db).order_by('pk')
+
+    last = None
+    while True:
+        page = tasks.filter(pk__gt=last) if last else tasks
+        batch = list(page.only('id', 'user_id', 'title', 'description')[:batch_size])
+        if not batch:
+            break
+        for task in batch:
+            task.minhash = signature(task.title, task.description)
+        Task.objects.using(db).bulk_update(batch, ['minhash'])
+        TaskLSHBucket.objects.using(db).filter(task__in=batch).delete()
+        TaskLSHBucket.objects.using(db).bulk_create(
+            [
+                TaskLSHBucket(task_id=task.pk, user_id=task.user_id, key=key)
+                for task in batch
+                for key in band_keys(task.minhash)
+            ],
+            batch_size=5000,
+        )
+        last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0006_task_cancelled_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='minhash',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.CreateModel(
+            name='TaskLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('key', models.BigIntegerField()),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='tasks.task')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'key'], name='task_lsh_user_key_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_duplicate_index, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
 import uuid
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 
 class Task(models.Model):
@@ -41,12 +43,19 @@ class Task(models.Model):
         default="pending"
     )
     completed_at = models.DateTimeField(null=True, blank=True)
+    cancelled_at = models.DateTimeField(null=True, blank=True)
 
     due_date = models.DateField(null=True, blank=True)
     due_time = models.TimeField(null=True, blank=True)
 
     is_active = models.BooleanField(default=True)
 
+    # normalized title + description + tag names, see apps.tasks.search
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    # MinHash of title + description for near-duplicate checks, see apps.tasks.duplicates
+    minhash = models.BinaryField(blank=True, default=b"", editable=False)
+
     tags = models.ManyToManyField(
         "tasks.Tag",
         through="tasks.TaskTag",
@@ -59,10 +68,43 @@ class Task(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # default list: user's active tasks, newest first
+            models.Index(
+                fields=["user", "is_active", "-created_at"],
+                name="task_user_active_created_idx",
+            ),
+            # due_date__lte / due_date__gte / timeline=today|upcoming
+            models.Index(
+                fields=["user", "due_date"],
+                name="task_user_due_date_idx",
+            ),
+            # open tasks only (timeline=overdue)
+            models.Index(
+                fields=["user", "due_date"],
+                name="task_user_open_due_idx",
+                condition=Q(is_active=True) & ~Q(status="completed"),
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def stamp_status(self):
+        """
+        Set / clear completed_at and cancelled_at to match `status`.
+        Returns the names of the fields that changed.
+        """
+        changed = []
+        for field, value in (("completed_at", "completed"), ("cancelled_at", "cancelled")):
+            if self.status == value and getattr(self, field) is None:
+                setattr(self, field, timezone.now())
+                changed.append(field)
+            elif self.status != value and getattr(self, field) is not None:
+                setattr(self, field, None)
+                changed.append(field)
+        return changed
+
 
 class SubTask(models.Model):
     id = models.UUIDField(
@@ -105,6 +147,12 @@ class SubTask(models.Model):
 
     class Meta:
         ordering = ["order_index"]
+        indexes = [
+            models.Index(
+                fields=["parent_task", "order_index"],
+                name="subtask_parent_order_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -148,6 +196,33 @@ class TaskTag(models.Model):
         unique_together = ("task", "tag")
 
 
+class TaskLSHBucket(models.Model):
+    """One row per (task, LSH band) of Task.minhash, see apps.tasks.duplicates."""
+
+    id = models.BigAutoField(primary_key=True)
+
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name="lsh_buckets"
+    )
+
+    # denormalized so lookups stay inside one user's buckets
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False
+    )
+
+    key = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "key"], name="task_lsh_user_key_idx"),
+        ]
+
+
 class TaskDependency(models.Model):
     task = models.ForeignKey(
         Task,
@@ -177,4 +252,10 @@ class TaskDependency(models.Model):
 
     def clean(self):
         if self.task_id == self.depends_on_id:
-            raise ValidationError("Task cannot depend on itself")
\ No newline at end of file
+            raise ValidationError("Task cannot depend on itself")
+
+        from .graph import BLOCKS, would_cycle_sql
+
+        if self.dependency_type == BLOCKS:
+            if would_cycle_sql(self.task_id, self.depends_on_id):
+                raise ValidationError("Dependency would create a cycle")
@@ -0,0 +1,94 @@
+from django.db.models import Case, Max, Value, When
+
+from .models import SubTask
+
+# Subtasks are ranked with sparse integers: siblings start ORDER_STEP apart so
+# a move only rewrites the moved row (midpoint of its new neighbours). When a
+# gap is used up the parent's subtasks are rebalanced in one UPDATE.
+ORDER_STEP = 1024
+MAX_ORDER_INDEX = 2_147_483_647
+
+
+def spread(position):
+    """Rank of the `position`-th (0-based) subtask in a freshly spread list."""
+    return (position + 1) * ORDER_STEP
+
+
+def next_order_index(parent_task_id):
+    last = (
+        SubTask.objects
+        .filter(parent_task_id=parent_task_id)
+        .aggregate(last=Max("order_index"))["last"]
+    )
+    return spread(0) if last is None else last + ORDER_STEP
+
+
+def rank_between(before, after):
+    """
+    A rank strictly between `before` and `after` (either may be None for
+    the ends of the list), or None if there is no room left.
+    """
+    low = -1 if before is None else before
+    if after is None:
+        rank = (low + ORDER_STEP) if before is not None else spread(0)
+        return rank if rank <= MAX_ORDER_INDEX else None
+    if after - low > 1:
+        return (low + after + 1) // 2
+    return None
+
+
+def set_order_indexes(queryset, ranks):
+    """
+    Apply {subtask_id: order_index} to `queryset` in a single UPDATE.
+    """
+    if not ranks:
+        return 0
+    return queryset.filter(pk__in=list(ranks)).update(
+        order_index=Case(
+            *[When(pk=pk, then=Value(rank)) for pk, rank in ranks.items()]
+        )
+    )
+
+
+def rebalance(parent_task_id):
+    """
+    Re-spread one task's subtasks ORDER_STEP apart, keeping their order.
+    """
+    ids = (
+        SubTask.objects
+        .filter(parent_task_id=parent_task_id)
+        .order_by("order_index", "created_at", "pk")
+        .values_list("pk", flat=True)
+    )
+    ranks = {pk: spread(position) for position, pk in enumerate(ids)}
+    return set_order_indexes(SubTask.objects.filter(parent_task_id=parent_task_id), ranks)
+
+
+def move_after(subtask, after):
+    """
+    Move `subtask` right after sibling `after` (None = to the top).
+    Normally updates exactly one row.
+    """
+    siblings = SubTask.objects.filter(parent_task_id=subtask.parent_task_id).exclude(pk=subtask.pk)
+
+    for attempt in range(2):
+        before = None if after is None else after.order_index
+        following = siblings.order_by("order_index")
+        if before is not None:
+            # a sibling sharing `after`'s rank (legacy rows) leaves no room either
+            following = following.filter(order_index__gte=before).exclude(pk=after.pk)
+        next_rank = following.values_list("order_index", flat=True).first()
+
+        rank = rank_between(before, next_rank)
+        if rank is not None:
+            break
+        # no gap left between the neighbours; rebalancing also breaks ties
+        rebalance(subtask.parent_task_id)
+        if after is not None:
+            after.refresh_from_db(fields=["order_index"])
+    else:
+        raise RuntimeError("could not find a free rank after rebalancing")
+
+    subtask.order_index = rank
+    subtask.save(update_fields=["order_index", "updated_at"])
+    return subtask
@@ -0,0 +1,181 @@
+import re
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+
+from .models import Task, TaskTag
+
+FTS_TABLE = "tasks_task_fts"
+TRIGRAM_TABLE = "tasks_task_fts_trigram"
+
+# minimum trigram similarity for typo tolerant matches
+TRIGRAM_THRESHOLD = 0.4
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return [word.lower() for word in WORD_RE.findall(text or "")]
+
+
+def build_document(title, description, tag_names):
+    return " ".join(tokenize(" ".join([title, description, *tag_names])))
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b):
+    ta, tb = trigrams(a), trigrams(b)
+    return len(ta & tb) / len(ta | tb) if ta and tb else 0.0
+
+
+def refresh_search_documents(task_ids):
+    """
+    Recompute `Task.search_document` for `task_ids` set-based: two reads and
+    one bulk update, whatever the number of tasks.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+
+    tag_names = defaultdict(list)
+    tag_rows = TaskTag.objects.filter(task_id__in=task_ids).values_list("task_id", "tag__name")
+    for task_id, name in tag_rows:
+        tag_names[task_id].append(name)
+
+    tasks = [
+        Task(id=task_id, search_document=build_document(title, description, tag_names[task_id]))
+        for task_id, title, description in (
+            Task.objects.filter(pk__in=task_ids).values_list("id", "title", "description")
+        )
+    ]
+    Task.objects.bulk_update(tasks, ["search_document"], batch_size=1000)
+    get_search_backend().index({task.id: task.search_document for task in tasks})
+
+
+def no_matches(queryset):
+    # still annotated, so callers can order by search_rank
+    return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class PostgresSearchBackend:
+    """
+    tsvector over `search_document` (GIN expression index) for ranked prefix
+    matching, pg_trgm word similarity (GIN trigram index) for typos.
+    """
+
+    def index(self, documents):
+        # expression indexes are maintained by PostgreSQL itself
+        pass
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import (
+            SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+        )
+
+        terms = tokenize(query)
+        if not terms:
+            return no_matches(queryset)
+
+        vector = SearchVector("search_document", config="simple")
+        ts_query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms),
+            search_type="raw",
+            config="simple",
+        )
+        text = " ".join(terms)
+
+        return (
+            queryset
+            .alias(search_vector=vector)
+            .filter(
+                Q(search_vector=ts_query)
+                | Q(search_document__trigram_word_similar=text)
+            )
+            .annotate(
+                search_rank=SearchRank(vector, ts_query)
+                + TrigramWordSimilarity(text, "search_document")
+            )
+        )
+
+
+class SQLiteSearchBackend:
+    """
+    FTS5 fallback used by the test settings: a unicode61 table for ranked
+    prefix matching and a trigram table for typo tolerant candidates.
+    """
+
+    def index(self, documents):
+        if not documents:
+            return
+        ids = [task_id.hex for task_id in documents]
+        placeholders = ", ".join(["%s"] * len(ids))
+        rows = [(task_id.hex, document) for task_id, document in documents.items()]
+
+        with connection.cursor() as cursor:
+            for table in (FTS_TABLE, TRIGRAM_TABLE):
+                cursor.execute(f"DELETE FROM {table} WHERE task_id IN ({placeholders})", ids)
+                cursor.executemany(f"INSERT INTO {table} (task_id, document) VALUES (%s, %s)", rows)
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return no_matches(queryset)
+
+        ranks = self.match(terms) or self.fuzzy_match(terms)
+        if not ranks:
+            return no_matches(queryset)
+
+        return (
+            queryset
+            .filter(pk__in=list(ranks))
+            .annotate(search_rank=Case(
+                *[When(pk=task_id, then=Value(rank)) for task_id, rank in ranks.items()],
+                output_field=FloatField(),
+            ))
+        )
+
+    def match(self, terms):
+        expression = " AND ".join(f'"{term}"*' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT task_id, bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                [expression],
+            )
+            # bm25 is lower-is-better
+            return {task_id: -score for task_id, score in cursor.fetchall()}
+
+    def fuzzy_match(self, terms):
+        grams = {gram.strip() for term in terms for gram in trigrams(term) if len(gram.strip()) == 3}
+        if not grams:
+            return {}
+
+        expression = " OR ".join(f'"{gram}"' for gram in grams)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT task_id, document FROM {TRIGRAM_TABLE} WHERE {TRIGRAM_TABLE} MATCH %s "
+                f"ORDER BY bm25({TRIGRAM_TABLE})",
+                [expression],
+            )
+            candidates = cursor.fetchall()
+
+        ranks = {}
+        for task_id, document in candidates:
+            words = document.split()
+            score = min(
+                max((similarity(term, word) for word in words), default=0.0)
+                for term in terms
+            )
+            if score >= TRIGRAM_THRESHOLD:
+                ranks[task_id] = score
+        return ranks
+
+
+def get_search_backend():
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    return SQLiteSearchBackend()
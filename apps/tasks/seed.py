@@ -0,0 +1,170 @@
+import random
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from .duplicates import band_keys, signature
+from .models import SubTask, Task, TaskDependency, TaskLSHBucket
+from .ordering import spread
+from .search import build_document, get_search_backend
+from .tags import apply_task_tags
+
+User = get_user_model()
+
+PRIORITIES = ["low", "medium", "high"]
+STATUSES = ["pending", "in_progress", "completed", "cancelled"]
+WORDS = [
+    "report", "review", "deploy", "meeting", "invoice", "design", "fix",
+    "sprint", "demo", "email", "budget", "release", "draft", "plan",
+]
+
+
+TAG_NAMES = ["work", "home", "urgent", "later", "client", "team", "personal", "ops", "finance", "health"]
+
+
+def parse_scale(label):
+    """Number of tasks for a dataset scale label: "1k" -> 1000, "100k", "2m", "500"."""
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(label[-1:].lower(), 1)
+    try:
+        return int(label[:-1] if multiplier > 1 else label) * multiplier
+    except ValueError:
+        raise ValueError(f"invalid scale {label!r}, expected e.g. 1k, 100k or 500") from None
+
+
+def get_bench_user(label):
+    user, _ = User.objects.get_or_create(
+        email=f"bench-{label}@taskmaster.local",
+        defaults={"username": f"bench-{label}"},
+    )
+    return user
+
+
+def random_task(rng, user, today):
+    title = " ".join(rng.choice(WORDS) for _ in range(3))
+    return Task(
+        user=user,
+        title=title,
+        description=f"{title} details",
+        priority=rng.choice(PRIORITIES),
+        status=rng.choice(STATUSES),
+        due_date=today + timedelta(days=rng.randint(-60, 60)),
+        is_active=rng.random() > 0.05,
+    )
+
+
+def seed_tasks(user, count, batch_size=5000, seed=0):
+    """
+    Bulk insert `count` tasks for `user` with spread out statuses and due dates.
+    """
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    created = 0
+
+    while created < count:
+        batch = [random_task(rng, user, today) for _ in range(min(batch_size, count - created))]
+        Task.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+
+    return created
+
+
+def seed_dependencies(user, count, max_fan_in=3, batch_size=5000, seed=0):
+    """
+    Bulk insert up to `count` acyclic "blocks" dependencies between the
+    user's tasks: a task only ever depends on tasks created before it.
+    """
+    rng = random.Random(seed)
+    ids = list(Task.objects.filter(user=user).order_by("created_at", "pk").values_list("pk", flat=True))
+    edges = set()
+    for _ in range(count):
+        if len(ids) < 2:
+            break
+        i = rng.randrange(1, len(ids))
+        for _ in range(rng.randint(1, max_fan_in)):
+            edges.add((ids[i], ids[rng.randrange(max(0, i - 200), i)]))
+
+    TaskDependency.objects.bulk_create(
+        [TaskDependency(task_id=task_id, depends_on_id=dep) for task_id, dep in list(edges)[:count]],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    return min(len(edges), count)
+
+
+def insert_rows(model, fields, rows, batch_size=5000):
+    """
+    INSERT `rows` (tuples of `fields` values) with executemany: bulk_create
+    without building a model instance and a statement per batch, for the
+    seeded datasets' biggest tables. Defaults are not applied.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]  # not the proxy: it's used per value
+    columns = [model._meta.get_field(name) for name in fields]
+    quote = connection.ops.quote_name
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote(model._meta.db_table),
+        ", ".join(quote(field.column) for field in columns),
+        ", ".join(["%s"] * len(columns)),
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, [
+                [field.get_db_prep_save(value, connection) for field, value in zip(columns, row)]
+                for row in rows[start:start + batch_size]
+            ])
+    return len(rows)
+
+
+def seed_dataset(user, tasks, subtasks_per_task=3, tags_per_task=2, dependencies=None, batch_size=5000, seed=0):
+    """
+    A large tenant for `user`, as if created through the API: `tasks` tasks,
+    each with 0 to 2 * `subtasks_per_task` subtasks and 0 to 2 * `tags_per_task`
+    of TAG_NAMES, their search documents and duplicate index, and acyclic
+    dependencies (`tasks` // 10 by default). One transaction; every row is
+    built in memory and inserted once. Returns the row counts.
+    """
+    rng = random.Random(seed)
+    now, today = timezone.now(), timezone.localdate()
+    backend = get_search_backend()
+    signatures = {}  # (minhash, LSH band keys) by title + description, which repeat (see WORDS)
+    created = subtasks = 0
+
+    with transaction.atomic():
+        while created < tasks:
+            batch = [random_task(rng, user, today) for _ in range(min(batch_size, tasks - created))]
+            tag_names = {task.pk: rng.sample(TAG_NAMES, rng.randint(0, 2 * tags_per_task)) for task in batch}
+            buckets = []
+            for task in batch:
+                task.search_document = build_document(task.title, task.description, tag_names[task.pk])
+                key = (task.title, task.description)
+                if key not in signatures:
+                    minhash = signature(*key)
+                    signatures[key] = minhash, band_keys(minhash)
+                task.minhash, keys = signatures[key]
+                buckets.extend((task.pk, user.pk, band) for band in keys)
+            Task.objects.bulk_create(batch, batch_size=batch_size)
+
+            apply_task_tags(user, tag_names, new=True)
+            insert_rows(TaskLSHBucket, ["task", "user", "key"], buckets, batch_size)
+            backend.index({task.pk: task.search_document for task in batch})
+
+            subtasks += insert_rows(
+                SubTask,
+                ["id", "parent_task", "title", "description", "status", "order_index", "created_at", "updated_at"],
+                [
+                    (uuid.uuid4(), task.pk, f"{rng.choice(WORDS)} step {index + 1}", "",
+                     rng.choice(["pending", "completed"]), spread(index), now, now)
+                    for task in batch
+                    for index in range(rng.randint(0, 2 * subtasks_per_task))
+                ],
+                batch_size,
+            )
+            created += len(batch)
+
+        dependencies = seed_dependencies(
+            user, tasks // 10 if dependencies is None else dependencies, batch_size=batch_size, seed=seed
+        )
+
+    return {"tasks": created, "subtasks": subtasks, "dependencies": dependencies}
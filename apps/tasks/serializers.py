@@ -2,8 +2,18 @@
 
 # Imports:
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
-from .models import Task, Tag, SubTask
+from django.utils import timezone
+from collections import defaultdict
+from .models import Task, Tag, SubTask, TaskTag, TaskDependency
+from .cache import bump_data_version
+from .search import refresh_search_documents
+from .tags import apply_task_tags
+from .ordering import ORDER_STEP, next_order_index, spread
+from .graph import add_dependency
+from .duplicates import find_duplicates, refresh_buckets, sign
+from apps.analytics.rollups import record_task_changes, snapshot
 
 # TagSerializer (used for write/read)
 class TagSerializer(serializers.ModelSerializer):
@@ -29,6 +39,12 @@ class SubTaskSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["created_at", "updated_at", "completed_at"]
 
+# SubTaskReorderSerializer (drag & drop payload item)
+class SubTaskReorderSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    order_index = serializers.IntegerField(min_value=0, max_value=1_000_000)
+
+
 # TaskSerializer (read)
 class TaskSerializer(serializers.ModelSerializer):
     id = serializers.UUIDField(read_only=True)
@@ -53,6 +69,108 @@ class TaskSerializer(serializers.ModelSerializer):
             "owner",
         ]
 
+# LeanTaskSerializer (read, high throughput)
+class LeanTaskListSerializer(serializers.ListSerializer):
+    """
+    Tags and subtasks for the whole page in one query each, so a page of
+    tasks always costs three queries no matter how many rows it holds.
+    """
+
+    def to_representation(self, data):
+        rows = list(data)
+        subtask_rows, tag_rows = self.related_rows([row["id"] for row in rows])
+        return self.represent(rows, subtask_rows, tag_rows)
+
+    async def ato_representation(self, data):
+        """to_representation for async views, with the async ORM."""
+        subtask_rows, tag_rows = self.related_rows([row["id"] for row in data])
+        return self.represent(
+            data,
+            [subtask async for subtask in subtask_rows],
+            [tag async for tag in tag_rows],
+        )
+
+    def related_rows(self, task_ids):
+        if not task_ids:
+            return SubTask.objects.none(), TaskTag.objects.none()
+        subtask_rows = (
+            SubTask.objects
+            .filter(parent_task_id__in=task_ids)
+            .values("parent_task_id", *SubTaskSerializer.Meta.fields)
+        )
+        tag_rows = (
+            TaskTag.objects
+            .filter(task_id__in=task_ids)
+            .order_by("tag__name")
+            .values("task_id", "tag__id", "tag__name", "tag__color")
+        )
+        return subtask_rows, tag_rows
+
+    def represent(self, rows, subtask_rows, tag_rows):
+        subtasks = defaultdict(list)
+        for subtask in subtask_rows:
+            subtasks[subtask["parent_task_id"]].append(subtask)
+
+        tags = defaultdict(list)
+        for tag in tag_rows:
+            tags[tag["task_id"]].append(
+                {name: tag[f"tag__{name}"] for name in TagSerializer.Meta.fields}
+            )
+
+        child = self.child
+        return [
+            child.to_representation(row, tags[row["id"]], subtasks[row["id"]])
+            for row in rows
+        ]
+
+
+class LeanTaskSerializer(serializers.BaseSerializer):
+    """
+    Same output as TaskSerializer, built from `values(*value_fields)` rows
+    instead of model instances. Field formatting is delegated to the
+    TaskSerializer field objects so both paths stay byte-identical.
+    """
+
+    value_fields = [
+        "id", "title", "description", "priority", "status",
+        "due_date", "due_time", "created_at", "updated_at", "user__username",
+    ]
+
+    class Meta:
+        list_serializer_class = LeanTaskListSerializer
+
+    @property
+    def formatters(self):
+        # built once per serializer, reused for every row
+        if not hasattr(self, "_formatters"):
+            self._formatters = (
+                TaskSerializer().fields,
+                TagSerializer().fields,
+                SubTaskSerializer().fields,
+            )
+        return self._formatters
+
+    def to_representation(self, row, tags=(), subtasks=()):
+        task_fields, tag_fields, subtask_fields = self.formatters
+
+        data = {}
+        for name, field in task_fields.items():
+            if name == "tags":
+                data[name] = [_format(tag_fields, tag) for tag in tags]
+            elif name == "subtasks":
+                data[name] = [_format(subtask_fields, subtask) for subtask in subtasks]
+            else:
+                value = row[field.source.replace(".", "__")]
+                data[name] = None if value is None else field.to_representation(value)
+        return data
+
+
+def _format(fields, row):
+    return {
+        name: None if row[name] is None else field.to_representation(row[name])
+        for name, field in fields.items()
+    }
+
 # TaskCreateUpdateSerializer (write)
 class TaskCreateUpdateSerializer(serializers.ModelSerializer):
     tags = serializers.ListField(
@@ -62,6 +180,14 @@ class TaskCreateUpdateSerializer(serializers.ModelSerializer):
     
     subtasks = SubTaskSerializer(many=True, required=False)
 
+    # create only: "flag" returns near-duplicates of the new task,
+    # "merge" adds the tags / subtasks to the closest one instead
+    on_duplicate = serializers.ChoiceField(
+        choices=["allow", "flag", "merge"],
+        default="allow",
+        write_only=True
+    )
+
     class Meta:
         model = Task
         fields = [
@@ -73,6 +199,7 @@ class TaskCreateUpdateSerializer(serializers.ModelSerializer):
             "due_time",
             "tags",
             "subtasks",
+            "on_duplicate",
         ]
 
     def validate_tags(self, value):
@@ -84,49 +211,280 @@ class TaskCreateUpdateSerializer(serializers.ModelSerializer):
         # request = self.context.get("request")
         tags_data = validated_data.pop("tags", [])
         subtasks_data = validated_data.pop("subtasks", [])
+        on_duplicate = validated_data.pop("on_duplicate", "allow")
 
         with transaction.atomic():
-            task = Task.objects.create(**validated_data)
+            task = Task(**validated_data)
+            sign([task])
+
+            self.duplicates, self.merged = [], False
+            if on_duplicate != "allow":
+                self.duplicates = find_duplicates(task.user_id, task.minhash)
+                if on_duplicate == "merge" and self.duplicates:
+                    return self.merge(self.duplicates[0]["id"], tags_data, subtasks_data)
+
+            task.stamp_status()
+            task.save()
+            record_task_changes(task.user_id, [(None, snapshot(task))])
+            refresh_buckets([task], new=True)
 
             # tags
-            for tag_name in tags_data:
-                tag_name = tag_name.strip().lower()
-                tag, _ = Tag.objects.get_or_create(
-                    user=task.user,
-                    name=tag_name
-                )
-                task.tags.add(tag)
+            apply_task_tags(task.user, {task.pk: tags_data}, new=True)
 
             # subtasks
-            for index, subtask in enumerate(subtasks_data):
-                SubTask.objects.create(
-                    parent_task=task,
-                    order_index=index,
-                    **subtask
-                )
+            SubTask.objects.bulk_create([
+                SubTask(parent_task=task, **dict(subtask, order_index=spread(index)))
+                for index, subtask in enumerate(subtasks_data)
+            ])
+
+            refresh_search_documents([task.pk])
 
         return task
 
-    
+    def merge(self, task_id, tags_data, subtasks_data):
+        """
+        Fold a duplicate create into the existing task: its tags are added
+        and its subtasks appended. Returns the existing task.
+        """
+        task = Task.objects.select_for_update().get(pk=task_id)
+        if tags_data:
+            current = list(task.tags.values_list("name", flat=True))
+            apply_task_tags(task.user, {task.pk: current + tags_data})
+            refresh_search_documents([task.pk])
+
+        if subtasks_data:
+            start = next_order_index(task.pk)
+            SubTask.objects.bulk_create([
+                SubTask(parent_task=task, **dict(subtask, order_index=start + index * ORDER_STEP))
+                for index, subtask in enumerate(subtasks_data)
+            ])
+
+        self.merged = True
+        return task
+
     def update(self, instance, validated_data):
         tags_data = validated_data.pop("tags", None)
         subtasks_data = validated_data.pop("subtasks", None)
+        validated_data.pop("on_duplicate", None)
 
         with transaction.atomic():
+            before = snapshot(instance)
             for attr, value in validated_data.items():
                 setattr(instance, attr, value)
 
+            text_changed = bool({"title", "description"} & validated_data.keys())
+            if text_changed:
+                sign([instance])
+            instance.stamp_status()
             instance.save()
+            record_task_changes(instance.user_id, [(before, snapshot(instance))])
+            if text_changed:
+                refresh_buckets([instance])
 
+            tags_changed = False
             if tags_data is not None:
-                instance.tags.clear()
-                for tag_name in tags_data:
-                    tag, _ = Tag.objects.get_or_create(
-                        user=instance.user,
-                        name=tag_name.strip().lower()
-                    )
-                    instance.tags.add(tag)
+                tags_changed = apply_task_tags(instance.user, {instance.pk: tags_data})
+
+            if tags_changed or text_changed:
+                refresh_search_documents([instance.pk])
 
         return instance
 
 
+# TaskBulkSerializer (write, many tasks per request)
+class TaskBulkSerializer(serializers.Serializer):
+    """
+    {"create": [task, ...], "update": [{"id": ..., **fields}, ...], "delete": [id, ...]}
+
+    Every item is validated with TaskCreateUpdateSerializer first; if any item
+    fails nothing is written and the errors are returned per operation and
+    index. Otherwise everything is persisted in one transaction with a fixed
+    number of set-based statements (bulk_create / bulk_update / update).
+    """
+
+    MAX_ITEMS = 500
+
+    def get_fields(self):
+        # declared here because "create" / "update" would shadow the methods
+        return {
+            "create": serializers.ListField(child=serializers.DictField(), required=False, default=list),
+            "update": serializers.ListField(child=serializers.DictField(), required=False, default=list),
+            "delete": serializers.ListField(child=serializers.UUIDField(), required=False, default=list),
+        }
+
+    def validate(self, attrs):
+        if sum(len(items) for items in attrs.values()) > self.MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {self.MAX_ITEMS} operations per request.")
+
+        user = self.context["request"].user
+        errors = defaultdict(dict)
+
+        creates = []
+        for index, item in enumerate(attrs["create"]):
+            if "on_duplicate" in item:
+                # duplicate checks / merges are per task, see TaskCreateUpdateSerializer.create
+                errors["create"][index] = {
+                    "on_duplicate": ["Not supported in bulk creates, use POST /api/tasks/."]
+                }
+                continue
+            serializer = TaskCreateUpdateSerializer(data=item)
+            if serializer.is_valid():
+                creates.append(serializer.validated_data)
+            else:
+                errors["create"][index] = serializer.errors
+
+        ids = [_as_uuid(item.get("id")) for item in attrs["update"]] + attrs["delete"]
+        instances = {
+            task.pk: task
+            for task in Task.objects.filter(
+                user=user,
+                is_active=True,
+                pk__in=[pk for pk in ids if pk is not None],
+            )
+        }
+
+        updates = []
+        for index, item in enumerate(attrs["update"]):
+            task = instances.get(_as_uuid(item.get("id")))
+            if task is None:
+                errors["update"][index] = {"id": ["Not found."]}
+                continue
+            if "subtasks" in item:
+                errors["update"][index] = {
+                    "subtasks": ["Not supported in updates, use /api/tasks/{id}/subtasks/."]
+                }
+                continue
+            data = {key: value for key, value in item.items() if key != "id"}
+            serializer = TaskCreateUpdateSerializer(task, data=data, partial=True)
+            if serializer.is_valid():
+                updates.append((task, serializer.validated_data))
+            else:
+                errors["update"][index] = serializer.errors
+
+        for index, task_id in enumerate(attrs["delete"]):
+            if task_id not in instances:
+                errors["delete"][index] = ["Not found."]
+
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return {
+            "create": creates,
+            "update": updates,
+            "delete": attrs["delete"],
+            "deleted_tasks": [instances[pk] for pk in set(attrs["delete"])],
+        }
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+        now = timezone.now()
+
+        with transaction.atomic():
+            # creates
+            new_tasks, new_subtasks, new_tags = [], [], {}
+            for data in validated_data["create"]:
+                data = dict(data)
+                tags_data = data.pop("tags", [])
+                subtasks_data = data.pop("subtasks", [])
+                data.pop("on_duplicate", None)  # the field's default; requests can't set it
+
+                task = Task(user=user, **data)
+                task.stamp_status()
+                new_tasks.append(task)
+                new_tags[task.pk] = tags_data
+                new_subtasks += [
+                    SubTask(parent_task=task, **dict(subtask, order_index=spread(index)))
+                    for index, subtask in enumerate(subtasks_data)
+                ]
+            sign(new_tasks)
+            Task.objects.bulk_create(new_tasks)
+            refresh_buckets(new_tasks, new=True)
+            rollup_changes = [(None, snapshot(task)) for task in new_tasks]
+            SubTask.objects.bulk_create(new_subtasks)
+            apply_task_tags(user, new_tags, new=True)
+
+            # updates (subtasks are managed through /subtasks/, see validate())
+            updated_tasks, update_fields, retagged, resigned = [], {"updated_at"}, {}, []
+            for task, data in validated_data["update"]:
+                data = dict(data)
+                tags_data = data.pop("tags", None)
+                data.pop("on_duplicate", None)
+
+                before = snapshot(task)
+                for attr, value in data.items():
+                    setattr(task, attr, value)
+                task.updated_at = now
+                if {"title", "description"} & data.keys():
+                    resigned.append(task)
+                update_fields.update(data, task.stamp_status())
+                rollup_changes.append((before, snapshot(task)))
+                updated_tasks.append(task)
+
+                if tags_data is not None:
+                    retagged[task.pk] = tags_data
+            if resigned:
+                sign(resigned)
+                update_fields.add("minhash")
+            if updated_tasks:
+                Task.objects.bulk_update(updated_tasks, sorted(update_fields))
+            refresh_buckets(resigned)
+            apply_task_tags(user, retagged)
+
+            # deletes (soft)
+            if validated_data["delete"]:
+                Task.objects.filter(user=user, pk__in=validated_data["delete"]).update(
+                    is_active=False, updated_at=now
+                )
+                rollup_changes += [
+                    (snapshot(task), dict(snapshot(task), is_active=False))
+                    for task in validated_data["deleted_tasks"]
+                ]
+
+            record_task_changes(user.pk, rollup_changes)
+
+            refresh_search_documents([task.pk for task in new_tasks + updated_tasks])
+            bump_data_version(user.pk)
+
+        return {
+            "create": [{"index": i, "id": task.pk} for i, task in enumerate(new_tasks)],
+            "update": [{"index": i, "id": task.pk} for i, task in enumerate(updated_tasks)],
+            "delete": [{"index": i, "id": pk} for i, pk in enumerate(validated_data["delete"])],
+        }
+
+
+# TaskDependencySerializer ("task depends on depends_on")
+class TaskDependencySerializer(serializers.ModelSerializer):
+    depends_on = serializers.PrimaryKeyRelatedField(queryset=Task.objects.none())
+
+    class Meta:
+        model = TaskDependency
+        fields = ["id", "task", "depends_on", "dependency_type", "created_at"]
+        read_only_fields = ["task", "created_at"]
+        # duplicates are rejected by add_dependency under the per-user lock
+        validators = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is not None:
+            self.fields["depends_on"].queryset = Task.objects.filter(
+                user=request.user, is_active=True
+            )
+
+    def create(self, validated_data):
+        try:
+            return add_dependency(
+                validated_data["task"],
+                validated_data["depends_on"],
+                validated_data.get("dependency_type", "blocks"),
+            )
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({"depends_on": exc.messages})
+
+
+def _as_uuid(value):
+    try:
+        return serializers.UUIDField().to_internal_value(value)
+    except serializers.ValidationError:
+        return None
+
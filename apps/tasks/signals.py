@@ -0,0 +1,71 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import bump_data_version
+from .graph import BLOCKS, record_change
+from .models import Tag, Task, TaskDependency, TaskTag
+from .search import refresh_search_documents
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def task_tags_changed(sender, instance, action, **kwargs):
+    # instance is the Task (task.tags.add) or the Tag (tag.tasks.add); both carry user_id.
+    # TaskTag itself has no receivers so set-based writes (bulk_create, queryset
+    # delete) stay single statements; those paths bump / refresh explicitly.
+    reverse = kwargs["reverse"]
+    if action == "pre_clear" and reverse:
+        # tag.tasks.clear() sends no pk_set, and the rows are gone by post_clear
+        instance._cleared_task_ids = list(
+            TaskTag.objects.filter(tag=instance).values_list("task_id", flat=True)
+        )
+    elif action in ("post_add", "post_remove", "post_clear"):
+        bump_data_version(instance.user_id)
+        if not reverse:
+            refresh_search_documents([instance.pk])
+        elif action == "post_clear":
+            refresh_search_documents(getattr(instance, "_cleared_task_ids", []))
+        else:
+            refresh_search_documents(kwargs["pk_set"] or [])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_written(sender, instance, **kwargs):
+    # renamed / recoloured / deleted tags show up nested in task reads
+    bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=Tag)
+def tag_renamed(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_documents(
+            TaskTag.objects.filter(tag=instance).values_list("task_id", flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    # the TaskTag rows are gone (cascade) by post_delete
+    instance._tagged_task_ids = list(
+        TaskTag.objects.filter(tag=instance).values_list("task_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    refresh_search_documents(getattr(instance, "_tagged_task_ids", []))
+
+
+@receiver(post_save, sender=TaskDependency)
+def dependency_saved(sender, instance, created, **kwargs):
+    user_id = instance.task.user_id
+    if not created:
+        # dependency_type may have changed; removing a missing edge is a no-op
+        record_change(user_id, "remove", instance.task_id, instance.depends_on_id)
+    if instance.dependency_type == BLOCKS:
+        record_change(user_id, "add", instance.task_id, instance.depends_on_id)
+
+
+@receiver(post_delete, sender=TaskDependency)
+def dependency_deleted(sender, instance, **kwargs):
+    record_change(instance.task.user_id, "remove", instance.task_id, instance.depends_on_id)
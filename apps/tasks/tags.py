@@ -0,0 +1,79 @@
+from collections import defaultdict
+
+from .models import Tag, TaskTag
+
+
+def normalize_tag_names(names):
+    """
+    strip + lowercase, drop empties and duplicates, keep the client's order.
+    """
+    seen = {}
+    for name in names:
+        name = name.strip().lower()
+        if name:
+            seen.setdefault(name, None)
+    return list(seen)
+
+
+def resolve_tags(user, names):
+    """
+    name -> Tag for the user's `names`. One query when all tags exist; the
+    missing ones are created with a single conflict-ignoring insert (safe
+    against concurrent requests) and read back once.
+    """
+    names = set(names)
+    if not names:
+        return {}
+
+    tags = {tag.name: tag for tag in Tag.objects.filter(user=user, name__in=names)}
+    missing = names - tags.keys()
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(user=user, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        tags.update(
+            (tag.name, tag) for tag in Tag.objects.filter(user=user, name__in=missing)
+        )
+    return tags
+
+
+def apply_task_tags(user, tag_names_by_task, new=False):
+    """
+    Make each task's tags exactly `tag_names_by_task[task_id]`, writing only
+    the TaskTag rows that change: one read of the current links (skipped for
+    `new` tasks), one DELETE and one INSERT, whatever the number of tasks or
+    tags. Returns True if anything changed.
+    """
+    names_by_task = {
+        task_id: normalize_tag_names(names) for task_id, names in tag_names_by_task.items()
+    }
+    tags = resolve_tags(user, {name for names in names_by_task.values() for name in names})
+    wanted = {
+        task_id: {tags[name].pk for name in names} for task_id, names in names_by_task.items()
+    }
+
+    current = defaultdict(dict)
+    if not new and wanted:
+        links = TaskTag.objects.filter(task_id__in=list(wanted)).values_list("pk", "task_id", "tag_id")
+        for pk, task_id, tag_id in links:
+            current[task_id][tag_id] = pk
+
+    removed = [
+        pk
+        for task_id, links in current.items()
+        for tag_id, pk in links.items()
+        if tag_id not in wanted[task_id]
+    ]
+    added = [
+        TaskTag(task_id=task_id, tag_id=tag_id)
+        for task_id, tag_ids in wanted.items()
+        for tag_id in tag_ids
+        if tag_id not in current[task_id]
+    ]
+
+    if removed:
+        TaskTag.objects.filter(pk__in=removed).delete()
+    if added:
+        TaskTag.objects.bulk_create(added)
+    return bool(removed or added)
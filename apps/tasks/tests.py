@@ -1,3 +1,921 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import date, time
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.analytics.models import DailyTaskStats
+from apps.analytics.rollups import rebuild as rebuild_rollups
+from apps.common.async_views import with_async_reads
+
+from .admin import TaskAdmin, TaskTagAdmin
+from .duplicates import band_keys, find_duplicates, signature, similarity
+from .graph import add_dependency, get_graph, would_cycle_sql
+from .models import SubTask, Tag, Task, TaskDependency, TaskLSHBucket, TaskTag
+from .ordering import (
+    MAX_ORDER_INDEX, ORDER_STEP, move_after, rank_between, rebalance, set_order_indexes, spread,
+)
+from .search import build_document, refresh_search_documents
+from .seed import get_bench_user, seed_dataset
+from .serializers import LeanTaskSerializer, TaskCreateUpdateSerializer, TaskSerializer
+from .urls import router
+from .views import async_subtask_list, async_task_detail, async_task_list
+
+User = get_user_model()
+
+
+class LeanTaskSerializerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="lean@example.com", username="lean", password="pass12345"
+        )
+        work = Tag.objects.create(user=cls.user, name="work")
+        home = Tag.objects.create(user=cls.user, name="home", color="#000000")
+
+        for i in range(60):
+            task = Task.objects.create(
+                user=cls.user,
+                title=f"Task {i}",
+                description="" if i % 2 else "details",
+                priority=["low", "medium", "high"][i % 3],
+                due_date=date(2026, 3, 1 + i % 28) if i % 4 else None,
+                due_time=time(18, 30) if i % 5 == 0 else None,
+            )
+            if i % 2:
+                task.tags.add(work, home)
+            for index in range(i % 3):
+                SubTask.objects.create(
+                    parent_task=task,
+                    title=f"Sub {index}",
+                    order_index=index,
+                    estimated_hours=Decimal("1.5") if index else None,
+                )
+
+    def lean_data(self, limit):
+        rows = (
+            Task.objects
+            .filter(user=self.user)
+            .values(*LeanTaskSerializer.value_fields)[:limit]
+        )
+        return LeanTaskSerializer(rows, many=True).data
+
+    def test_output_matches_task_serializer(self):
+        tasks = Task.objects.filter(user=self.user).prefetch_related("subtasks", "tags")
+        expected = TaskSerializer(tasks, many=True).data
+
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(self.lean_data(100)), renderer.render(expected))
+
+    def test_query_count_constant_as_page_grows(self):
+        for limit in (1, 10, 60):
+            with self.assertNumQueries(3):
+                data = self.lean_data(limit)
+            self.assertEqual(len(data), limit)
+
+    def test_task_list_endpoint_uses_lean_path(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        # count + page + subtasks + tags
+        with self.assertNumQueries(4):
+            response = client.get("/api/tasks/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 60)
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="keyset@example.com", username="keyset", password="pass12345"
+        )
+        # few distinct due dates (and NULLs) so pages split ties on the ordering key
+        for i in range(25):
+            Task.objects.create(
+                user=cls.user,
+                title=f"Keyset task {i}",
+                due_date=date(2026, 5, 1 + i % 3) if i % 4 else None,
+            )
+        refresh_search_documents(Task.objects.values_list("pk", flat=True))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([task["id"] for task in response.json()["results"]])
+            url = response.json()[link]
+        return pages
+
+    def test_pages_follow_ordering_with_ties(self):
+        expected = [
+            str(task.pk) for task in Task.objects.filter(user=self.user).order_by(
+                F("due_date").asc(nulls_last=True), "id"
+            )
+        ]
+
+        forward = self.walk("/api/tasks/?pagination=cursor&ordering=due_date", "next")
+        self.assertEqual([len(page) for page in forward], [10, 10, 5])
+        self.assertEqual(sum(forward, []), expected)
+
+        # and back again from the last page
+        last = self.client.get("/api/tasks/?pagination=cursor&ordering=due_date")
+        for _ in range(2):
+            last = self.client.get(last.json()["next"])
+        self.assertIsNone(last.json()["next"])
+        backward = self.walk(last.json()["previous"], "previous")
+        self.assertEqual(sum(reversed(backward), []), expected[:20])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/tasks/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_needs_page_numbers(self):
+        response = self.client.get("/api/tasks/", {"q": "keyset", "pagination": "cursor"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pagination", response.json())
+
+        response = self.client.get("/api/tasks/", {"q": "keyset"})
+        self.assertEqual(response.json()["count"], 25)
+
+
+class TaskReadCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="etag@example.com", username="etag", password="pass12345"
+        )
+        cls.other = User.objects.create_user(
+            email="etag-other@example.com", username="etag-other", password="pass12345"
+        )
+        cls.task = Task.objects.create(user=cls.user, title="Cached task")
+        Task.objects.create(user=cls.other, title="Someone else's task")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url="/api/tasks/", client=None, **headers):
+        return (client or self.client).get(url, headers=headers)
+
+    def test_etag_and_not_modified(self):
+        response = self.get()
+        etag = response["ETag"]
+        self.assertEqual(response.status_code, 200)
+
+        for header in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+            with self.subTest(header=header):
+                self.assertEqual(self.get(If_None_Match=header).status_code, 304)
+
+        # other tags, including ones that merely contain this one
+        for header in ('"stale"', f'"x{etag[1:-1]}x"', etag[:-2] + '"', f'W/"{etag}"'):
+            with self.subTest(header=header):
+                self.assertEqual(self.get(If_None_Match=header).status_code, 200)
+
+    def test_writes_bump_the_version(self):
+        url = f"/api/tasks/{self.task.pk}/"
+        etag = self.get(url)["ETag"]
+        list_etag = self.get()["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {"title": "Renamed"}, format="json")
+
+        response = self.get(url, If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "Renamed")
+        self.assertEqual(self.get(If_None_Match=list_etag).status_code, 200)
+        self.assertEqual(self.get()["ETag"], self.get()["ETag"])
+
+    def test_admin_writes_bump_the_version(self):
+        def stats():
+            counters = ("created", "completed", "cancelled", "overdue", "completion_seconds")
+            rows = DailyTaskStats.objects.order_by("user_id", "date").values("user_id", "date", *counters)
+            return [row for row in rows if any(row[counter] for counter in counters)]
+
+        rebuild_rollups()
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = [self.client.post("/api/tasks/", {"title": f"Admin {i}"}).json()["id"] for i in range(3)]
+            TaskTag.objects.create(task_id=ids[2], tag=Tag.objects.create(user=self.user, name="ops"))
+        other = APIClient()
+        other.force_authenticate(self.other)
+        task_admin, task_tag_admin = TaskAdmin(Task, admin.site), TaskTagAdmin(TaskTag, admin.site)
+
+        writes = [
+            lambda: task_admin.delete_model(None, Task.objects.get(pk=ids[0])),
+            lambda: task_tag_admin.delete_queryset(None, TaskTag.objects.filter(task_id=ids[2])),
+            lambda: task_admin.delete_queryset(None, Task.objects.filter(pk=ids[2])),
+        ]
+        for write in writes:
+            etag = self.get()["ETag"]
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            self.assertEqual(self.get(If_None_Match=etag).status_code, 200)
+
+        # moved to another user: both users' reads change
+        etags = self.get()["ETag"], self.get(client=other)["ETag"]
+        task = Task.objects.get(pk=ids[1])
+        task.user = self.other
+        with self.captureOnCommitCallbacks(execute=True):
+            task_admin.save_model(None, task, None, True)
+        self.assertEqual(self.get(If_None_Match=etags[0]).status_code, 200)
+        self.assertEqual(self.get(client=other, If_None_Match=etags[1]).status_code, 200)
+
+        incremental = stats()
+        rebuild_rollups()
+        self.assertEqual(stats(), incremental)
+
+    def test_entries_are_per_user(self):
+        etag = self.get()["ETag"]
+        other = APIClient()
+        other.force_authenticate(self.other)
+
+        response = self.get(client=other, If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [task["title"] for task in response.json()["results"]], ["Someone else's task"]
+        )
+        self.assertNotEqual(response["ETag"], etag)
+        # the other user's write leaves this user's entries valid
+        with self.captureOnCommitCallbacks(execute=True):
+            other.post("/api/tasks/", {"title": "New"}, format="json")
+        self.assertEqual(self.get(If_None_Match=etag).status_code, 304)
+
+
+class TaskSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="search@example.com", username="search", password="pass12345"
+        )
+        other = User.objects.create_user(email="other@example.com", password="pass12345")
+
+        Task.objects.create(user=cls.user, title="Write weekly report")
+        Task.objects.create(user=cls.user, title="Deploy release", description="staging first")
+        tagged = Task.objects.create(user=cls.user, title="Call bank")
+        tagged.tags.add(Tag.objects.create(user=cls.user, name="finance"))
+        Task.objects.create(user=other, title="Write weekly report")
+        refresh_search_documents(Task.objects.values_list("pk", flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get("/api/tasks/", {"q": query})
+        return [task["title"] for task in response.json()["results"]]
+
+    def test_prefix_and_tag_matches(self):
+        self.assertEqual(self.search("repo"), ["Write weekly report"])
+        self.assertEqual(self.search("financ"), ["Call bank"])
+        self.assertEqual(self.search("staging"), ["Deploy release"])
+
+    def test_typo_tolerant(self):
+        self.assertEqual(self.search("deplyo"), ["Deploy release"])
+
+    def test_migration_backfills_existing_tasks(self):
+        migration = import_module("apps.tasks.migrations.0004_task_search_document")
+        Task.objects.update(search_document="")
+        with connection.cursor() as cursor:
+            for table in migration.FTS_TABLES:
+                cursor.execute(f"DELETE FROM {table}")
+        self.assertEqual(self.search("repo"), [])
+
+        migration.backfill_search_documents(django_apps, mock.Mock(connection=connection), batch_size=2)
+        cache.clear()
+        self.assertEqual(self.search("repo"), ["Write weekly report"])
+        self.assertEqual(self.search("financ"), ["Call bank"])
+        self.assertEqual(self.search("deplyo"), ["Deploy release"])
+
+    def test_no_matches(self):
+        self.assertEqual(self.search("zzzz"), [])
+        self.assertEqual(self.search("!!"), [])
+
+    def test_created_task_is_found_by_its_tags(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post("/api/tasks/", {"title": "Renew passport", "tags": ["travel"]}, format="json")
+
+        self.assertEqual(self.search("travel"), ["Renew passport"])
+
+    def test_deleted_tag_leaves_the_index(self):
+        self.assertEqual(self.search("financ"), ["Call bank"])
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.get(user=self.user, name="finance").delete()
+
+        self.assertEqual(self.search("financ"), [])
+        self.assertEqual(self.search("bank"), ["Call bank"])
+
+    def test_cleared_tag_leaves_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.get(user=self.user, name="finance").tasks.clear()
+
+        self.assertEqual(self.search("financ"), [])
+        self.assertEqual(self.search("bank"), ["Call bank"])
+
+
+class TaskBulkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="bulk@example.com", username="bulk", password="pass12345"
+        )
+        cls.other = User.objects.create_user(
+            email="bulk-other@example.com", username="bulk-other", password="pass12345"
+        )
+        cls.task = Task.objects.create(user=cls.user, title="Mine")
+        cls.foreign = Task.objects.create(user=cls.other, title="Theirs")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, payload):
+        return self.client.post("/api/tasks/bulk/", payload, format="json")
+
+    def test_writes_everything(self):
+        doomed = Task.objects.create(user=self.user, title="Doomed")
+        response = self.bulk({
+            "create": [{"title": "New", "tags": ["work"], "subtasks": [{"title": "step"}]}],
+            "update": [{"id": str(self.task.pk), "priority": "high", "tags": ["home"]}],
+            "delete": [str(doomed.pk)],
+        })
+
+        self.assertEqual(response.status_code, 200)
+        created = Task.objects.get(pk=response.json()["create"][0]["id"])
+        self.assertEqual(list(created.tags.values_list("name", flat=True)), ["work"])
+        self.assertEqual(list(created.subtasks.values_list("title", flat=True)), ["step"])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.priority, "high")
+        self.assertEqual(list(self.task.tags.values_list("name", flat=True)), ["home"])
+        self.assertFalse(Task.objects.get(pk=doomed.pk).is_active)
+
+    def test_one_invalid_item_writes_nothing(self):
+        before = Task.objects.count()
+        response = self.bulk({
+            "create": [{"title": "Valid"}, {"title": ""}, {"title": "Valid too"}],
+            "update": [{"id": str(self.task.pk), "priority": "urgent"}],
+            "delete": [str(self.task.pk)],
+        })
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(set(errors["create"]), {"1"})
+        self.assertIn("title", errors["create"]["1"])
+        self.assertIn("priority", errors["update"]["0"])
+        self.assertNotIn("delete", errors)
+        self.assertEqual(Task.objects.count(), before)
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.is_active)
+        self.assertEqual(self.task.priority, "medium")
+
+    def test_other_users_tasks_are_not_found(self):
+        response = self.bulk({
+            "update": [{"id": str(self.task.pk), "title": "Ok"}, {"id": str(self.foreign.pk), "title": "Mine now"}],
+            "delete": [str(self.task.pk), str(self.foreign.pk)],
+        })
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors["update"], {"1": {"id": ["Not found."]}})
+        self.assertEqual(errors["delete"], {"1": ["Not found."]})
+        self.foreign.refresh_from_db()
+        self.assertEqual((self.foreign.title, self.foreign.is_active), ("Theirs", True))
+
+    def test_updates_cannot_carry_subtasks(self):
+        response = self.bulk({
+            "update": [{"id": str(self.task.pk), "subtasks": [{"title": "dropped"}]}],
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("subtasks", response.json()["update"]["0"])
+        self.assertFalse(self.task.subtasks.exists())
+
+    def test_creates_cannot_ask_for_duplicate_checks(self):
+        response = self.bulk({
+            "create": [{"title": "Fine"}, {"title": self.task.title, "on_duplicate": "merge"}],
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()["create"]), ["1"])
+        self.assertIn("on_duplicate", response.json()["create"]["1"])
+        self.assertFalse(Task.objects.filter(title="Fine").exists())
+
+
+class TaskTagWriteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="tags@example.com", username="tags", password="pass12345"
+        )
+
+    def create(self, tags):
+        serializer = TaskCreateUpdateSerializer(data={"title": "Tagged", "tags": tags})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save(user=self.user)
+
+    def update(self, task, tags):
+        serializer = TaskCreateUpdateSerializer(task, data={"tags": tags}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_create_query_count_independent_of_tag_count(self):
+        counts = []
+        for n in (1, 15):
+            names = [f"create-{n}-{i}" for i in range(n)]
+            with CaptureQueriesContext(connection) as queries:
+                task = self.create(names)
+            counts.append(len(queries))
+            self.assertEqual(sorted(task.tags.values_list("name", flat=True)), sorted(names))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_update_query_count_independent_of_tag_count(self):
+        counts = []
+        for n in (2, 10):
+            task = self.create([f"old-{i}" for i in range(n)])
+            names = [f"old-{i}" for i in range(0, n, 2)] + [f"new-{n}-{i}" for i in range(n)]
+            with CaptureQueriesContext(connection) as queries:
+                self.update(task, names)
+            counts.append(len(queries))
+            self.assertEqual(sorted(task.tags.values_list("name", flat=True)), sorted(names))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_update_only_writes_changed_links(self):
+        task = self.create(["Work", "home", " work "])
+        kept = TaskTag.objects.get(task=task, tag__name="work")
+
+        self.update(task, ["work", "errands"])
+
+        self.assertTrue(TaskTag.objects.filter(pk=kept.pk).exists())
+        self.assertEqual(
+            sorted(task.tags.values_list("name", flat=True)), ["errands", "work"]
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 3)
+
+
+class SubtaskOrderingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="ranks@example.com", username="ranks", password="pass12345"
+        )
+        cls.task = Task.objects.create(user=cls.user, title="Ordered")
+        cls.subtasks = SubTask.objects.bulk_create([
+            SubTask(parent_task=cls.task, title=name, order_index=spread(index))
+            for index, name in enumerate("abcd")
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def titles(self):
+        return "".join(self.task.subtasks.order_by("order_index").values_list("title", flat=True))
+
+    def subtask(self, title):
+        return SubTask.objects.get(parent_task=self.task, title=title)
+
+    def test_rank_between(self):
+        self.assertEqual(rank_between(None, None), ORDER_STEP)
+        self.assertEqual(rank_between(None, ORDER_STEP), ORDER_STEP // 2)
+        self.assertEqual(rank_between(ORDER_STEP, None), 2 * ORDER_STEP)
+        self.assertEqual(rank_between(10, 20), 15)
+        self.assertIsNone(rank_between(10, 11))
+        self.assertIsNone(rank_between(None, 0))
+        self.assertIsNone(rank_between(MAX_ORDER_INDEX, None))
+
+    def test_rebalance(self):
+        set_order_indexes(SubTask.objects.all(), {
+            subtask.pk: rank for subtask, rank in zip(self.subtasks, (1, 2, 3, 7))
+        })
+
+        self.assertEqual(rebalance(self.task.pk), 4)
+        self.assertEqual(
+            list(self.task.subtasks.order_by("order_index").values_list("order_index", flat=True)),
+            [spread(index) for index in range(4)],
+        )
+        self.assertEqual(self.titles(), "abcd")
+
+    def test_move_writes_one_row(self):
+        a, c = self.subtask("a"), self.subtask("c")
+        with self.assertNumQueries(2):  # next sibling's rank + the update
+            move_after(a, c)
+        self.assertEqual(self.titles(), "bcad")
+
+    def test_move_to_head_and_tail(self):
+        move_after(self.subtask("c"), None)
+        self.assertEqual(self.titles(), "cabd")
+
+        move_after(self.subtask("a"), self.subtask("d"))
+        self.assertEqual(self.titles(), "cbda")
+        self.assertEqual(self.subtask("a").order_index, spread(3) + ORDER_STEP)
+
+    def test_exhausted_gap_rebalances(self):
+        set_order_indexes(SubTask.objects.all(), {
+            subtask.pk: rank for subtask, rank in zip(self.subtasks, (0, 1, 2, 3))
+        })
+
+        move_after(self.subtask("d"), self.subtask("a"))
+        self.assertEqual(self.titles(), "adbc")
+        self.assertEqual(self.subtask("b").order_index, spread(1))
+
+        # no room before the first rank either
+        set_order_indexes(SubTask.objects.all(), {self.subtask("a").pk: 0})
+        move_after(self.subtask("c"), None)
+        self.assertEqual(self.titles(), "cadb")
+
+    def test_move_after_a_tied_sibling(self):
+        # a and b share a rank: the moved subtask must not land after both
+        set_order_indexes(SubTask.objects.all(), {self.subtask("b").pk: spread(0)})
+
+        move_after(self.subtask("d"), self.subtask("a"))
+        ranks = list(self.task.subtasks.values_list("order_index", flat=True))
+        self.assertEqual(len(set(ranks)), 4)
+        self.assertIn("ad", self.titles())
+        self.assertEqual(self.titles()[-1], "c")
+
+    def test_move_endpoint(self):
+        a, d = self.subtask("a"), self.subtask("d")
+        response = self.client.post(f"/api/subtasks/{a.pk}/move/", {"after": str(d.pk)}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.titles(), "bcda")
+
+        response = self.client.post(f"/api/subtasks/{a.pk}/move/", {"after": None}, format="json")
+        self.assertEqual(response.json()["order_index"], self.subtask("a").order_index)
+        self.assertEqual(self.titles(), "abcd")
+
+    def test_reorder_takes_dense_positions(self):
+        order = [self.subtask(title) for title in "dbca"]
+        stranger = User.objects.create_user(email="ranks-2@example.com", password="pass12345")
+        foreign = SubTask.objects.create(
+            parent_task=Task.objects.create(user=stranger, title="Theirs"), title="x", order_index=5
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/subtasks/reorder/",
+                [{"id": str(subtask.pk), "order_index": index} for index, subtask in enumerate(order)]
+                + [{"id": str(foreign.pk), "order_index": 0}],
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([q["sql"].split()[0] for q in queries].count("UPDATE"), 1)
+        self.assertEqual(self.titles(), "dbca")
+        # stored sparse: a later single move fits between any two neighbours
+        self.assertEqual(self.subtask("b").order_index, spread(1))
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.order_index, 5)
+
+
+class TaskDependencyGraphTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="graph@example.com", username="graph", password="pass12345"
+        )
+        cls.a = Task.objects.create(user=cls.user, title="A", status="completed")
+        cls.b = Task.objects.create(user=cls.user, title="B")
+        cls.c = Task.objects.create(user=cls.user, title="C")
+        cls.d = Task.objects.create(user=cls.user, title="D")
+        SubTask.objects.create(parent_task=cls.b, title="b1", estimated_hours=Decimal("2"))
+        SubTask.objects.create(
+            parent_task=cls.b, title="b2", status="completed", estimated_hours=Decimal("5")
+        )
+        SubTask.objects.create(parent_task=cls.c, title="c1", estimated_hours=Decimal("1"))
+        SubTask.objects.create(parent_task=cls.d, title="d1", estimated_hours=Decimal("2.5"))
+
+    def setUp(self):
+        # the change log outlives each test's rollback; an empty log makes
+        # this worker's cached graph rebuild from the database
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def depend(self, task, depends_on):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                f"/api/tasks/{task.pk}/dependencies/", {"depends_on": str(depends_on.pk)}
+            )
+
+    def test_cycle_rejected(self):
+        self.assertEqual(self.depend(self.b, self.a).status_code, 201)
+        self.assertEqual(self.depend(self.c, self.b).status_code, 201)
+
+        response = self.depend(self.a, self.c)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"depends_on": ["Dependency would create a cycle"]})
+        self.assertEqual(self.depend(self.b, self.b).status_code, 400)
+        self.assertEqual(self.depend(self.b, self.a).status_code, 400)
+        self.assertEqual(TaskDependency.objects.count(), 2)
+
+    def test_graph_analysis(self):
+        self.depend(self.b, self.a)
+        self.depend(self.c, self.b)
+
+        data = self.client.get("/api/tasks/graph/").json()
+        ids = lambda *tasks: [str(task.pk) for task in tasks]  # noqa: E731
+        self.assertEqual(data["order"], ids(self.a, self.b, self.c, self.d))
+        self.assertEqual(data["blocked"], ids(self.c))
+        self.assertEqual(data["unblocked"], ids(self.b, self.d))
+        self.assertEqual(data["critical_path"], {"tasks": ids(self.b, self.c), "hours": 3.0})
+
+    def test_removal_reaches_cached_graph(self):
+        self.depend(self.c, self.b)
+        self.assertEqual(get_graph(self.user.pk).depends_on[self.c.pk], {self.b.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/api/tasks/{self.c.pk}/dependencies/{self.b.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(get_graph(self.user.pk).depends_on[self.c.pk], set())
+        self.assertEqual(self.depend(self.b, self.c).status_code, 201)
+
+    def test_cycle_check_ignores_a_stale_worker_graph(self):
+        get_graph(self.user.pk)  # this worker's graph, before...
+        # ...another worker's edge whose change log entry it hasn't seen
+        TaskDependency.objects.create(task=self.c, depends_on=self.b)
+        self.assertEqual(get_graph(self.user.pk).depends_on[self.c.pk], set())
+
+        response = self.depend(self.b, self.c)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(TaskDependency.objects.count(), 1)
+
+    @override_settings(TASK_GRAPH_CACHE=False)
+    def test_graph_loaded_per_read_without_shared_cache(self):
+        get_graph(self.user.pk)
+        TaskDependency.objects.create(task=self.c, depends_on=self.b)
+        self.assertEqual(get_graph(self.user.pk).depends_on[self.c.pk], {self.b.pk})
+
+    def test_remove_accepts_uppercase_ids(self):
+        self.depend(self.c, self.b)
+        response = self.client.delete(
+            f"/api/tasks/{self.c.pk}/dependencies/{str(self.b.pk).upper()}/"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(TaskDependency.objects.exists())
+
+    def test_cte_matches_memory(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            add_dependency(self.b, self.a)
+            add_dependency(self.c, self.b)
+        graph = get_graph(self.user.pk)
+        tasks = [self.a, self.b, self.c, self.d]
+        for task in tasks:
+            for depends_on in tasks:
+                self.assertEqual(
+                    graph.would_cycle(task.pk, depends_on.pk),
+                    would_cycle_sql(task.pk, depends_on.pk),
+                )
+
+
+class TaskDuplicateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="dupes@example.com", username="dupes", password="pass12345"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, title, **extra):
+        return self.client.post("/api/tasks/", {"title": title, **extra}, format="json")
+
+    def test_signature_similarity(self):
+        report = signature("Write the weekly status report")
+        self.assertGreater(similarity(report, signature("write the weekly status reports")), 0.7)
+        self.assertLess(similarity(report, signature("Book flights to Berlin")), 0.3)
+
+    def test_create_indexes_and_flags_duplicates(self):
+        first = self.create("Write the weekly status report").json()
+        self.assertNotIn("possible_duplicates", first)
+        self.assertEqual(TaskLSHBucket.objects.filter(task_id=first["id"]).count(), 16)
+
+        response = self.create("write the weekly status reports", on_duplicate="flag")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([d["id"] for d in response.json()["possible_duplicates"]], [first["id"]])
+        self.assertFalse(response.json()["merged"])
+
+        self.create("Book flights to Berlin")
+        response = self.client.get("/api/tasks/duplicates/")
+        groups = response.json()["groups"]
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(groups[0][0]["id"], first["id"])
+        self.assertEqual(len(groups[0]), 2)
+
+    def test_merge_adds_tags_and_subtasks_to_existing(self):
+        first = self.create("Renew passport", tags=["admin"]).json()
+        response = self.create(
+            "renew passport", on_duplicate="merge", tags=["travel"], subtasks=[{"title": "photos"}]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], first["id"])
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 1)
+        task = Task.objects.get(pk=first["id"])
+        self.assertEqual(sorted(task.tags.values_list("name", flat=True)), ["admin", "travel"])
+        self.assertEqual(list(task.subtasks.values_list("title", flat=True)), ["photos"])
+
+    def test_edits_and_deletes_update_the_index(self):
+        task = self.create("Renew passport").json()
+        self.client.patch(f"/api/tasks/{task['id']}/", {"title": "Plan team offsite"}, format="json")
+        minhash = signature("renew passport")
+        self.assertEqual(find_duplicates(self.user.pk, minhash), [])
+        self.assertEqual(len(find_duplicates(self.user.pk, signature("plan team offsite"))), 1)
+
+        self.client.delete(f"/api/tasks/{task['id']}/")
+        self.assertEqual(find_duplicates(self.user.pk, signature("plan team offsite")), [])
+
+    def test_migration_backfills_existing_tasks(self):
+        migration = import_module("apps.tasks.migrations.0007_task_minhash_lsh_buckets")
+        # written before the index existed: no signature, no buckets
+        Task.objects.bulk_create([
+            Task(user=self.user, title="Renew the car insurance"),
+            Task(user=self.user, title="renew car insurance"),
+            Task(user=self.user, title="Book flights to Berlin"),
+        ])
+        self.assertEqual(find_duplicates(self.user.pk, signature("renew the car insurance")), [])
+
+        migration.backfill_duplicate_index(django_apps, mock.Mock(connection=connection), batch_size=2)
+        self.assertEqual(TaskLSHBucket.objects.filter(task__user=self.user).count(), 3 * 16)
+        self.assertEqual(len(find_duplicates(self.user.pk, signature("renew the car insurance"))), 2)
+
+    def test_bulk_create_is_indexed(self):
+        self.client.post("/api/tasks/bulk/", {"create": [{"title": "Pay the monthly rent"}]}, format="json")
+        self.assertEqual(len(find_duplicates(self.user.pk, signature("pay the monthly rent"))), 1)
+
+
+class AsyncReadViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="async-reads@example.com", username="asyncreads", password="pass12345"
+        )
+        other = User.objects.create_user(email="async-other@example.com", password="pass12345")
+        work = Tag.objects.create(user=cls.user, name="work")
+        cls.tasks = []
+        for i in range(14):
+            task = Task.objects.create(
+                user=cls.user, title=f"Task {i}", priority=["low", "medium", "high"][i % 3]
+            )
+            if i % 2:
+                task.tags.add(work)
+            SubTask.objects.create(parent_task=task, title=f"Sub {i}", order_index=0)
+            cls.tasks.append(task)
+        cls.other_task = Task.objects.create(user=other, title="Not yours")
+
+        # the router's views with the async reads, as apps.tasks.urls wires them up
+        views = {
+            pattern.name: pattern.callback
+            for pattern in with_async_reads(router.urls, {
+                "task-list": async_task_list,
+                "task-detail": async_task_detail,
+                "subtasks-list": async_subtask_list,
+            })
+            if "format" not in pattern.pattern.regex.groupindex
+        }
+        cls.list_view, cls.detail_view = views["task-list"], views["task-detail"]
+        cls.subtask_view = views["subtasks-list"]
+
+    def setUp(self):
+        cache.clear()
+        self.token = f"Bearer {AccessToken.for_user(self.user)}"
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.token)
+
+    def get(self, view, path, params=None, token=True, headers=None, **kwargs):
+        headers = dict(headers or {}, Authorization=self.token) if token else {}
+        request = AsyncRequestFactory().get(path, params or {}, headers=headers)
+        return async_to_sync(view)(request, **kwargs)
+
+    def assertSameResponse(self, view, path, params=None, **kwargs):
+        expected = self.client.get(path, params or {})
+        response = self.get(view, path, params, **kwargs)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), expected.json())
+        return response
+
+    @override_settings(TASK_RESPONSE_CACHE=False)
+    def test_task_list_matches_sync_view(self):
+        for params in ({}, {"page": 2}, {"priority": "high", "ordering": "-created_at"},
+                       {"pagination": "cursor"}, {"q": "task"}, {"page": 9}):
+            with self.subTest(params=params):
+                self.assertSameResponse(self.list_view, "/api/tasks/", params)
+
+        first = self.get(self.list_view, "/api/tasks/", {"pagination": "cursor"})
+        cursor = json.loads(first.content)["next"].split("cursor=")[1]
+        self.assertSameResponse(self.list_view, "/api/tasks/", {"cursor": cursor})
+
+    @override_settings(TASK_RESPONSE_CACHE=False)
+    def test_task_detail_matches_sync_view(self):
+        for pk in (self.tasks[1].pk, self.other_task.pk, "not-a-uuid"):
+            with self.subTest(pk=pk):
+                self.assertSameResponse(self.detail_view, f"/api/tasks/{pk}/", pk=pk)
+
+    def test_subtask_list_matches_sync_view(self):
+        self.assertSameResponse(self.subtask_view, "/api/subtasks/")
+
+    @override_settings(TASK_RESPONSE_CACHE=False)
+    def test_reads_use_the_async_orm(self):
+        self.get(self.list_view, "/api/tasks/")  # caches the user snapshot
+
+        # count + page + subtasks + tags, as on the sync path
+        with self.assertNumQueries(4):
+            response = self.get(self.list_view, "/api/tasks/")
+        self.assertEqual(json.loads(response.content)["count"], 14)
+
+    def test_unauthenticated(self):
+        response = self.get(self.list_view, "/api/tasks/", token=False)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="api"')
+
+    def test_response_cache_is_shared_with_sync_views(self):
+        response = self.get(self.list_view, "/api/tasks/")
+        self.assertEqual(response["ETag"], self.client.get("/api/tasks/")["ETag"])
+
+        response = self.get(self.list_view, "/api/tasks/", headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+
+
+class BenchEndpointsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, "report.json")
+
+    def bench(self, **options):
+        call_command(
+            "bench_endpoints", scales="100", repeat=1, warmup=1, output=self.output,
+            stdout=io.StringIO(), stderr=io.StringIO(), **options
+        )
+        with open(self.output) as fh:
+            return json.load(fh)
+
+    def test_seed_dataset(self):
+        user = get_bench_user("seed")
+        counts = seed_dataset(user, 50)
+
+        self.assertEqual(counts["tasks"], 50)
+        self.assertEqual(SubTask.objects.filter(parent_task__user=user).count(), counts["subtasks"])
+        self.assertEqual(TaskDependency.objects.filter(task__user=user).count(), counts["dependencies"])
+        # as if created through the API: search documents with the tag names, duplicate index
+        task = Task.objects.filter(user=user, tags__isnull=False).first()
+        tags = list(task.tags.values_list("name", flat=True))
+        self.assertEqual(sorted(task.search_document.split()), sorted(build_document(task.title, task.description, tags).split()))
+        self.assertEqual(bytes(task.minhash), signature(task.title, task.description))
+        self.assertCountEqual(
+            TaskLSHBucket.objects.filter(task=task).values_list("key", flat=True), band_keys(task.minhash)
+        )
+
+    def test_every_route_within_budget(self):
+        report = self.bench()
+
+        routes = report["scales"]["100"]["routes"]
+        self.assertIn("POST google_login", routes)
+        self.assertEqual(report["breaches"], [])
+        self.assertTrue(all(result["runs"] == 1 and not result["errors"] for result in routes.values()))
+
+    def test_threshold_breach_fails_the_run(self):
+        thresholds = os.path.join(self.directory, "thresholds.json")
+        with open(thresholds, "w") as fh:
+            json.dump({"GET task-detail": {"queries": 1}}, fh)
+
+        with self.assertRaises(CommandError):
+            self.bench(routes="GET task-detail", thresholds=thresholds)
+        with open(self.output) as fh:
+            self.assertEqual(len(json.load(fh)["breaches"]), 1)
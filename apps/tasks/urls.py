@@ -1,11 +1,22 @@
 from rest_framework.routers import DefaultRouter
+from django.conf import settings
 from django.urls import path, include
-from .views import TaskViewSet, SubTaskViewSet
+from apps.common.async_views import with_async_reads
+from .views import TaskViewSet, SubTaskViewSet, async_subtask_list, async_task_detail, async_task_list
 
 router = DefaultRouter()
 router.register(r"tasks", TaskViewSet, basename="task")
 router.register(r"subtasks", SubTaskViewSet, basename="subtasks")
 
+router_urls = router.urls
+if settings.ASYNC_READ_VIEWS:
+    # under ASGI the hot reads run on the async ORM; writes stay on the viewsets
+    router_urls = with_async_reads(router_urls, {
+        "task-list": async_task_list,
+        "task-detail": async_task_detail,
+        "subtasks-list": async_subtask_list,
+    })
+
 urlpatterns = [
-    path("", include(router.urls)),
-]
\ No newline at end of file
+    path("", include(router_urls)),
+]
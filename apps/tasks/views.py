@@ -1,26 +1,40 @@
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.db import transaction
-from .models import Task, SubTask
+from .models import Task, SubTask, TaskDependency
 from .serializers import (
     TaskSerializer,
+    LeanTaskSerializer,
     TaskCreateUpdateSerializer,
-    SubTaskSerializer
+    TaskBulkSerializer,
+    SubTaskSerializer,
+    SubTaskReorderSerializer,
+    TaskDependencySerializer
 )
-from .filters import TaskFilter
+from .ordering import move_after, next_order_index, set_order_indexes, spread
+from .filters import TaskFilter, TaskSearchBackend
 from rest_framework.filters import OrderingFilter, SearchFilter
 from .permissions import IsOwnerOrReadOnly
+from .cache import CachedReadMixin, acached_response, bump_data_version
+from .graph import analyze
+from .duplicates import DUPLICATE_THRESHOLD, duplicate_groups
+from apps.analytics.rollups import record_task_changes, snapshot
+from apps.common.async_views import render
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(CachedReadMixin, viewsets.ModelViewSet):
     filter_backends = [
         DjangoFilterBackend,
         OrderingFilter,
-        SearchFilter
+        SearchFilter,
+        TaskSearchBackend
     ]
     filterset_class = TaskFilter
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
@@ -29,16 +43,25 @@ class TaskViewSet(viewsets.ModelViewSet):
     ordering_fields = ["due_date", "priority", "created_at"]
 
     def get_queryset(self):
+        queryset = Task.objects.filter(user=self.request.user, is_active=True)
+
+        if self.action == "list":
+            # plain rows; LeanTaskSerializer fetches tags/subtasks per page
+            return queryset.values(*LeanTaskSerializer.value_fields)
+
         return (
-            Task.objects
-            .filter(user=self.request.user, is_active=True)
+            queryset
+            .select_related("user")
             .prefetch_related(
                 "subtasks",
                 "tags"
             )
             .only(
                 "id", "title", "description", "priority",
-                "status", "due_date", "created_at"
+                "status", "due_date", "due_time", "created_at",
+                "updated_at", "user__username",
+                # rollup state, see apps.analytics.rollups.snapshot
+                "completed_at", "cancelled_at", "is_active"
             )
         )
 
@@ -46,6 +69,8 @@ class TaskViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
             return TaskCreateUpdateSerializer
+        if self.action == "list":
+            return LeanTaskSerializer
         return TaskSerializer
     
     def create(self, request, *args, **kwargs):
@@ -58,10 +83,16 @@ class TaskViewSet(viewsets.ModelViewSet):
             serializer.instance,
             context={"request": request}
         )
+        data = read_serializer.data
+        if serializer.validated_data["on_duplicate"] != "allow":
+            data["possible_duplicates"] = serializer.duplicates
+            data["merged"] = serializer.merged
+            if serializer.merged:
+                return Response(data, status=status.HTTP_200_OK)
 
-        headers = self.get_success_headers(read_serializer.data)
+        headers = self.get_success_headers(data)
         return Response(
-            read_serializer.data,
+            data,
             status=status.HTTP_201_CREATED,
             headers=headers
         )
@@ -87,17 +118,90 @@ class TaskViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        bump_data_version(self.request.user.pk)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        bump_data_version(self.request.user.pk)
 
     def perform_destroy(self, instance):
-        instance.is_active = False
-        instance.save(update_fields=["is_active"])
+        with transaction.atomic():
+            before = snapshot(instance)
+            instance.is_active = False
+            instance.save(update_fields=["is_active"])
+            record_task_changes(instance.user_id, [(before, snapshot(instance))])
+            bump_data_version(instance.user_id)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Create / update / soft delete many tasks in one transaction
+        """
+        serializer = TaskBulkSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        return Response(results, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"])
+    def graph(self, request):
+        """
+        Dependency order, blocked / startable tasks and the critical path
+        """
+        return Response(analyze(request.user.pk))
+
+    @action(detail=False, methods=["get"])
+    def duplicates(self, request):
+        """
+        Groups of near-duplicate active tasks (?threshold=0.7 estimated
+        Jaccard similarity of title + description)
+        """
+        try:
+            threshold = float(request.query_params.get("threshold", DUPLICATE_THRESHOLD))
+        except ValueError:
+            threshold = None
+        if threshold is None or not 0 < threshold <= 1:
+            return Response(
+                {"threshold": ["Must be a number in (0, 1]."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        groups = duplicate_groups(request.user.pk, threshold)
+        return Response({"count": len(groups), "groups": groups})
+
+    @action(detail=True, methods=["get", "post"])
+    def dependencies(self, request, pk=None):
+        task = self.get_object()
+
+        if request.method == "GET":
+            serializer = TaskDependencySerializer(task.dependencies.all(), many=True)
+            return Response(serializer.data)
+
+        serializer = TaskDependencySerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save(task=task)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=True,
+        methods=["delete"],
+        url_path=r"dependencies/(?P<depends_on_id>[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})"
+    )
+    def remove_dependency(self, request, pk=None, depends_on_id=None):
+        task = self.get_object()
+        dependency = get_object_or_404(TaskDependency, task=task, depends_on_id=depends_on_id)
+        dependency.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=["post"])
     def complete(self, request, pk=None):
         task = self.get_object()
-        task.status = "completed"
-        task.completed_at = timezone.now()
-        task.save(update_fields=["status", "completed_at"])
+        with transaction.atomic():
+            before = snapshot(task)
+            task.status = "completed"
+            task.completed_at = timezone.now()
+            task.save(update_fields=["status", "completed_at", *task.stamp_status()])
+            record_task_changes(task.user_id, [(before, snapshot(task))])
+            bump_data_version(task.user_id)
         return Response(TaskSerializer(task, context={"request": request}).data)
 
     @action(detail=True, methods=["get", "post"])
@@ -110,7 +214,11 @@ class TaskViewSet(viewsets.ModelViewSet):
 
         serializer = SubTaskSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(parent_task=task)
+        order_index = serializer.validated_data.get("order_index")
+        if order_index is None:
+            order_index = next_order_index(task.pk)
+        serializer.save(parent_task=task, order_index=order_index)
+        bump_data_version(task.user_id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
@@ -129,7 +237,11 @@ class SubTaskViewSet(viewsets.ModelViewSet):
             user=self.request.user
         )
 
-        serializer.save(parent_task=task)
+        order_index = serializer.validated_data.get("order_index")
+        if order_index is None:
+            order_index = next_order_index(task.pk)
+        serializer.save(parent_task=task, order_index=order_index)
+        bump_data_version(self.request.user.pk)
 
     def perform_update(self, serializer):
         instance = serializer.instance
@@ -141,20 +253,116 @@ class SubTaskViewSet(viewsets.ModelViewSet):
             serializer.save(completed_at=None)
         else:
             serializer.save()
+        bump_data_version(self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        bump_data_version(self.request.user.pk)
 
     @action(detail=False, methods=["post"])
     def reorder(self, request):
         """
-        Reorder subtasks (drag & drop)
+        Reorder subtasks (drag & drop) - any permutation, one UPDATE
         """
-        data = request.data
+        serializer = SubTaskReorderSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        # client positions are dense (0, 1, 2...); store them spread out so
+        # later single moves have room between neighbours
+        ranks = {
+            item["id"]: spread(item["order_index"])
+            for item in serializer.validated_data
+        }
 
         with transaction.atomic():
-            for item in data:
-                SubTask.objects.filter(
-                    id=item["id"],
-                    parent_task__user=request.user
-                ).update(order_index=item["order_index"])
+            set_order_indexes(
+                SubTask.objects.filter(parent_task__user=request.user),
+                ranks
+            )
+            bump_data_version(request.user.pk)
 
         return Response({"message": "Subtasks reordered successfully"}, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=["post"])
+    def move(self, request, pk=None):
+        """
+        Move one subtask after a sibling: {"after": <subtask id> | null (top)}
+        Updates only the moved row.
+        """
+        subtask = self.get_object()
+        after_id = request.data.get("after")
+        after = None
+        if after_id:
+            after = get_object_or_404(
+                SubTask,
+                id=after_id,
+                parent_task_id=subtask.parent_task_id
+            )
+
+        with transaction.atomic():
+            move_after(subtask, after)
+            bump_data_version(request.user.pk)
+
+        return Response(SubTaskSerializer(subtask).data)
+
+
+# Async reads for the ASGI app (settings.ASYNC_READ_VIEWS, see apps.tasks.urls):
+# the viewsets' list / retrieve on the async ORM. Waiting on the database
+# then holds a coroutine instead of a worker thread.
+
+def read_viewset(viewset, request, action, **kwargs):
+    """`viewset` set up for `action` the way as_view() would, permissions checked."""
+    view = viewset(request=request, args=(), kwargs=kwargs, action=action, format_kwarg=None)
+    view.check_permissions(request)
+    return view
+
+
+async def afilter_queryset(view):
+    queryset = view.get_queryset()
+    if (
+        TaskSearchBackend in view.filter_backends
+        and TaskSearchBackend.search_param in view.request.query_params
+    ):
+        # the SQLite search backend queries its index while filtering
+        return await sync_to_async(view.filter_queryset)(queryset)
+    return view.filter_queryset(queryset)
+
+
+async def async_task_list(request):
+    """GET /api/tasks/ - TaskViewSet.list on the async ORM."""
+    view = read_viewset(TaskViewSet, request, "list")
+
+    async def data():
+        queryset = await afilter_queryset(view)
+        page = await view.paginator.apaginate_queryset(queryset, request, view)
+        results = await view.get_serializer(page, many=True).ato_representation(page)
+        return view.paginator.get_paginated_response(results).data
+
+    return await acached_response(data, request, view.response_cache_timeout)
+
+
+async def async_task_detail(request, pk):
+    """GET /api/tasks/{id}/ - TaskViewSet.retrieve on the async ORM."""
+    view = read_viewset(TaskViewSet, request, "retrieve", pk=pk)
+
+    async def data():
+        queryset = await afilter_queryset(view)
+        try:
+            task = await queryset.aget(pk=pk)
+        except Task.DoesNotExist:
+            raise Http404("No Task matches the given query.")
+        except (DjangoValidationError, TypeError, ValueError):
+            raise Http404
+        view.check_object_permissions(request, task)
+        return view.get_serializer(task).data
+
+    return await acached_response(data, request, view.response_cache_timeout)
+
+
+async def async_subtask_list(request):
+    """GET /api/subtasks/ - SubTaskViewSet.list on the async ORM."""
+    view = read_viewset(SubTaskViewSet, request, "list")
+    queryset = await afilter_queryset(view)
+    page = await view.paginator.apaginate_queryset(queryset, request, view)
+    results = view.get_serializer(page, many=True).data
+    return render(view.paginator.get_paginated_response(results).data)
@@ -0,0 +1,219 @@
+"""
+Refresh-token blacklist on top of simplejwt's token_blacklist app.
+
+With ROTATE_REFRESH_TOKENS + BLACKLIST_AFTER_ROTATION every refresh
+blacklists the old token, so both tables grow with every refresh.
+`BlacklistFilter` keeps the blacklisted jtis in a per-process Bloom
+filter so that most membership checks never reach the table, and
+`purge_expired_tokens` deletes tokens past their expiry in batches.
+
+The filters learn about tokens blacklisted by other processes through a
+counter in the cache, so they need a cache shared by every process;
+AUTH_BLACKLIST_FILTER turns them off (prod does on LocMemCache).
+"""
+import hashlib
+import math
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+VERSION_KEY = "users:blacklist:version"  # counter, +1 whenever a token is blacklisted
+GENERATION_KEY = "users:blacklist:generation"  # changes when tokens are purged
+
+# ids are assigned at insert but become visible at commit, so an id skipped
+# by a sync may still show up; skipped ids are re-read for this many seconds
+# (rolled back inserts leave gaps that never fill)
+GAP_TIMEOUT = 60
+# ids below the highest at a rebuild that are treated as possible gaps
+REBUILD_GAP_WINDOW = 100
+
+
+class BloomFilter:
+    """Set membership with no false negatives and ~`error_rate` false positives."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, value):
+        # double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+
+def shared_state():
+    """(version, generation) from the cache; a missing key gets a new random value."""
+    values = cache.get_many([VERSION_KEY, GENERATION_KEY])
+    # random starting points, so an evicted key always forces a sync / rebuild
+    for key, initial in ((VERSION_KEY, random.getrandbits(48)), (GENERATION_KEY, uuid.uuid4().hex)):
+        if key not in values:
+            cache.add(key, initial, None)
+            values[key] = cache.get(key)
+    return values[VERSION_KEY], values[GENERATION_KEY]
+
+
+def bump_blacklist_version(jti):
+    """Announce that `jti` was blacklisted, once the current transaction commits."""
+    if not settings.AUTH_BLACKLIST_FILTER:
+        return
+
+    def bump():
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            shared_state()
+            version = cache.incr(VERSION_KEY)
+        get_filter().record(jti, version)
+
+    transaction.on_commit(bump)
+
+
+def bump_blacklist_generation():
+    transaction.on_commit(lambda: cache.set(GENERATION_KEY, uuid.uuid4().hex, None))
+
+
+class BlacklistFilter:
+    """
+    Per-process Bloom filter of the unexpired blacklisted jtis.
+
+    Before answering, the filter compares the shared version in the cache
+    with the one it last synced: if another process blacklisted a token
+    since, the rows above the highest id seen (plus any recent gaps) are
+    loaded first; if tokens were purged, the filter is rebuilt. So a
+    negative answer is safe to trust, and a positive one is confirmed
+    against the table by the caller.
+
+    Tokens this process blacklisted itself are added directly (`record`),
+    so version steps that are all its own need no sync: with rotation,
+    each refresh would otherwise pay for a sync instead of the check.
+    """
+
+    def __init__(self, error_rate=0.01, min_capacity=100_000):
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.bloom = None
+        self.last_id = 0
+        self.gaps = {}  # id -> when it was first skipped
+        self.own = set()  # versions bumped by this process
+        self.version = None
+        self.generation = None
+        self._lock = threading.Lock()
+
+    def might_contain(self, jti):
+        version, generation = shared_state()
+        with self._lock:
+            if self.bloom is None or generation != self.generation:
+                self._rebuild()
+            elif version != self.version and not self._only_own(version):
+                self._sync()
+            self.version, self.generation = version, generation
+            self.own = {own for own in self.own if own > version}
+            return jti in self.bloom
+
+    def record(self, jti, version):
+        with self._lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+                self.own.add(version)
+
+    def _only_own(self, version):
+        if not isinstance(self.version, int) or not 0 < version - self.version <= len(self.own):
+            return False
+        return all(step in self.own for step in range(self.version + 1, version + 1))
+
+    def _load(self, queryset):
+        seen = set()
+        rows = queryset.order_by().values_list("pk", "token__jti").iterator(chunk_size=10_000)
+        for pk, jti in rows:
+            self.bloom.add(jti)
+            seen.add(pk)
+        return seen
+
+    def _rebuild(self):
+        live = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        self.bloom = BloomFilter(max(self.min_capacity, 2 * live.count()), self.error_rate)
+        # the highest id ever, not just the highest live one, so gaps are real gaps
+        self.last_id = BlacklistedToken.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+        self.gaps = {}
+        seen = self._load(live.filter(pk__lte=self.last_id))
+        # recent ids may belong to inserts that commit after this read
+        now = time.monotonic()
+        for pk in range(max(self.last_id - REBUILD_GAP_WINDOW, 0) + 1, self.last_id + 1):
+            if pk not in seen:
+                self.gaps[pk] = now
+
+    def _sync(self):
+        now = time.monotonic()
+        self.gaps = {pk: since for pk, since in self.gaps.items() if now - since < GAP_TIMEOUT}
+        seen = self._load(BlacklistedToken.objects.filter(Q(pk__gt=self.last_id) | Q(pk__in=list(self.gaps))))
+
+        for pk in seen:
+            self.gaps.pop(pk, None)
+        if seen:
+            highest = max(seen)
+            for pk in range(self.last_id + 1, highest):
+                if pk not in seen:
+                    self.gaps[pk] = now
+            self.last_id = max(self.last_id, highest)
+
+        if self.bloom.count > self.bloom.capacity:
+            self._rebuild()
+
+
+_filter = None
+_filter_lock = threading.Lock()
+
+
+def get_filter():
+    global _filter
+    with _filter_lock:
+        if _filter is None:
+            _filter = BlacklistFilter()
+        return _filter
+
+
+def purge_expired_tokens(batch_size=5000, now=None):
+    """
+    Delete outstanding tokens past their expiry (and their blacklist rows),
+    `batch_size` per transaction so no statement holds locks for long.
+    Returns the number of outstanding tokens deleted.
+    """
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by().values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+
+    if deleted:
+        # let every process drop the purged jtis from its filter
+        bump_blacklist_generation()
+    return deleted
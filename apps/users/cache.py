@@ -0,0 +1,92 @@
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+AUTH_VERSION_KEY = "users:auth-version:{user_id}"
+SNAPSHOT_KEY = "users:snapshot:{user_id}:{version}"
+
+
+def get_auth_version(user_id):
+    key = AUTH_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # random, so an evicted version can never resurrect an old snapshot
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_auth_version(user_id):
+    key = AUTH_VERSION_KEY.format(user_id=user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid.uuid4().hex, None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_auth_version(user_id):
+    """
+    Drop the cached snapshot of `user_id` once the current transaction
+    commits (see apps.tasks.cache.bump_data_version for why not earlier).
+    """
+    key = AUTH_VERSION_KEY.format(user_id=user_id)
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
+
+
+def snapshot_fields():
+    # the password hash stays out of the cache; it is a deferred field on
+    # snapshots and loads from the database if something reads it
+    return [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.attname != "password"
+    ]
+
+
+def get_user_snapshot(user_id):
+    """
+    Read-only User for `user_id`, from the cache when possible (None if
+    there is no such user). Snapshots live AUTH_USER_CACHE_TIMEOUT seconds
+    and are dropped whenever the user is saved or deleted; the drop only
+    reaches processes sharing the cache, so with AUTH_USER_CACHE off
+    every call reads the database.
+    """
+    User = get_user_model()
+    fields = snapshot_fields()
+    if not settings.AUTH_USER_CACHE:
+        values = User.objects.filter(pk=user_id).values_list(*fields).first()
+        return None if values is None else snapshot(fields, values)
+    key = SNAPSHOT_KEY.format(user_id=user_id, version=get_auth_version(user_id))
+    values = cache.get(key)
+    if values is None:
+        values = User.objects.filter(pk=user_id).values_list(*fields).first()
+        if values is None:
+            return None
+        cache.set(key, values, settings.AUTH_USER_CACHE_TIMEOUT)
+    return snapshot(fields, values)
+
+
+async def aget_user_snapshot(user_id):
+    """get_user_snapshot for async views (async cache and ORM calls)."""
+    User = get_user_model()
+    fields = snapshot_fields()
+    if not settings.AUTH_USER_CACHE:
+        values = await User.objects.filter(pk=user_id).values_list(*fields).afirst()
+        return None if values is None else snapshot(fields, values)
+    key = SNAPSHOT_KEY.format(user_id=user_id, version=await aget_auth_version(user_id))
+    values = await cache.aget(key)
+    if values is None:
+        values = await User.objects.filter(pk=user_id).values_list(*fields).afirst()
+        if values is None:
+            return None
+        await cache.aset(key, values, settings.AUTH_USER_CACHE_TIMEOUT)
+    return snapshot(fields, values)
+
+
+def snapshot(fields, values):
+    user = get_user_model().from_db(DEFAULT_DB_ALIAS, fields, values)
+    user.is_snapshot = True
+    return user
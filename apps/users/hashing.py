@@ -0,0 +1,66 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class HashingOverloaded(Exception):
+    """Raised when too many password hashing jobs are already waiting."""
+
+
+class HashingPool:
+    """
+    A few dedicated threads for login / registration work, which is
+    dominated by PBKDF2 password hashing.
+
+    hashlib releases the GIL while hashing, so jobs here never block the
+    event loop or the threads serving other requests. `max_workers` caps
+    how many cores hashing can take; once `max_pending` jobs are running
+    or waiting, `run` refuses more instead of letting a burst of logins
+    queue up behind each other.
+    """
+
+    def __init__(self, max_workers=1, max_pending=16):
+        self.max_pending = max_pending
+        self.pending = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hashing")
+        self._lock = threading.Lock()
+
+    async def run(self, fn, *args):
+        """`await fn(*args)` on the pool; raises HashingOverloaded when full."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise HashingOverloaded()
+            self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(self._job, fn, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _job(self, fn, *args):
+        # pool threads outlive requests, so they tidy up connections like a request would
+        close_old_connections()
+        try:
+            return fn(*args)
+        finally:
+            close_old_connections()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(
+                max_workers=settings.AUTH_HASHING_THREADS,
+                max_pending=settings.AUTH_HASHING_MAX_PENDING,
+            )
+        return _pool
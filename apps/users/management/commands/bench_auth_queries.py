@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.common.benchmarks import time_call, write_report
+from apps.tasks.seed import get_bench_user, seed_tasks
+from apps.users.authentication import CachedJWTAuthentication
+
+PATHS = ["/api/auth/me/", "/api/tasks/"]
+
+
+class Command(BaseCommand):
+    help = "Queries and latency per JWT-authenticated request, with and without the cached user"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--output", default="bench_auth_queries.json")
+
+    def handle(self, *args, **options):
+        user = get_bench_user("auth")
+        if not user.tasks.exists():
+            seed_tasks(user, options["tasks"])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+        report = {"vendor": connection.vendor, "runs": {}}
+        # views read authentication_classes from APIView unless they set their own
+        default = APIView.authentication_classes
+        try:
+            for name, authentication in (("jwt", JWTAuthentication), ("cached", CachedJWTAuthentication)):
+                APIView.authentication_classes = [authentication]
+                report["runs"][name] = {path: self._measure(client, path, options["repeat"]) for path in PATHS}
+        finally:
+            APIView.authentication_classes = default
+
+        for path in PATHS:
+            before, after = report["runs"]["jwt"][path], report["runs"]["cached"][path]
+            self.stdout.write(
+                f"{path:<16} queries {before['queries']} -> {after['queries']}  "
+                f"p50 {before['latency']['p50_ms']}ms -> {after['latency']['p50_ms']}ms"
+            )
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
+
+    def _measure(self, client, path, repeat):
+        client.get(path)  # warm the caches
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path)
+        assert response.status_code == 200, response.status_code
+        return {
+            "queries": len(queries),
+            "latency": time_call(lambda: client.get(path), repeat=repeat),
+        }
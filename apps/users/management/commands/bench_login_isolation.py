@@ -0,0 +1,88 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.common.benchmarks import summarize, write_report
+from apps.tasks.seed import get_bench_user, seed_tasks
+from apps.tasks.views import TaskViewSet
+from apps.users.views import UserLoginView, async_login
+
+PASSWORD = "bench-password-1"
+
+
+class Command(BaseCommand):
+    help = "Task read latency while logins hash passwords: sync login view vs async login + HashingPool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument("--readers", type=int, default=8, help="concurrent task list clients")
+        parser.add_argument("--logins", type=int, default=8, help="concurrent login clients")
+        parser.add_argument("--output", default="bench_login_isolation.json")
+
+    def handle(self, *args, **options):
+        # the real hasher, whatever the settings module uses
+        with override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.PBKDF2PasswordHasher"]):
+            user = get_bench_user("login")
+            user.set_password(PASSWORD)
+            user.save()
+            if not user.tasks.exists():
+                seed_tasks(user, 500)
+            token = str(AccessToken.for_user(user))
+
+            report = {"seconds": options["seconds"], "readers": options["readers"], "logins": options["logins"]}
+            for mode in ("reads_only", "sync_login", "async_login"):
+                report[mode] = asyncio.run(self.run(mode, user.email, token, options))
+                reads = report[mode]["reads"]
+                self.stdout.write(
+                    f"{mode:<12} reads {reads['throughput_rps']:>7} req/s  p50={reads['p50_ms']}ms  "
+                    f"p99={reads['p99_ms']}ms  logins ok={report[mode]['logins']['ok']} "
+                    f"refused={report[mode]['logins']['refused']}"
+                )
+
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
+
+    async def run(self, mode, email, token, options):
+        factory = RequestFactory()
+        # like the ASGI handler: sync views share one thread per worker
+        list_view = sync_to_async(TaskViewSet.as_view({"get": "list"}))
+        sync_login = sync_to_async(UserLoginView.as_view())
+        deadline = time.perf_counter() + options["seconds"]
+        reads, logins = [], {"ok": 0, "refused": 0}
+
+        async def reader():
+            while time.perf_counter() < deadline:
+                request = factory.get("/api/tasks/", HTTP_AUTHORIZATION=f"Bearer {token}")
+                start = time.perf_counter()
+                response = await list_view(request)
+                reads.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.status_code
+
+        async def login_client():
+            body = json.dumps({"email": email, "password": PASSWORD})
+            while time.perf_counter() < deadline:
+                request = factory.post("/api/auth/login/", body, content_type="application/json")
+                view = sync_login if mode == "sync_login" else async_login
+                response = await view(request)
+                if response.status_code == 503:
+                    logins["refused"] += 1
+                    await asyncio.sleep(float(response["Retry-After"]))
+                else:
+                    assert response.status_code == 200, response.status_code
+                    logins["ok"] += 1
+
+        clients = [reader() for _ in range(options["readers"])]
+        if mode != "reads_only":
+            clients += [login_client() for _ in range(options["logins"])]
+        start = time.perf_counter()
+        await asyncio.gather(*clients)
+        elapsed = time.perf_counter() - start
+        return {
+            "reads": dict(summarize(reads), throughput_rps=round(len(reads) / elapsed, 1)),
+            "logins": logins,
+        }
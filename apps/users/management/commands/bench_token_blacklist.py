@@ -0,0 +1,116 @@
+import itertools
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as DefaultRefreshSerializer
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from apps.common.benchmarks import summarize, time_call, write_report
+from apps.tasks.seed import get_bench_user
+from apps.users.blacklist import BlacklistFilter, purge_expired_tokens
+from apps.users.serializers import TokenRefreshSerializer
+from apps.users.tokens import RefreshToken
+
+
+class Command(BaseCommand):
+    help = "Refresh-token blacklist checks, refreshes and purging with millions of historical tokens"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tokens", type=int, default=2_000_000)
+        parser.add_argument("--expired", type=float, default=0.8, help="share of seeded tokens already expired")
+        parser.add_argument("--repeat", type=int, default=500)
+        parser.add_argument("--batch-size", type=int, default=5000, help="purge batch size")
+        parser.add_argument("--output", default="bench_token_blacklist.json")
+
+    def handle(self, *args, **options):
+        user = get_bench_user("blacklist")
+        existing = OutstandingToken.objects.filter(user=user).count()
+        if existing < options["tokens"]:
+            self.stdout.write(f"seeding {options['tokens'] - existing} blacklisted tokens")
+            self._seed(user, options["tokens"] - existing, options["expired"])
+
+        report = {"vendor": connection.vendor, "tokens": options["tokens"]}
+
+        start = time.perf_counter()
+        blacklist = BlacklistFilter()
+        blacklist.might_contain("")
+        report["filter"] = {
+            "build_ms": round((time.perf_counter() - start) * 1000, 1),
+            "entries": blacklist.bloom.count,
+            "bytes": len(blacklist.bloom.bits),
+        }
+
+        unknown = [uuid.uuid4().hex for _ in range(options["repeat"])]
+        jtis = itertools.cycle(unknown)
+        report["check_unknown"] = {
+            "table": time_call(
+                lambda: BlacklistedToken.objects.filter(token__jti=next(jtis)).exists(),
+                repeat=options["repeat"],
+            ),
+            "filter": time_call(lambda: blacklist.might_contain(next(jtis)), repeat=options["repeat"]),
+            "false_positives": sum(blacklist.might_contain(jti) for jti in unknown),
+        }
+
+        report["refresh"] = {
+            "simplejwt": self._refresh(user, DefaultRefreshSerializer, options["repeat"] // 5),
+            "filtered": self._refresh(user, TokenRefreshSerializer, options["repeat"] // 5),
+        }
+
+        start = time.perf_counter()
+        purged = purge_expired_tokens(batch_size=options["batch_size"])
+        report["purge"] = {
+            "deleted": purged,
+            "batch_size": options["batch_size"],
+            "seconds": round(time.perf_counter() - start, 1),
+        }
+
+        self.stdout.write(f"filter      {report['filter']}")
+        for name in ("table", "filter"):
+            self.stdout.write(f"check {name:<6} p50={report['check_unknown'][name]['p50_ms']}ms")
+        for name, row in report["refresh"].items():
+            self.stdout.write(f"refresh {name:<9} p50={row['latency']['p50_ms']}ms queries={row['queries']}")
+        self.stdout.write(f"purge       {report['purge']}")
+        write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
+
+    def _seed(self, user, count, expired, batch_size=10_000):
+        now = timezone.now()
+        created = 0
+        while created < count:
+            size = min(batch_size, count - created)
+            tokens = OutstandingToken.objects.bulk_create([
+                OutstandingToken(
+                    user=user,
+                    jti=uuid.uuid4().hex,
+                    token="",
+                    created_at=now - timedelta(days=8),
+                    expires_at=now + (timedelta(days=-1) if (created + i) % 100 < expired * 100 else timedelta(days=1)),
+                )
+                for i in range(size)
+            ])
+            BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in tokens])
+            created += size
+
+    def _refresh(self, user, serializer_class, repeat):
+        """Rotate one refresh token `repeat` times through TokenRefreshView."""
+        view = TokenRefreshView.as_view(_serializer_class=f"{serializer_class.__module__}.{serializer_class.__name__}")
+        factory = RequestFactory()
+        token = str(RefreshToken.for_user(user))
+        samples, queries = [], 0
+        for _ in range(repeat):
+            request = factory.post("/api/auth/token/refresh/", {"refresh": token}, content_type="application/json")
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = view(request)
+                samples.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.data
+            token = response.data["refresh"]
+            queries = len(captured)
+        return {"latency": summarize(samples), "queries": queries}
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.users.blacklist import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted refresh tokens in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.TOKEN_PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_tokens(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"purged {deleted} expired tokens"))
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # token_blacklist is a third-party app; its expires_at column gets the
+    # index purge_expired_tokens filters on here
+
+    dependencies = [
+        ("users", "0003_user_timezone"),
+        ("token_blacklist", "0013_alter_blacklistedtoken_options_and_more"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS outstandingtoken_expires_at_idx "
+            "ON token_blacklist_outstandingtoken (expires_at)",
+            "DROP INDEX IF EXISTS outstandingtoken_expires_at_idx",
+        ),
+    ]
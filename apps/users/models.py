@@ -53,5 +53,13 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
+    # set on request.user served by CachedJWTAuthentication (apps.users.cache)
+    is_snapshot = False
+
     def __str__(self):
         return self.email
+
+    def save(self, *args, **kwargs):
+        if self.is_snapshot:
+            raise ValueError("Cached user snapshot; load the user from the database to save it.")
+        super().save(*args, **kwargs)
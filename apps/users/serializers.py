@@ -1,8 +1,11 @@
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
 # from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
 from django.contrib.auth import authenticate
 
+from .tokens import RefreshToken
+
 User = get_user_model()
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -48,3 +51,7 @@ class LoginSerializer(serializers.Serializer):
         data["user"] = user
         return data
 
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    # checks the blacklist through apps.users.blacklist.BlacklistFilter
+    token_class = RefreshToken
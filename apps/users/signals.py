@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .blacklist import bump_blacklist_version
+from .cache import bump_auth_version
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # covers deactivation too; queryset.update() on users must call
+    # bump_auth_version itself
+    bump_auth_version(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, created, **kwargs):
+    # makes every process's BlacklistFilter load the new row before its next check
+    if created:
+        bump_blacklist_version(instance.token.jti)
@@ -0,0 +1,10 @@
+from celery import shared_task
+from django.conf import settings
+
+from .blacklist import purge_expired_tokens as purge
+
+
+@shared_task(ignore_result=True)
+def purge_expired_tokens():
+    """Scheduled by CELERY_BEAT_SCHEDULE."""
+    return purge(batch_size=settings.TOKEN_PURGE_BATCH_SIZE)
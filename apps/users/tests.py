@@ -1,3 +1,342 @@
-from django.test import TestCase
+import json
+import time
+from datetime import timedelta
+from unittest import mock
+from uuid import uuid4
 
-# Create your tests here.
+import jwt
+from asgiref.sync import async_to_sync
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.common.async_views import read_view
+
+from . import blacklist
+from .blacklist import VERSION_KEY, BlacklistFilter, BloomFilter, get_filter, purge_expired_tokens
+from .cache import aget_user_snapshot, get_user_snapshot
+from .google import GoogleKeySet, InvalidGoogleToken, verify_id_token
+from .hashing import HashingPool
+from .views import UserMeView, async_login, async_me, async_register
+from .tokens import RefreshToken
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="auth@example.com", username="auth", password="pass12345"
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_user_is_served_from_the_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/auth/me/").json()["username"], "auth")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/auth/me/").json()["username"], "auth")
+
+    def test_saving_the_user_drops_the_snapshot(self):
+        self.client.get("/api/auth/me/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = "renamed"
+            self.user.save()
+        self.assertEqual(self.client.get("/api/auth/me/").json()["username"], "renamed")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get("/api/auth/me/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 401)
+
+    def test_without_a_shared_cache_every_request_reads_the_user(self):
+        self.client.get("/api/auth/me/")
+        # deactivated by another worker: its version bump went to its own cache
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+
+        with override_settings(AUTH_USER_CACHE=False):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get("/api/auth/me/").status_code, 401)
+            self.assertFalse(async_to_sync(aget_user_snapshot)(self.user.pk).is_active)
+
+    def test_snapshot_is_read_only(self):
+        snapshot = get_user_snapshot(self.user.pk)
+        self.assertEqual(snapshot, self.user)
+        self.assertTrue(snapshot.check_password("pass12345"))  # deferred, loaded on use
+        with self.assertRaises(ValueError):
+            snapshot.save()
+
+    def test_async_me_view(self):
+        view = read_view(UserMeView.as_view(), async_me)
+
+        def get(token):
+            headers = {"Authorization": f"Bearer {token}"} if token else {}
+            return async_to_sync(view)(AsyncRequestFactory().get("/api/auth/me/", headers=headers))
+
+        token = AccessToken.for_user(self.user)
+        with self.assertNumQueries(1):
+            response = get(token)
+        self.assertEqual(json.loads(response.content), self.client.get("/api/auth/me/").json())
+        with self.assertNumQueries(0):
+            self.assertEqual(get(token).status_code, 200)
+
+        self.assertEqual(get(None).status_code, 401)
+        self.assertEqual(get("garbage").status_code, 401)
+
+
+class RefreshTokenBlacklistTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        blacklist._filter = None
+        self.user = User.objects.create_user(
+            email="refresh@example.com", username="refresh", password="pass12345"
+        )
+        self.client = APIClient()
+
+    def refresh(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/auth/token/refresh/", {"refresh": token}, format="json")
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(10_000, error_rate=0.01)
+        members = [uuid4().hex for _ in range(10_000)]
+        for member in members:
+            bloom.add(member)
+        self.assertTrue(all(member in bloom for member in members))
+        false_positives = sum(uuid4().hex in bloom for _ in range(10_000))
+        self.assertLess(false_positives, 300)
+
+    def test_rotated_token_cannot_be_reused(self):
+        old = str(RefreshToken.for_user(self.user))
+        response = self.refresh(old)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(response.json()["refresh"]).status_code, 200)
+        self.assertEqual(self.refresh(old).status_code, 401)
+
+    def test_logout_blacklists_the_token(self):
+        token = RefreshToken.for_user(self.user)
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/auth/logout/", {"refresh": str(token)}, format="json")
+        self.assertEqual(response.status_code, 205)
+        self.assertEqual(self.refresh(str(token)).status_code, 401)
+
+    def test_filter_skips_the_table_for_unknown_tokens(self):
+        blacklist = get_filter()
+        token = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            token.blacklist()
+        self.assertTrue(blacklist.might_contain(token["jti"]))
+        with self.assertNumQueries(0):
+            self.assertFalse(blacklist.might_contain(uuid4().hex))
+
+        # blacklisted by this process: added directly, still no query
+        own = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            own.blacklist()
+        with self.assertNumQueries(0):
+            self.assertTrue(blacklist.might_contain(own["jti"]))
+
+        # blacklisted by another process: loaded before the next answer
+        other = RefreshToken.for_user(self.user)
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=OutstandingToken.objects.get(jti=other["jti"]))])
+        cache.incr(VERSION_KEY)
+        with self.assertNumQueries(1):
+            self.assertTrue(blacklist.might_contain(other["jti"]))
+
+    def test_without_a_shared_cache_the_table_is_checked(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertFalse(get_filter().might_contain(token["jti"]))
+
+        # blacklisted by another process, whose counter lives in its own cache
+        other_process = {"cache": LocMemCache("other-process", {}), "_filter": BlacklistFilter()}
+        with mock.patch.multiple(blacklist, **other_process):
+            with self.captureOnCommitCallbacks(execute=True):
+                token.blacklist()
+        self.assertFalse(get_filter().might_contain(token["jti"]))
+
+        with override_settings(AUTH_BLACKLIST_FILTER=False):
+            self.assertEqual(self.refresh(str(token)).status_code, 401)
+
+    def test_filter_catches_out_of_order_commits(self):
+        blacklist = BlacklistFilter(min_capacity=1000)
+        blacklist.might_contain("warm-up")
+        tokens = [RefreshToken.for_user(self.user) for _ in range(2)]
+        outstanding = {o.jti: o for o in OutstandingToken.objects.filter(user=self.user)}
+        first_id = blacklist.last_id + 1
+
+        # the second id commits first, leaving a gap the next sync must revisit
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(pk=first_id + 1, token=outstanding[tokens[1]["jti"]])
+        self.assertTrue(blacklist.might_contain(tokens[1]["jti"]))
+        self.assertIn(first_id, blacklist.gaps)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(pk=first_id, token=outstanding[tokens[0]["jti"]])
+        self.assertTrue(blacklist.might_contain(tokens[0]["jti"]))
+        self.assertEqual(blacklist.gaps, {})
+
+    def test_purge_expired_tokens(self):
+        now = timezone.now()
+        for i, expires_at in enumerate([now - timedelta(days=1)] * 5 + [now + timedelta(days=1)] * 2):
+            token = OutstandingToken.objects.create(
+                user=self.user, jti=f"jti-{i}", token="t", expires_at=expires_at
+            )
+            BlacklistedToken.objects.create(token=token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(purge_expired_tokens(batch_size=2, now=now), 5)
+        self.assertEqual(OutstandingToken.objects.count(), 2)
+        self.assertEqual(BlacklistedToken.objects.count(), 2)
+
+
+class LoginTests(TestCase):
+
+    def test_register_and_login(self):
+        client = APIClient()
+        response = client.post("/api/auth/register/", {
+            "email": "New@example.com", "username": "new", "password": "pass12345", "password2": "pass12345",
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["email"], "new@example.com")
+
+        response = client.post("/api/auth/login/", {"email": "new@example.com", "password": "pass12345"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("refresh", response.json())
+        response = client.post("/api/auth/login/", {"email": "new@example.com", "password": "wrong"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncLoginTests(TransactionTestCase):
+    # the views run their database work on HashingPool threads, which only
+    # see committed data
+
+    def post(self, view, data):
+        request = AsyncRequestFactory().post("/", json.dumps(data), content_type="application/json")
+        return async_to_sync(view)(request)
+
+    def test_register_and_login(self):
+        response = self.post(async_register, {
+            "email": "async@example.com", "username": "async", "password": "pass12345", "password2": "pass12345",
+        })
+        self.assertEqual((response.status_code, json.loads(response.content)["user"]["username"]), (200, "async"))
+
+        response = self.post(async_login, {"email": "async@example.com", "password": "pass12345"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", json.loads(response.content))
+        response = self.post(async_login, {"email": "async@example.com", "password": "wrong"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {"non_field_errors": ["Invalid credentials"]})
+
+    def test_sign_ins_beyond_the_admission_limit_are_refused(self):
+        with mock.patch("apps.users.views.get_pool", return_value=HashingPool(max_pending=0)):
+            response = self.post(async_login, {"email": "a@example.com", "password": "x"})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+
+class LocalGoogle:
+    """Stands in for Google's certs endpoint with locally generated keys."""
+
+    client_id = "test-client.apps.googleusercontent.com"
+
+    def __init__(self, max_age=3600):
+        self.max_age = max_age
+        self.private_keys = {}
+        self.fetches = 0
+        self.rotate("key-1")
+
+    def rotate(self, kid):
+        self.private_keys[kid] = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def fetch(self):
+        self.fetches += 1
+        keys = [
+            dict(json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key())), kid=kid, alg="RS256")
+            for kid, key in self.private_keys.items()
+        ]
+        return {"keys": keys}, self.max_age
+
+    def token(self, kid="key-1", **claims):
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": self.client_id,
+            "sub": "1234567890",
+            "email": "Casey@example.com",
+            "email_verified": True,
+            "iat": now,
+            "exp": now + 3600,
+            **claims,
+        }
+        return jwt.encode(payload, self.private_keys[kid], algorithm="RS256", headers={"kid": kid})
+
+
+@override_settings(GOOGLE_CLIENT_IDS=[LocalGoogle.client_id])
+class GoogleLoginTests(TestCase):
+
+    def setUp(self):
+        self.google = LocalGoogle()
+        self.key_set = GoogleKeySet(fetch=self.google.fetch)
+        patch = mock.patch("apps.users.google.get_key_set", return_value=self.key_set)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def login(self, token):
+        return APIClient().post("/api/auth/google/", {"access_token": token}, format="json")
+
+    def test_creates_the_user_with_a_free_username(self):
+        User.objects.create_user(email="other@example.com", username="casey", password="x")
+        User.objects.create_user(email="other2@example.com", username="casey1", password="x")
+
+        response = self.login(self.google.token())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"], {
+            "id": response.json()["user"]["id"], "email": "casey@example.com", "username": "casey2",
+        })
+        # the same Google account signs in to the same user
+        self.assertEqual(self.login(self.google.token()).json()["user"]["username"], "casey2")
+        self.assertEqual(self.google.fetches, 1)
+
+    def test_rejects_tokens_not_for_us(self):
+        for token in (
+            self.google.token(aud="someone-else"),
+            self.google.token(iss="https://evil.example.com"),
+            self.google.token(exp=int(time.time()) - 3600),
+            self.google.token()[:-4] + "AAAA",
+            "not-a-token",
+        ):
+            self.assertEqual(self.login(token).status_code, 401, token)
+        self.assertEqual(self.login(self.google.token(email_verified=False)).status_code, 400)
+
+    def test_key_rotation_and_expiry(self):
+        verify_id_token(self.google.token())
+        self.google.rotate("key-2")
+        self.key_set.fetched_at -= self.key_set.min_refresh_interval
+        self.assertEqual(verify_id_token(self.google.token(kid="key-2"))["sub"], "1234567890")
+        self.assertEqual(self.google.fetches, 2)
+
+        # unknown key ids refetch at most once per min_refresh_interval
+        with self.assertRaises(InvalidGoogleToken):
+            verify_id_token(jwt.encode({"sub": "x"}, "secret", headers={"kid": "made-up"}))
+        self.assertEqual(self.google.fetches, 2)
+
+        self.key_set.expires_at = 0
+        verify_id_token(self.google.token())
+        self.assertEqual(self.google.fetches, 3)
@@ -0,0 +1,15 @@
+from django.conf import settings
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.settings import api_settings
+
+from .blacklist import get_filter
+
+
+class RefreshToken(tokens.RefreshToken):
+    """RefreshToken whose blacklist check only queries when the filter might match."""
+
+    def check_blacklist(self):
+        # the filter only hears of other processes' blacklisting through a shared cache
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not settings.AUTH_BLACKLIST_FILTER or get_filter().might_contain(jti):
+            super().check_blacklist()
@@ -1,12 +1,24 @@
 # users/urls.py
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
+from django.conf import settings
+from apps.common.async_views import read_view
 from . import views
 
+# async views under ASGI keep password hashing off the request threads
+if settings.AUTH_ASYNC_VIEWS:
+    register_view, login_view = views.async_register, views.async_login
+else:
+    register_view, login_view = views.UserRegistrationView.as_view(), views.UserLoginView.as_view()
+
+me_view = views.UserMeView.as_view()
+if settings.ASYNC_READ_VIEWS:
+    me_view = read_view(me_view, views.async_me)
+
 urlpatterns = [
-    path('register/', views.UserRegistrationView.as_view(), name='register'),
-    path('login/', views.UserLoginView.as_view(), name ='login'),
-    path('me/', views.UserMeView.as_view(), name ='me'),
+    path('register/', register_view, name='register'),
+    path('login/', login_view, name ='login'),
+    path('me/', me_view, name ='me'),
     path('logout/', views.UserLogoutView.as_view(), name ='logout'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
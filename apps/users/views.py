@@ -1,65 +1,126 @@
 # Users/views.py
-from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework import status, permissions
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
+from rest_framework_simplejwt.tokens import TokenError
+from .tokens import RefreshToken
 from .serializers import UserRegistrationSerializer
 from .serializers import LoginSerializer
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.http import JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.request import Request
+from .hashing import HashingOverloaded, get_pool
+from apps.common.async_views import render
+
+def register(data):
+    """(status, body) of a registration; blocking, it hashes the password."""
+    serializer = UserRegistrationSerializer(data=data)
+    if not serializer.is_valid():
+        return status.HTTP_400_BAD_REQUEST, serializer.errors
+    user = serializer.save()
+    refresh = RefreshToken.for_user(user)
+    return status.HTTP_200_OK, {
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email
+        },
+        "access": str(refresh.access_token),
+        "refresh": str(refresh)
+    }
+
+
+def login(data):
+    """(status, body) of a login; blocking, it hashes the password."""
+    serializer = LoginSerializer(data=data)
+    if not serializer.is_valid():
+        return status.HTTP_400_BAD_REQUEST, serializer.errors
+    user = serializer.validated_data["user"]
+    refresh = RefreshToken.for_user(user)
+    return status.HTTP_200_OK, {
+        "access": str(refresh.access_token),
+        "refresh": str(refresh),
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+        }
+    }
+
 
 @method_decorator(csrf_exempt, name="dispatch")
 class UserRegistrationView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        serializer = UserRegistrationSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.save()
-            refresh = RefreshToken.for_user(user)
-            return Response({
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "email": user.email
-                },
-                "access": str(refresh.access_token),
-                "refresh": str(refresh)
-            })
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        code, body = register(request.data)
+        return Response(body, status=code)
 
 @method_decorator(csrf_exempt, name="dispatch")
 class UserLoginView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.validated_data["user"]
-        refresh = RefreshToken.for_user(user)
+        code, body = login(request.data)
+        return Response(body, status=code)
+
+
+async def async_register(request):
+    """POST /api/auth/register/ for the ASGI app: hashing runs on the HashingPool."""
+    return await hashed(register, request)
+
+
+async def async_login(request):
+    """POST /api/auth/login/ for the ASGI app: hashing runs on the HashingPool."""
+    return await hashed(login, request)
+
+
+async def hashed(handler, request):
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    try:
+        data = Request(request, parsers=[JSONParser(), FormParser(), MultiPartParser()]).data
+    except APIException as exc:
+        return JsonResponse({"detail": exc.detail}, status=exc.status_code)
+
+    try:
+        code, body = await get_pool().run(handler, data)
+    except HashingOverloaded:
+        return JsonResponse(
+            {"detail": "Too many sign-ins right now, try again shortly."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+        )
+    return JsonResponse(body, status=code)
 
-        return Response({
-            "access": str(refresh.access_token),
-            "refresh": str(refresh),
-            "user": {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-            }
-        })
+
+# no authentication on these, so nothing for CSRF to protect (set directly,
+# the csrf_exempt decorator of Django < 5 would hide that the views are async)
+async_register.csrf_exempt = True
+async_login.csrf_exempt = True
 
 class UserMeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        return Response({
-            "id": user.id,
-            "username": user.username,
-            "email": user.email
-        })
+        return Response(me(request.user))
+
+
+async def async_me(request):
+    """GET /api/auth/me/ for the ASGI app: the user comes from the async snapshot lookup."""
+    return render(me(request.user))
+
+
+def me(user):
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email
+    }
 
 @method_decorator(csrf_exempt, name="dispatch")
 class UserLogoutView(APIView):
@@ -80,11 +141,24 @@ class UserLogoutView(APIView):
             return Response({"error": "Invalid or expired token."}, status=status.HTTP_400_BAD_REQUEST)
 
 
-import requests
 from django.contrib.auth import get_user_model
 from rest_framework.response import Response
 from allauth.socialaccount.models import SocialAccount
+from .google import GoogleKeysUnavailable, InvalidGoogleToken, verify_id_token
 User = get_user_model()
+
+
+def unique_username(base_username):
+    """`base_username`, or with the lowest free number appended; one query."""
+    taken = set(
+        User.objects.filter(username__startswith=base_username).values_list("username", flat=True)
+    )
+    username, counter = base_username, 1
+    while username in taken:
+        username = f"{base_username}{counter}"
+        counter += 1
+    return username
+
 @method_decorator(csrf_exempt, name="dispatch")
 class GoogleLoginView(APIView):
     permission_classes = [AllowAny]
@@ -97,22 +171,24 @@ class GoogleLoginView(APIView):
         if not google_access_token:
             return Response({'detail': 'Access token is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 2. Verify the token with Google directly
-        google_response = requests.get(
-            "https://oauth2.googleapis.com/tokeninfo",
-            params={"id_token": google_access_token}
-        )
-
-
-        if not google_response.ok:
+        # 2. Verify the ID token locally against Google's signing keys
+        try:
+            user_info = verify_id_token(google_access_token)
+        except InvalidGoogleToken:
             return Response({'detail': 'Invalid Google token'}, status=status.HTTP_401_UNAUTHORIZED)
+        except GoogleKeysUnavailable:
+            return Response({'detail': 'Google sign-in is unavailable, try again shortly'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-        user_info = google_response.json()
         email = user_info.get('email')
         
         if not email:
             return Response({'detail': 'Google account has no email'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # accounts are matched by email, so it has to be one Google verified
+        if not user_info.get('email_verified'):
+            return Response({'detail': 'Google email is not verified'}, status=status.HTTP_400_BAD_REQUEST)
+
         # 3. Normalize email to lowercase (Crucial for matching manual signups)
         email = email.lower()
 
@@ -120,15 +196,8 @@ class GoogleLoginView(APIView):
         try:
             user = User.objects.get(email__iexact=email)
         except User.DoesNotExist:
-            username = email.split('@')[0]
-            base_username = username
-            counter = 1
-            while User.objects.filter(username=username).exists():
-                username = f"{base_username}{counter}"
-                counter += 1
-            
             user = User.objects.create_user(
-                username=username,
+                username=unique_username(email.split('@')[0]),
                 email=email,
                 password=None
             )
@@ -37,6 +37,17 @@ const SubtaskService = {
       );
     },
   
+    // puts one subtask right after another (afterId null = first)
+    moveSubtask: async (subtaskId, afterId) => {
+      return app.authFetch(
+        `${CONFIG.API_BASE_URL}/subtasks/${subtaskId}/move/`,
+        {
+          method: "POST",
+          body: JSON.stringify({ after: afterId }),
+        }
+      );
+    },
+  
     reorderSubtasks: async (payload) => {
       return app.authFetch(
         `${CONFIG.API_BASE_URL}/subtasks/reorder/`,
@@ -281,6 +281,15 @@ const taskApp = {
       }
     },
   
+    moveSubtask: async (id, afterId) => {
+      const res = await SubtaskService.moveSubtask(id, afterId);
+  
+      if (res.ok) {
+        const taskId = document.getElementById("taskId").value;
+        taskApp.loadSubtasks(taskId);
+      }
+    },
+  
     // -------------------------
     // UI RENDERING
     // -------------------------
@@ -315,8 +324,9 @@ const taskApp = {
         const [moved] = ids.splice(fromIndex, 1);
         ids.splice(toIndex, 0, moved);
       
-        const payload = ids.map((id, i) => ({ id, order_index: i }));
-        await taskApp.reorderSubtasks(payload);
+        // order_index is a sparse rank (a sort key, not a position): the
+        // backend only rewrites the moved subtask
+        await taskApp.moveSubtask(moved, toIndex > 0 ? ids[toIndex - 1] : null);
       },
       
     renderDashboard: (tasks) => {
@@ -1,6 +1,40 @@
+import os
+
 bind = "0.0.0.0:8000"
 workers = 2
 timeout = 120
 graceful_timeout = 30
 max_requests = 1000
 max_requests_jitter = 100
+
+# GUNICORN_PROFILE selects how the workers serve requests:
+#   wsgi  TaskMaster.wsgi on gthread workers (default)
+#   asgi  TaskMaster.asgi on uvicorn workers, with the async views
+#         (settings.ASYNC_READ_VIEWS, AUTH_ASYNC_VIEWS) turned on
+profile = os.environ.get("GUNICORN_PROFILE", "wsgi")
+
+if profile == "asgi":
+    wsgi_app = "TaskMaster.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    # one event loop per worker: a request waiting on the database or on AI
+    # inference is a suspended coroutine, not a busy thread
+    os.environ.setdefault("ASYNC_READ_VIEWS", "True")
+    os.environ.setdefault("AUTH_ASYNC_VIEWS", "True")
+elif profile == "wsgi":
+    wsgi_app = "TaskMaster.wsgi:application"
+    # threads per worker (gthread): requests waiting on AI inference
+    # (apps.ai.services.client) don't block the rest of the worker
+    threads = 4
+else:
+    raise ValueError(f"GUNICORN_PROFILE must be 'wsgi' or 'asgi', not {profile!r}")
+
+
+def worker_exit(server, worker):
+    # write buffered InferenceLog rows before the worker goes away
+    from apps.ai.services.inference_log import close_writer
+
+    close_writer()
+    # and close pooled database connections (DB_CONNECTION_MODE=pool)
+    from apps.common.db_pool.base import close_pools
+
+    close_pools()